@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Per-request profiling (see app.services.profiling). When disabled, the
+# profiling middleware and routes are not installed at all.
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED")
+# Share of /api/* requests profiled without being asked to, between 0 and 1
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "regression_profiles"))
+# Oldest profiles are deleted once more than this many are stored
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "100"))
+
+# Background preloading of the fitting and plotting stacks after startup
+# (see app.services.warmup)
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
+# Seconds to wait after startup before warming up, so the first requests are not delayed
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "1.0"))
+
+# Floating point type of the regression design matrix: float64 or float32
+# (float32 halves the memory of large sessions at the cost of precision)
+DESIGN_MATRIX_DTYPE = os.getenv("DESIGN_MATRIX_DTYPE", "float64")
+
+# Session storage (see app.services.session_store): "local" for a single host,
+# "shared" for a directory mounted by every host, "sqlite" for SQLite metadata.
+# All workers serving the API must use the same SESSION_DIR.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "local")
+# Directory holding uploaded datasets and session records
+SESSION_DIR = os.getenv("SESSION_DIR", os.path.join(tempfile.gettempdir(), "regression_sessions"))
+# Number of datasets each worker keeps in memory between requests (0 disables the cache)
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "0"))
+# Sufficient statistics (means and co-moments of all numeric columns) are cached
+# in the dataset metadata only up to this many numeric columns
+STATISTICS_MAX_COLUMNS = int(os.getenv("STATISTICS_MAX_COLUMNS", "256"))
+
+# Native (BLAS/OpenMP) thread budget (see app.services.thread_budget). CPU-bound
+# work runs on a pool of ANALYSIS_POOL_SIZE threads per worker, each limited to
+# THREADS_PER_ANALYSIS native threads; 0 divides the host's CPUs evenly between
+# the WEB_CONCURRENCY workers and their pools.
+THREAD_BUDGET_ENABLED = _env_bool("THREAD_BUDGET_ENABLED", True)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+ANALYSIS_POOL_SIZE = int(os.getenv("ANALYSIS_POOL_SIZE", "2"))
+THREADS_PER_ANALYSIS = int(os.getenv("THREADS_PER_ANALYSIS", "0"))
+
+# Memory-aware admission of analysis and report requests (see
+# app.services.admission). Each worker admits requests while their estimated
+# working sets fit ADMISSION_MEMORY_MB; 0 uses ADMISSION_MEMORY_FRACTION of the
+# container's memory divided between the WEB_CONCURRENCY workers. Requests
+# wait up to ADMISSION_MAX_WAIT seconds, then get a 503 with Retry-After.
+ADMISSION_ENABLED = _env_bool("ADMISSION_ENABLED", True)
+ADMISSION_MEMORY_MB = int(os.getenv("ADMISSION_MEMORY_MB", "0"))
+ADMISSION_MEMORY_FRACTION = float(os.getenv("ADMISSION_MEMORY_FRACTION", "0.6"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "30"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
+# Categorical predictors are fitted from their integer codes without building
+# indicator columns. Cross-validation, diagnostics and bootstrap need the full
+# design matrix and are refused when it would exceed this many values.
+CATEGORICAL_DENSE_MAX_CELLS = int(os.getenv("CATEGORICAL_DENSE_MAX_CELLS", "50000000"))
+# The categorical predictor with the most levels is eliminated from the normal
+# equations; the levels of the others form a dense system, refused above this size.
+CATEGORICAL_MAX_DENSE_LEVELS = int(os.getenv("CATEGORICAL_MAX_DENSE_LEVELS", "2000"))
+
+# Rolling and expanding window regressions return at most this many windows;
+# without an explicit step the windows are spread over the rows to fit it.
+ROLLING_MAX_WINDOWS = int(os.getenv("ROLLING_MAX_WINDOWS", "2000"))
@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app import config
 from app.routers import api
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.thread_budget import thread_budget
+from app.services.warmup import start_background_warmup
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Find the native thread pools before any background thread imports extensions
+    if config.THREAD_BUDGET_ENABLED:
+        thread_budget.initialize()
+    # Preload the fitting and plotting libraries once the server accepts traffic
+    if config.WARMUP_ENABLED:
+        start_background_warmup(config.WARMUP_DELAY)
+    yield
+
+
 app = FastAPI(
     title="Multifactor Linear Regression",
     description="API for multifactor linear regression analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -16,8 +35,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# Opt-in request profiling; nothing is installed unless it is enabled
+if config.PROFILING_ENABLED:
+    from app.routers import profiles
+    from app.services.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiles.router)
+
+# Collect request metrics and report stage timings in the Server-Timing header
+app.add_middleware(MetricsMiddleware)
+
 # Include API routers
 app.include_router(api.router)
 
@@ -27,5 +58,13 @@ async def root():
     return {"message": "Multifactor Linear Regression API is running"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Expose request, stage latency and cache metrics in the Prometheus text format
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,351 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from app.services.metrics import timed
+from app.services.thread_budget import thread_budget
+
+# Resamples drawn and solved together; fixed so results do not depend on the number of workers
+BATCH_SIZE = 64
+# Rows are processed in chunks of at most this many elements (per-row products,
+# weights or resampled residuals) and rows; small chunks stay in cache, which
+# matters more than the per-chunk overhead
+CHUNK_ELEMENTS = 1 << 18
+CHUNK_MAX_ROWS = 4096
+# Up to this many rows pairs resamples use exact multinomial counts, above it Poisson(1) weights
+EXACT_MAX_ROWS = 50_000
+
+
+def _poisson_table() -> np.ndarray:
+    """
+    Lookup table mapping uniform 16-bit integers to Poisson(1) counts
+    """
+    k = np.arange(16)
+    pmf = np.exp(-1.0) / np.cumprod(np.r_[1.0, np.arange(1, 16)])
+    levels = (np.arange(1 << 16) + 0.5) / (1 << 16)
+    return k[np.searchsorted(np.cumsum(pmf), levels)].astype(np.uint8)
+
+
+_POISSON_TABLE = _poisson_table()
+
+
+class Bootstrapper:
+    """
+    Bootstrap confidence intervals of linear regression coefficients
+
+    Pairs resamples are expressed as row weights, so the X'WX and X'Wy of a
+    whole batch of resamples come out of one matrix product of the weight
+    matrix with the per-row cross-products; residual resamples only change
+    X'e*. Each batch is then solved with one batched solve. Batches run in a
+    thread pool, each with its own child of the seed, so the draws are
+    reproducible whatever the number of workers.
+    """
+
+    def __init__(
+            self,
+            method: str = "pairs",
+            n_resamples: int = 1000,
+            ci_method: str = "bca",
+            confidence_level: float = 0.95,
+            seed: int = 0,
+            max_workers: Optional[int] = None
+    ):
+        if method not in ("pairs", "residual"):
+            raise ValueError(f"Unknown bootstrap method: {method}")
+        if ci_method not in ("percentile", "bca"):
+            raise ValueError(f"Unknown bootstrap interval method: {ci_method}")
+        self.method = method
+        self.n_resamples = n_resamples
+        self.ci_method = ci_method
+        self.confidence_level = confidence_level
+        self.seed = seed
+        # Worker threads default to the native thread budget of one analysis
+        self.max_workers = max_workers or thread_budget.threads
+
+    def confidence_intervals(self, X: np.ndarray, y: np.ndarray, feature_names: List[str]) -> Dict[str, Any]:
+        """
+        Compute bootstrap confidence intervals and standard errors
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            Design matrix whose first column is the intercept
+        y : np.ndarray
+            Dependent variable
+        feature_names : List[str]
+            Names of the remaining design columns
+
+        Returns:
+        --------
+        Dict[str, Any]
+            Intervals and standard errors of the coefficients and the intercept
+        """
+        n = X.shape[0]
+        if n < 2:
+            raise ValueError("Bootstrap needs at least two rows")
+
+        # Fit on centered data [1, X - mean] for well-conditioned normal equations
+        means = np.asarray(X[:, 1:], dtype=np.float64).mean(axis=0)
+        y_mean = float(np.mean(y, dtype=np.float64))
+        centering = (means, y_mean)
+
+        with timed("bootstrap_fit"):
+            gram, cross = self._cross_products(X, y, centering)
+            theta = self._solve(gram, cross)
+            gram_inv = np.linalg.pinv(gram)
+
+        with timed("bootstrap_resample"):
+            draws = self._resample(X, y, centering, gram_inv, theta)
+
+        # Intercept in the original units: y_mean + a - means' slopes
+        transform = np.eye(len(theta))
+        transform[0, 1:] = -means
+        estimate = transform @ theta
+        estimate[0] += y_mean
+        draws = draws @ transform.T
+        draws[:, 0] += y_mean
+
+        alpha = 1.0 - self.confidence_level
+        with timed("bootstrap_intervals"):
+            if self.ci_method == "bca":
+                acceleration = self._jackknife_acceleration(X, y, centering, gram_inv, theta, transform)
+                intervals = self._bca_intervals(draws, estimate, acceleration, alpha)
+            else:
+                intervals = np.quantile(draws, [alpha / 2, 1 - alpha / 2], axis=0).T
+        standard_errors = draws.std(axis=0, ddof=1)
+
+        return {
+            "method": self.method,
+            "ci_method": self.ci_method,
+            "resamples": int(draws.shape[0]),
+            "seed": self.seed,
+            "confidence_level": self.confidence_level,
+            "confidence_intervals": {
+                name: intervals[j + 1].tolist() for j, name in enumerate(feature_names)
+            },
+            "intercept_confidence_interval": intervals[0].tolist(),
+            "standard_errors": {
+                name: float(standard_errors[j + 1]) for j, name in enumerate(feature_names)
+            },
+            "intercept_standard_error": float(standard_errors[0])
+        }
+
+    def _chunks(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            chunk_rows: int
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Yield (start, centered design, centered response) for consecutive row chunks
+        """
+        means, y_mean = centering
+        for start in range(0, X.shape[0], chunk_rows):
+            X_chunk = np.array(X[start:start + chunk_rows], dtype=np.float64)
+            X_chunk[:, 1:] -= means
+            yield start, X_chunk, np.asarray(y[start:start + chunk_rows], dtype=np.float64) - y_mean
+
+    def _chunk_rows(self, width: int) -> int:
+        return min(CHUNK_MAX_ROWS, max(256, CHUNK_ELEMENTS // max(width, 1)))
+
+    def _cross_products(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        k = X.shape[1]
+        gram = np.zeros((k, k))
+        cross = np.zeros(k)
+        for _, X_chunk, y_chunk in self._chunks(X, y, centering, self._chunk_rows(k)):
+            gram += X_chunk.T @ X_chunk
+            cross += X_chunk.T @ y_chunk
+        return gram, cross
+
+    def _resample(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            gram_inv: np.ndarray,
+            theta: np.ndarray
+    ) -> np.ndarray:
+        """
+        Coefficients of every resample (centered parametrization), shape (resamples, k)
+        """
+        sizes = [BATCH_SIZE] * (self.n_resamples // BATCH_SIZE)
+        if self.n_resamples % BATCH_SIZE:
+            sizes.append(self.n_resamples % BATCH_SIZE)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+        if self.method == "pairs":
+            def run(seed: np.random.SeedSequence, size: int) -> np.ndarray:
+                return self._pairs_batch(X, y, centering, np.random.default_rng(seed), size)
+        else:
+            residuals = self._residuals(X, y, centering, theta)
+
+            def run(seed: np.random.SeedSequence, size: int) -> np.ndarray:
+                return self._residual_batch(X, residuals, centering, gram_inv, theta,
+                                            np.random.default_rng(seed), size)
+
+        if self.max_workers > 1 and len(sizes) > 1:
+            # One native thread per worker keeps the pool within the analysis' budget
+            with thread_budget.fan_out(), ThreadPoolExecutor(max_workers=min(self.max_workers, len(sizes))) as executor:
+                batches = list(executor.map(run, seeds, sizes))
+        else:
+            batches = [run(seed, size) for seed, size in zip(seeds, sizes)]
+        return np.vstack(batches)
+
+    def _pairs_batch(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            rng: np.random.Generator,
+            size: int
+    ) -> np.ndarray:
+        """
+        Solve a batch of pairs resamples given as row weights
+
+        Row i contributes w_i * [x_i x_i', x_i y_i] to a resample, so with the
+        upper triangle of x_i x_i' and x_i y_i stacked into one row Z_i, the
+        statistics of all resamples are the product W Z.
+        """
+        n, k = X.shape
+        rows, cols = np.triu_indices(k)
+        width = len(rows) + k
+        totals = np.zeros((size, width))
+
+        if n <= EXACT_MAX_ROWS:
+            # Exact multinomial counts: how often each row is drawn in each resample
+            draws = rng.integers(0, n, size=(size, n)) + np.arange(size)[:, None] * n
+            counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        else:
+            counts = None
+
+        for start, X_chunk, y_chunk in self._chunks(X, y, centering, self._chunk_rows(width)):
+            products = np.empty((len(X_chunk), width))
+            np.multiply(X_chunk[:, rows], X_chunk[:, cols], out=products[:, :len(rows)])
+            np.multiply(X_chunk, y_chunk[:, None], out=products[:, len(rows):])
+            if counts is None:
+                # Poisson(1) weights approximate multinomial counts for large samples
+                uniform = rng.integers(0, 1 << 16, size=(size, len(X_chunk)), dtype=np.uint16)
+                weights = _POISSON_TABLE[uniform].astype(np.float64)
+            else:
+                weights = counts[:, start:start + len(X_chunk)].astype(np.float64)
+            totals += weights @ products
+
+        grams = np.zeros((size, k, k))
+        grams[:, rows, cols] = totals[:, :len(rows)]
+        grams[:, cols, rows] = totals[:, :len(rows)]
+        return self._solve(grams, totals[:, len(rows):])
+
+    def _residual_batch(
+            self,
+            X: np.ndarray,
+            residuals: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            gram_inv: np.ndarray,
+            theta: np.ndarray,
+            rng: np.random.Generator,
+            size: int
+    ) -> np.ndarray:
+        """
+        Solve a batch of residual resamples: theta* = theta + (X'X)^-1 X'e*
+        """
+        n, k = X.shape
+        # Gathering from single precision residuals halves the cache misses of the
+        # random reads; the rounding is far below the resampling noise
+        pool = residuals.astype(np.float32)
+        scores = np.zeros((k, size))
+        for _, X_chunk, _ in self._chunks(X, residuals, (centering[0], 0.0), self._chunk_rows(size)):
+            resampled = pool[rng.integers(0, n, size=(len(X_chunk), size))]
+            scores += X_chunk.T @ resampled
+        return theta[None, :] + (gram_inv @ scores).T
+
+    def _residuals(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            theta: np.ndarray
+    ) -> np.ndarray:
+        residuals = np.empty(X.shape[0])
+        for start, X_chunk, y_chunk in self._chunks(X, y, centering, self._chunk_rows(X.shape[1])):
+            residuals[start:start + len(X_chunk)] = y_chunk - X_chunk @ theta
+        return residuals
+
+    def _jackknife_acceleration(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            centering: Tuple[np.ndarray, float],
+            gram_inv: np.ndarray,
+            theta: np.ndarray,
+            transform: np.ndarray
+    ) -> np.ndarray:
+        """
+        BCa acceleration from the closed-form jackknife of least squares
+
+        Dropping row i changes the coefficients by (X'X)^-1 x_i e_i / (1 - h_ii),
+        so the jackknife needs no refits.
+        """
+        chunk_rows = self._chunk_rows(X.shape[1])
+
+        def influence() -> Iterator[np.ndarray]:
+            for _, X_chunk, y_chunk in self._chunks(X, y, centering, chunk_rows):
+                solved = X_chunk @ gram_inv
+                leverage = np.einsum("ij,ij->i", solved, X_chunk)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    scale = (y_chunk - X_chunk @ theta) / (1.0 - leverage)
+                # Rows with leverage 1 cannot be left out and are skipped
+                scale[~np.isfinite(scale)] = np.nan
+                yield (solved * scale[:, None]) @ transform.T
+
+        total = np.zeros(X.shape[1])
+        count = 0
+        for delta in influence():
+            total += np.nansum(delta, axis=0)
+            count += int(np.sum(~np.isnan(delta[:, 0])))
+        mean = total / max(count, 1)
+
+        second = np.zeros(X.shape[1])
+        third = np.zeros(X.shape[1])
+        for delta in influence():
+            centered = delta - mean
+            second += np.nansum(centered ** 2, axis=0)
+            third += np.nansum(centered ** 3, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            acceleration = np.where(second > 0, third / (6.0 * second ** 1.5), 0.0)
+        return acceleration
+
+    def _bca_intervals(
+            self,
+            draws: np.ndarray,
+            estimate: np.ndarray,
+            acceleration: np.ndarray,
+            alpha: float
+    ) -> np.ndarray:
+        """
+        Bias-corrected and accelerated percentile intervals, shape (k, 2)
+        """
+        from scipy.special import ndtr, ndtri
+
+        B = draws.shape[0]
+        # Bias correction from the share of resamples below the estimate (ties count half)
+        below = (draws < estimate).sum(axis=0) + 0.5 * (draws == estimate).sum(axis=0)
+        z0 = ndtri(np.clip(below / B, 0.5 / B, 1 - 0.5 / B))
+
+        intervals = np.empty((draws.shape[1], 2))
+        for j in range(draws.shape[1]):
+            z = z0[j] + ndtri(np.array([alpha / 2, 1 - alpha / 2]))
+            levels = ndtr(z0[j] + z / (1.0 - acceleration[j] * z))
+            intervals[j] = np.quantile(draws[:, j], levels)
+        return intervals
+
+    def _solve(self, gram: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        try:
+            return np.linalg.solve(gram, rhs[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # Singular design in some resample: minimum-norm solutions
+            return (np.linalg.pinv(gram) @ rhs[..., None])[..., 0]
@@ -0,0 +1,181 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from app.services.metrics import timed
+from app.services.thread_budget import thread_budget
+
+# Folds are solved in parallel from this many design columns on; below it
+# the per-fold solves are too cheap for threads to pay off
+PARALLEL_MIN_COLUMNS = 64
+# Rows processed at a time while accumulating per-fold cross-products
+CHUNK_ROWS = 65536
+
+
+def orthonormal_basis(X: np.ndarray) -> np.ndarray:
+    """
+    Orthonormal basis of the column space of X, shape (rows, rank)
+
+    Uses a thin QR factorization and falls back to the SVD when X is rank
+    deficient, where QR without pivoting would span too large a space.
+    """
+    Q, R = np.linalg.qr(X)
+    diagonal = np.abs(np.diag(R))
+    tolerance = diagonal.max(initial=0.0) * max(X.shape) * np.finfo(np.float64).eps
+    if diagonal.size and diagonal.min() > tolerance:
+        return Q
+
+    U, singular_values, _ = np.linalg.svd(X, full_matrices=False)
+    tolerance = singular_values.max(initial=0.0) * max(X.shape) * np.finfo(np.float64).eps
+    return U[:, singular_values > tolerance]
+
+
+def hat_diagonal(Q: np.ndarray) -> np.ndarray:
+    """
+    Leverages h_ii of the hat matrix H = Q Q' without forming the N x N matrix
+    """
+    return np.einsum("ij,ij->i", Q, Q)
+
+
+def assign_folds(n: int, k: int, seed: int) -> np.ndarray:
+    """
+    Deterministic fold index (0..k-1) of every row, with fold sizes differing by at most one
+    """
+    if not 2 <= k <= n:
+        raise ValueError(f"Number of folds must be between 2 and the number of rows ({n})")
+    permutation = np.random.default_rng(seed).permutation(n)
+    folds = np.empty(n, dtype=np.intp)
+    folds[permutation] = np.arange(n) % k
+    return folds
+
+
+class CrossValidator:
+    """
+    Out-of-sample error of a linear regression without refitting it
+
+    Leave-one-out error comes in closed form from the hat-matrix diagonal
+    (the PRESS statistic). K-fold error is obtained by subtracting each
+    fold's cross-products from those of the full data, so the rows are read
+    once in total rather than once per fold.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        # Worker threads default to the native thread budget of one analysis
+        self.max_workers = max_workers or thread_budget.threads
+
+    def evaluate(self, X: np.ndarray, y: np.ndarray, k: int = 5, seed: int = 0) -> Dict[str, Any]:
+        """
+        Compute leave-one-out and k-fold cross-validation errors
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            Design matrix including the intercept column
+        y : np.ndarray
+            Dependent variable
+        k : int
+            Number of folds
+        seed : int
+            Seed of the fold assignment
+
+        Returns:
+        --------
+        Dict[str, Any]
+            PRESS and LOO mean squared error, k-fold mean squared error and
+            the per-fold errors and sizes
+        """
+        with timed("cv_loo"):
+            loo = self.leave_one_out(X, y)
+        with timed("cv_kfold"):
+            kfold = self.k_fold(X, y, k, seed)
+        return {**loo, **kfold}
+
+    def leave_one_out(self, X: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+        """
+        Leave-one-out error from the PRESS statistic sum((e_i / (1 - h_ii))^2)
+        """
+        Q = orthonormal_basis(np.asarray(X, dtype=np.float64))
+        y = np.asarray(y, dtype=np.float64)
+        residuals = y - Q @ (Q.T @ y)
+        leverage = hat_diagonal(Q)
+
+        # Rows with leverage 1 are fitted exactly and cannot be predicted when left out
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loo_residuals = residuals / (1.0 - leverage)
+        press = float(np.sum(loo_residuals ** 2))
+        return {
+            "press": press,
+            "loo_mse": press / len(y)
+        }
+
+    def k_fold(self, X: np.ndarray, y: np.ndarray, k: int = 5, seed: int = 0) -> Dict[str, Any]:
+        """
+        K-fold error from full-data cross-products downdated by each fold
+        """
+        n = X.shape[0]
+        folds = assign_folds(n, k, seed)
+        grams, cross, squares, sizes = self._fold_statistics(X, y, folds, k)
+
+        # Training statistics of fold f are the totals minus fold f
+        gram_total = grams.sum(axis=0)
+        cross_total = cross.sum(axis=0)
+
+        def solve(f: int) -> float:
+            beta = self._solve(gram_total - grams[f], cross_total - cross[f])
+            # Test error sum((y - X b)^2) = y'y - 2 b'X'y + b'X'X b over the fold's rows
+            return float(squares[f] - 2.0 * beta @ cross[f] + beta @ grams[f] @ beta)
+
+        if X.shape[1] >= PARALLEL_MIN_COLUMNS and self.max_workers > 1:
+            # One native thread per worker keeps the pool within the analysis' budget
+            with thread_budget.fan_out(), ThreadPoolExecutor(max_workers=min(self.max_workers, k)) as executor:
+                fold_sse = list(executor.map(solve, range(k)))
+        else:
+            fold_sse = [solve(f) for f in range(k)]
+
+        fold_sse = np.maximum(np.asarray(fold_sse), 0.0)
+        return {
+            "folds": k,
+            "seed": seed,
+            "kfold_mse": float(fold_sse.sum() / n),
+            "fold_mse": (fold_sse / sizes).tolist(),
+            "fold_sizes": sizes.astype(int).tolist()
+        }
+
+    def _fold_statistics(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            folds: np.ndarray,
+            k: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-fold X'X, X'y, y'y and row counts accumulated in one pass over the rows
+        """
+        p = X.shape[1]
+        grams = np.zeros((k, p, p))
+        cross = np.zeros((k, p))
+        squares = np.zeros(k)
+        sizes = np.bincount(folds, minlength=k).astype(np.float64)
+
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk_folds = folds[start:start + CHUNK_ROWS]
+            # Group the chunk's rows by fold so each fold is a contiguous slice
+            order = np.argsort(chunk_folds, kind="stable")
+            X_chunk = np.asarray(X[start:start + CHUNK_ROWS], dtype=np.float64)[order]
+            y_chunk = np.asarray(y[start:start + CHUNK_ROWS], dtype=np.float64)[order]
+            bounds = np.searchsorted(chunk_folds[order], np.arange(k + 1))
+            for f in range(k):
+                a, b = bounds[f], bounds[f + 1]
+                if a == b:
+                    continue
+                grams[f] += X_chunk[a:b].T @ X_chunk[a:b]
+                cross[f] += X_chunk[a:b].T @ y_chunk[a:b]
+                squares[f] += y_chunk[a:b] @ y_chunk[a:b]
+
+        return grams, cross, squares, sizes
+
+    def _solve(self, gram: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+        try:
+            return np.linalg.solve(gram, rhs)
+        except np.linalg.LinAlgError:
+            # Singular training design (collinear predictors): minimum-norm solution
+            return np.linalg.lstsq(gram, rhs, rcond=None)[0]
@@ -0,0 +1,118 @@
+import numpy as np
+from typing import Dict, Any, List
+from app.models.cross_validation import orthonormal_basis, hat_diagonal
+from app.models.regression import correlation_matrix
+from app.services.metrics import timed
+
+
+class RegressionDiagnostics:
+    """
+    Multicollinearity and influence diagnostics of a least squares fit
+
+    Variance inflation factors are the diagonal of the inverse correlation
+    matrix of the predictors, which replaces one auxiliary regression per
+    predictor. Leverages, studentized residuals and Cook's distances come from
+    the thin orthonormal factor Q of the design (N x p), never from the
+    N x N hat matrix.
+    """
+
+    def compute(self, X: np.ndarray, y: np.ndarray, feature_names: List[str]) -> Dict[str, Any]:
+        """
+        Compute regression diagnostics
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            Design matrix whose first column is the intercept
+        y : np.ndarray
+            Dependent variable
+        feature_names : List[str]
+            Names of the remaining design columns
+
+        Returns:
+        --------
+        Dict[str, Any]
+            VIF per predictor, leverage, Cook's distance and externally
+            studentized residual per observation, the rule-of-thumb thresholds
+            and the indices of influential observations
+        """
+        with timed("diagnostics_vif"):
+            vif = self.variance_inflation_factors(np.asarray(X[:, 1:]))
+
+        with timed("diagnostics_influence"):
+            influence = self.influence(X, y)
+
+        n = len(y)
+        rank = influence.pop("rank")
+        thresholds = {
+            "leverage": 2.0 * rank / n,
+            "cooks_distance": 4.0 / n,
+            "studentized_residual": 3.0
+        }
+        leverage = influence["leverage"]
+        cooks = influence["cooks_distance"]
+        studentized = influence["studentized_residuals"]
+        with np.errstate(invalid="ignore"):
+            influential = np.flatnonzero(
+                (cooks > thresholds["cooks_distance"])
+                | (np.abs(studentized) > thresholds["studentized_residual"])
+                | (leverage > thresholds["leverage"])
+            )
+
+        return {
+            "vif": dict(zip(feature_names, self._finite_list(vif))),
+            "leverage": leverage.tolist(),
+            "cooks_distance": self._finite_list(cooks),
+            "studentized_residuals": self._finite_list(studentized),
+            "thresholds": thresholds,
+            "influential_observations": influential.tolist()
+        }
+
+    def variance_inflation_factors(self, predictors: np.ndarray) -> np.ndarray:
+        """
+        VIF_j = [R^-1]_jj, with R the correlation matrix of the predictors
+        """
+        p = predictors.shape[1]
+        if p == 1:
+            return np.ones(1)
+        corr = correlation_matrix(predictors)
+        try:
+            vif = np.diag(np.linalg.inv(corr))
+        except np.linalg.LinAlgError:
+            # Perfectly collinear predictors
+            return np.full(p, np.inf)
+        # A constant predictor has no defined correlation
+        return np.where(np.isfinite(vif), vif, np.inf)
+
+    def influence(self, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """
+        Leverage, externally studentized residuals and Cook's distance from the thin QR factor
+        """
+        Q = orthonormal_basis(np.asarray(X, dtype=np.float64))
+        y = np.asarray(y, dtype=np.float64)
+        n, rank = Q.shape
+        residuals = y - Q @ (Q.T @ y)
+        leverage = hat_diagonal(Q)
+
+        residual_df = n - rank
+        sigma2 = float(residuals @ residuals) / residual_df if residual_df > 0 else np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Internally studentized residuals r_i = e_i / (s * sqrt(1 - h_ii))
+            internal = residuals / np.sqrt(sigma2 * (1.0 - leverage))
+            cooks = internal ** 2 * leverage / (rank * (1.0 - leverage))
+            # Leaving observation i out: t_i = r_i * sqrt((n - p - 1) / (n - p - r_i^2))
+            external = internal * np.sqrt((residual_df - 1) / (residual_df - internal ** 2))
+
+        return {
+            "rank": rank,
+            "leverage": leverage,
+            "cooks_distance": cooks,
+            "studentized_residuals": external
+        }
+
+    @staticmethod
+    def _finite_list(values: np.ndarray) -> List[float]:
+        # JSON has no infinities; undefined values (leverage 1, collinearity) become null
+        if np.isfinite(values).all():
+            return values.tolist()
+        return [float(v) if np.isfinite(v) else None for v in values]
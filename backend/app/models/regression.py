@@ -1,8 +1,13 @@
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-from sklearn.metrics import mean_squared_error
-from typing import Dict, Any, List, Tuple
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
+from app.services.metrics import timed
+
+# Values of the intermediate block per chunk of levels of an eliminated categorical predictor
+CATEGORICAL_CHUNK_VALUES = 1 << 22
+
+if TYPE_CHECKING:
+    from app.services.data_processor import CategoricalDesign
 
 
 class LinearRegression:
@@ -31,69 +36,118 @@ class LinearRegression:
         Dict[str, Any]
             Dictionary with model results
         """
+        # Pack the data into the [const, X, y] layout used by fit_design
+        block = np.empty((len(X), X.shape[1] + 2), dtype=np.float64, order="F")
+        block[:, 0] = 1.0
+        block[:, 1:-1] = X.to_numpy(dtype=np.float64)
+        block[:, -1] = y.to_numpy(dtype=np.float64)
+
+        return self.fit_design(block, list(X.columns), y.name)
+
+    def fit_design(
+            self,
+            block: np.ndarray,
+            feature_names: List[str],
+            dependent_variable: str
+    ) -> Dict[str, Any]:
+        """
+        Fit the regression model on a prepared design matrix
+
+        Parameters:
+        -----------
+        block : np.ndarray
+            Array laid out as ``[const, x1, ..., xp, y]``, as returned by
+            DataProcessor.build_design_matrix. Only views of it are used.
+        feature_names : List[str]
+            Names of the independent variables x1..xp
+        dependent_variable : str
+            Name of the dependent variable
+
+        Returns:
+        --------
+        Dict[str, Any]
+            Dictionary with model results
+        """
+        # statsmodels is imported on first use to keep startup fast
+        import statsmodels.api as sm
+
+        X_with_const = block[:, :-1]
+        y = block[:, -1]
+        param_names = ["const"] + list(feature_names)
+
         # Store data
-        self.X = X
+        self.X = X_with_const
         self.y = y
 
-        # Add constant for intercept
-        X_with_const = sm.add_constant(X)
-
         # Fit the model
-        self.model = sm.OLS(y, X_with_const).fit()
+        with timed("ols_fit"):
+            self.model = sm.OLS(y, X_with_const).fit()
 
         # Make predictions
-        y_pred = self.model.predict(X_with_const)
+        with timed("predict"):
+            y_pred = self.model.fittedvalues
+            residual = y - y_pred
 
         # Calculate MSE
-        mse = mean_squared_error(y, y_pred)
+        mse = float(np.mean(residual ** 2))
 
         # Create a dataframe with actual vs predicted values and X values
         pred_vs_actual = pd.DataFrame({
             'actual': y,
             'predicted': y_pred,
-            'residual': y - y_pred
+            'residual': residual
         })
 
         # Add all X columns to the pred_vs_actual dataframe
-        for column in X.columns:
-            pred_vs_actual[column] = X[column]
+        for j, column in enumerate(feature_names, start=1):
+            pred_vs_actual[column] = X_with_const[:, j]
 
-        # All data including dependent variable
-        all_data = pd.concat([X, y], axis=1)
+        # Calculate both Pearson and Spearman correlation matrices over
+        # all data including dependent variable
+        with timed("correlation"):
+            all_names = list(feature_names) + [dependent_variable]
+            all_data = block[:, 1:]
+            pearson_correlation = pd.DataFrame(
+                correlation_matrix(all_data), index=all_names, columns=all_names
+            )
+            spearman_correlation = pd.DataFrame(
+                spearman_correlation_matrix(all_data), index=all_names, columns=all_names
+            )
 
-        # Calculate both Pearson and Spearman correlation matrices
-        pearson_correlation = all_data.corr(method='pearson')
-        spearman_correlation = all_data.corr(method='spearman')
+        params = self.model.params
 
-        # Extract coefficients with indices as variable names
-        coefficients = self.model.params[1:].to_dict()  # Skip constant/intercept
-        intercept = self.model.params[0]
+        # Extract coefficients with variable names (skip constant/intercept)
+        coefficients = {name: float(value) for name, value in zip(feature_names, params[1:])}
+        intercept = float(params[0])
 
         # Extract p-values
-        p_values = self.model.pvalues[1:].to_dict()  # Skip constant/intercept
+        p_values = {name: float(value) for name, value in zip(feature_names, self.model.pvalues[1:])}
 
         # Extract R-squared
-        r_squared = self.model.rsquared
+        r_squared = float(self.model.rsquared)
 
         # Extract confidence intervals for all parameters (including intercept)
-        conf_intervals = self.model.conf_int(alpha=0.05)  # 95% confidence intervals
+        conf_intervals = np.asarray(self.model.conf_int(alpha=0.05))  # 95% confidence intervals
 
         # Convert confidence intervals to a more usable format
         conf_intervals_dict = {}
-        for idx, param_name in enumerate(self.model.params.index):
+        for idx, param_name in enumerate(param_names):
             if idx == 0:  # This is the intercept
                 continue
             conf_intervals_dict[param_name] = {
-                'lower': conf_intervals.iloc[idx, 0],
-                'upper': conf_intervals.iloc[idx, 1]
+                'lower': float(conf_intervals[idx, 0]),
+                'upper': float(conf_intervals[idx, 1])
             }
 
         # Get intercept confidence interval separately
         intercept_conf_interval = {
-            'lower': conf_intervals.iloc[0, 0],
-            'upper': conf_intervals.iloc[0, 1]
+            'lower': float(conf_intervals[0, 0]),
+            'upper': float(conf_intervals[0, 1])
         }
 
+        with timed("model_summary"):
+            model_summary = self.model.summary(yname=dependent_variable, xname=param_names)
+
         return {
             "coefficients": coefficients,
             "intercept": intercept,
@@ -106,8 +160,411 @@ class LinearRegression:
             "residuals": pred_vs_actual[['residual']],
             "correlation_matrix": pearson_correlation,
             "spearman_correlation": spearman_correlation,
-            "model_summary": self.model.summary(),
-            "independent_var_count": len(X.columns)
+            "model_summary": model_summary,
+            "independent_var_count": len(feature_names)
+        }
+
+    def fit_statistics(
+            self,
+            count: int,
+            means: np.ndarray,
+            comoment: np.ndarray,
+            feature_names: List[str],
+            dependent_variable: str
+    ) -> Dict[str, Any]:
+        """
+        Fit the regression model from sufficient statistics alone
+
+        The cost depends only on the number of variables, not on the number
+        of rows. Per-row outputs (predictions, residuals), the Spearman
+        correlation and the model summary need the data and are None.
+
+        Parameters:
+        -----------
+        count : int
+            Number of rows
+        means : np.ndarray
+            Means of ``[x1, ..., xp, y]``
+        comoment : np.ndarray
+            Centered cross-products of ``[x1, ..., xp, y]``
+        feature_names : List[str]
+            Names of the independent variables x1..xp
+        dependent_variable : str
+            Name of the dependent variable
+
+        Returns:
+        --------
+        Dict[str, Any]
+            Dictionary with model results, with the keys of fit_design
+        """
+        from scipy import stats
+
+        p = len(feature_names)
+        with timed("ols_fit"):
+            Sxx = comoment[:p, :p]
+            Sxy = comoment[:p, p]
+            Syy = float(comoment[p, p])
+
+            # Centered normal equations; the pseudo-inverse handles collinear predictors as statsmodels does
+            Sxx_inv = np.linalg.pinv(Sxx)
+            beta = Sxx_inv @ Sxy
+            intercept = float(means[p] - beta @ means[:p])
+
+            ssr = max(Syy - float(beta @ Sxy), 0.0)
+            rank = int(np.linalg.matrix_rank(Sxx)) + 1 if p else 1
+            df_resid = count - rank
+            sigma2 = ssr / df_resid if df_resid > 0 else np.nan
+
+            # Covariance of the slopes and the variance of the intercept
+            slope_se = np.sqrt(sigma2 * np.diag(Sxx_inv))
+            intercept_se = np.sqrt(sigma2 * (1.0 / count + means[:p] @ Sxx_inv @ means[:p]))
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_values = beta / slope_se
+            p_values = 2 * stats.t.sf(np.abs(t_values), df_resid)
+            t_critical = stats.t.ppf(0.975, df_resid)  # 95% confidence intervals
+
+        with timed("correlation"):
+            all_names = list(feature_names) + [dependent_variable]
+            pearson_correlation = pd.DataFrame(
+                _comoment_correlation(comoment), index=all_names, columns=all_names
+            )
+
+        return {
+            "coefficients": {name: float(value) for name, value in zip(feature_names, beta)},
+            "intercept": intercept,
+            "r_squared": 1.0 - ssr / Syy if Syy > 0 else np.nan,
+            "mse": ssr / count,
+            "p_values": {name: float(value) for name, value in zip(feature_names, p_values)},
+            "confidence_intervals": {
+                name: {
+                    'lower': float(beta[j] - t_critical * slope_se[j]),
+                    'upper': float(beta[j] + t_critical * slope_se[j])
+                }
+                for j, name in enumerate(feature_names)
+            },
+            "intercept_confidence_interval": {
+                'lower': float(intercept - t_critical * intercept_se),
+                'upper': float(intercept + t_critical * intercept_se)
+            },
+            "predicted_vs_actual": None,
+            "residuals": None,
+            "correlation_matrix": pearson_correlation,
+            "spearman_correlation": None,
+            "model_summary": None,
+            "independent_var_count": len(feature_names)
+        }
+
+    def fit_categorical(self, design: "CategoricalDesign", max_dense_levels: int = None) -> Dict[str, Any]:
+        """
+        Fit the regression model on a design with categorical predictors
+
+        The indicator columns are never built: their blocks of the normal
+        equations are per-level sums of the codes (level counts, per-level
+        sums of the numeric columns and contingency tables between two
+        categorical predictors). The block of the categorical predictor with
+        the most levels is diagonal and is eliminated through its Schur
+        complement; its cross-products with the other columns are kept
+        sparse, so time and memory grow with the rows plus the non-zero
+        cells of those contingency tables, not with rows x levels. The
+        remaining dense system has one row per numeric predictor and level of
+        the other categorical predictors. Numeric columns are centered first,
+        which only shifts the intercept.
+
+        Parameters:
+        -----------
+        design : CategoricalDesign
+            Design built by DataProcessor.build_categorical_design
+        max_dense_levels : int, optional
+            Maximum number of levels of the categorical predictors other than
+            the one with the most levels (the dense part of the system)
+
+        Returns:
+        --------
+        Dict[str, Any]
+            Dictionary with model results, with the keys of fit_design;
+            coefficients of indicator columns are named ``predictor[level]``
+            and the model summary is None
+
+        Raises:
+        -------
+        ValueError
+            If the dense part of the system exceeds ``max_dense_levels``
+        """
+        from scipy import sparse, stats
+
+        block = design.block
+        n = design.rows
+        q = len(design.numeric_names)
+        dependent_variable = design.dependent_variable
+
+        # The predictor with the most levels is eliminated, the others stay in the dense system
+        eliminated = max(range(len(design.factors)), key=lambda f: len(design.factors[f][2]))
+        kept_factors = [f for f in range(len(design.factors)) if f != eliminated]
+        sizes = [len(design.factors[f][2]) for f in kept_factors]
+        if max_dense_levels is not None and sum(sizes) > max_dense_levels:
+            raise ValueError(
+                f"Categorical predictors other than {design.factors[eliminated][0]} have {sum(sizes)} levels "
+                f"together, more than the limit of {max_dense_levels}"
+            )
+
+        with timed("ols_fit"):
+            means, comoment = centered_crossproducts(block[:, 1:])
+            Syy = float(comoment[q, q])
+
+            # Sums of const, the centered predictors and the centered y per level of every categorical predictor
+            level_sums = []
+            for _, codes, levels, _ in design.factors:
+                kept = codes >= 0
+                level = codes[kept]
+                sums = np.empty((q + 2, len(levels)))
+                sums[0] = np.bincount(level, minlength=len(levels))
+                for j in range(q + 1):
+                    sums[1 + j] = np.bincount(level, weights=block[kept, 1 + j] - means[j], minlength=len(levels))
+                level_sums.append(sums)
+
+            offsets = q + 1 + np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+            m = int(offsets[-1])
+
+            # Dense block: const, centered numeric predictors and the indicators of the other predictors
+            A = np.zeros((m, m))
+            a = np.zeros(m)
+            A[0, 0] = n
+            A[1:q + 1, 1:q + 1] = comoment[:q, :q]
+            a[1:q + 1] = comoment[:q, q]
+            for i, f in enumerate(kept_factors):
+                span = slice(offsets[i], offsets[i + 1])
+                A[:q + 1, span] = level_sums[f][:q + 1]
+                A[span, :q + 1] = level_sums[f][:q + 1].T
+                A[span, span] = np.diag(level_sums[f][0])
+                a[span] = level_sums[f][q + 1]
+                for k, g in enumerate(kept_factors[i + 1:], start=i + 1):
+                    table = self._contingency(design.factors[f][1], design.factors[g][1], sizes[i], sizes[k]).toarray()
+                    A[span, offsets[k]:offsets[k + 1]] = table
+                    A[offsets[k]:offsets[k + 1], span] = table.T
+
+            # Blocks of the eliminated predictor: its level counts C (diagonal) and its sparse cross-products B
+            codes = design.factors[eliminated][1]
+            counts = level_sums[eliminated][0]
+            c = level_sums[eliminated][q + 1]
+            B = sparse.vstack(
+                [sparse.csr_matrix(level_sums[eliminated][:q + 1])]
+                + [self._contingency(design.factors[f][1], codes, sizes[i], len(counts))
+                   for i, f in enumerate(kept_factors)],
+                format="csc"
+            )
+            w = c / counts  # C^-1 c
+
+            # Schur complement, inverted from its eigendecomposition; dropping the
+            # null directions handles collinear columns as statsmodels does
+            S = A - (B @ sparse.diags(1.0 / counts) @ B.T).toarray()
+            eigenvalues, eigenvectors = np.linalg.eigh(S)
+            kept_directions = eigenvalues > eigenvalues[-1] * m * np.finfo(np.float64).eps
+            U = eigenvectors[:, kept_directions] / np.sqrt(eigenvalues[kept_directions])  # S^+ = U U'
+            S_inv = U @ U.T
+            beta_dense = S_inv @ (a - B @ w)
+            beta_eliminated = w - (B.T @ beta_dense) / counts
+
+            ssr = max(Syy - float(beta_dense @ a) - float(beta_eliminated @ c), 0.0)
+            rank = int(kept_directions.sum()) + len(counts)
+            df_resid = n - rank
+            sigma2 = ssr / df_resid if df_resid > 0 else np.nan
+
+            # Diagonal of the inverse normal matrix, block by block; the eliminated
+            # block's correction C^-1 B' S^+ B C^-1 is summed over chunks of levels
+            dense_var = np.diag(S_inv)
+            correction = np.empty(len(counts))
+            chunk = max(1, CATEGORICAL_CHUNK_VALUES // max(U.shape[1], 1))
+            for start in range(0, len(counts), chunk):
+                projected = B[:, start:start + chunk].T @ U
+                correction[start:start + chunk] = np.einsum("ij,ij->i", projected, projected)
+            eliminated_var = 1.0 / counts + correction / counts ** 2
+
+            # Back to the uncentered intercept
+            shift = np.zeros(m)
+            shift[0] = 1.0
+            shift[1:q + 1] = -means[:q]
+            intercept = float(means[q] + shift @ beta_dense)
+            intercept_se = float(np.sqrt(sigma2 * (shift @ S_inv @ shift)))
+
+            # Coefficients and variances per categorical predictor, in the order of the design
+            factor_beta = {eliminated: beta_eliminated}
+            factor_var = {eliminated: eliminated_var}
+            for i, f in enumerate(kept_factors):
+                factor_beta[f] = beta_dense[offsets[i]:offsets[i + 1]]
+                factor_var[f] = dense_var[offsets[i]:offsets[i + 1]]
+            order = range(len(design.factors))
+            beta = np.concatenate([beta_dense[1:q + 1]] + [factor_beta[f] for f in order])
+            slope_se = np.sqrt(sigma2 * np.concatenate([dense_var[1:q + 1]] + [factor_var[f] for f in order]))
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_values = beta / slope_se
+            p_values = 2 * stats.t.sf(np.abs(t_values), df_resid)
+            t_critical = stats.t.ppf(0.975, df_resid)  # 95% confidence intervals
+
+        with timed("predict"):
+            y = block[:, -1]
+            y_pred = block[:, 1:q + 1] @ beta_dense[1:q + 1] + intercept
+            for f, (_, codes, _, _) in enumerate(design.factors):
+                # The extra zero is the coefficient of the reference level, indexed by code -1
+                y_pred += np.append(factor_beta[f], 0.0)[codes]
+            residual = y - y_pred
+
+        pred_vs_actual = pd.DataFrame({
+            'actual': y,
+            'predicted': y_pred,
+            'residual': residual
+        })
+        for j, column in enumerate(design.numeric_names, start=1):
+            pred_vs_actual[column] = block[:, j]
+
+        # Correlations of the numeric variables only
+        with timed("correlation"):
+            all_names = design.numeric_names + [dependent_variable]
+            pearson_correlation = pd.DataFrame(
+                _comoment_correlation(comoment), index=all_names, columns=all_names
+            )
+            spearman_correlation = pd.DataFrame(
+                spearman_correlation_matrix(block[:, 1:]), index=all_names, columns=all_names
+            )
+
+        feature_names = design.feature_names
+        return {
+            "coefficients": {name: float(value) for name, value in zip(feature_names, beta)},
+            "intercept": intercept,
+            "r_squared": 1.0 - ssr / Syy if Syy > 0 else np.nan,
+            "mse": float(np.mean(residual ** 2)),
+            "p_values": {name: float(value) for name, value in zip(feature_names, p_values)},
+            "confidence_intervals": {
+                name: {
+                    'lower': float(beta[j] - t_critical * slope_se[j]),
+                    'upper': float(beta[j] + t_critical * slope_se[j])
+                }
+                for j, name in enumerate(feature_names)
+            },
+            "intercept_confidence_interval": {
+                'lower': float(intercept - t_critical * intercept_se),
+                'upper': float(intercept + t_critical * intercept_se)
+            },
+            "predicted_vs_actual": pred_vs_actual,
+            "residuals": pred_vs_actual[['residual']],
+            "correlation_matrix": pearson_correlation,
+            "spearman_correlation": spearman_correlation,
+            "model_summary": None,
+            "independent_var_count": len(feature_names)
+        }
+
+    def _contingency(self, first: np.ndarray, second: np.ndarray, size1: int, size2: int):
+        """
+        Cross-products of the indicator columns of two categorical predictors (rows at both levels), as a sparse matrix
+        """
+        from scipy import sparse
+
+        both = (first >= 0) & (second >= 0)
+        ones = np.ones(int(both.sum()))
+        # Duplicate cells are summed on conversion
+        return sparse.coo_matrix((ones, (first[both], second[both])), shape=(size1, size2)).tocsr()
+
+    def fit_multi(
+            self,
+            block: np.ndarray,
+            feature_names: List[str],
+            dependent_variables: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Fit one regression per dependent variable on a shared design matrix
+
+        The design is factorized once (thin SVD, the pseudo-inverse statsmodels
+        uses) and all dependent variables are solved together as the columns
+        of one right-hand side, so each additional target costs a
+        matrix-vector product instead of a new factorization.
+
+        Parameters:
+        -----------
+        block : np.ndarray
+            Array laid out as ``[const, x1, ..., xp, y1, ..., yt]``, as returned by
+            DataProcessor.build_design_matrix with several dependent variables
+        feature_names : List[str]
+            Names of the independent variables x1..xp
+        dependent_variables : List[str]
+            Names of the dependent variables y1..yt
+
+        Returns:
+        --------
+        Dict[str, Any]
+            ``targets`` with the results of every dependent variable (the keys
+            of fit_design without correlations and model summary; per-row
+            outputs hold only actual, predicted and residual values) and the
+            Pearson ``correlation_matrix`` of all variables
+        """
+        from scipy import stats
+
+        k = len(feature_names) + 1
+        X = block[:, :k]
+        Y = block[:, k:]
+        n = X.shape[0]
+
+        with timed("ols_fit"):
+            U, singular_values, Vt = np.linalg.svd(X, full_matrices=False)
+            keep = singular_values > 1e-15 * singular_values.max(initial=0.0)
+            U, singular_values, Vt = U[:, keep], singular_values[keep], Vt[keep]
+            rank = int(keep.sum())
+
+            # One projection for all targets
+            UtY = U.T @ Y
+            params = Vt.T @ (UtY / singular_values[:, None])
+            XtX_inv_diag = np.sum((Vt.T / singular_values) ** 2, axis=1)
+
+        with timed("predict"):
+            fitted = U @ UtY
+            residual = Y - fitted
+
+        with timed("inference"):
+            ssr = np.sum(residual ** 2, axis=0)
+            tss = np.sum((Y - Y.mean(axis=0)) ** 2, axis=0)
+            df_resid = n - rank
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sigma2 = ssr / df_resid if df_resid > 0 else np.full(len(ssr), np.nan)
+                se = np.sqrt(np.outer(XtX_inv_diag, sigma2))
+                t_values = params / se
+            p_values = 2 * stats.t.sf(np.abs(t_values), df_resid)
+            t_critical = stats.t.ppf(0.975, df_resid)  # 95% confidence intervals
+            lower = params - t_critical * se
+            upper = params + t_critical * se
+
+        targets = {}
+        for j, name in enumerate(dependent_variables):
+            pred_vs_actual = pd.DataFrame({
+                'actual': Y[:, j],
+                'predicted': fitted[:, j],
+                'residual': residual[:, j]
+            })
+            targets[name] = {
+                "coefficients": {var: float(value) for var, value in zip(feature_names, params[1:, j])},
+                "intercept": float(params[0, j]),
+                "r_squared": float(1.0 - ssr[j] / tss[j]) if tss[j] > 0 else np.nan,
+                "mse": float(ssr[j] / n),
+                "p_values": {var: float(value) for var, value in zip(feature_names, p_values[1:, j])},
+                "confidence_intervals": {
+                    var: {'lower': float(lower[i, j]), 'upper': float(upper[i, j])}
+                    for i, var in enumerate(feature_names, start=1)
+                },
+                "intercept_confidence_interval": {'lower': float(lower[0, j]), 'upper': float(upper[0, j])},
+                "predicted_vs_actual": pred_vs_actual,
+                "residuals": pred_vs_actual[['residual']],
+                "independent_var_count": len(feature_names)
+            }
+
+        with timed("correlation"):
+            all_names = list(feature_names) + list(dependent_variables)
+            pearson_correlation = pd.DataFrame(
+                correlation_matrix(block[:, 1:]), index=all_names, columns=all_names
+            )
+
+        return {
+            "dependent_variables": list(dependent_variables),
+            "targets": targets,
+            "correlation_matrix": pearson_correlation
         }
 
     def predict(self, X_new: pd.DataFrame) -> np.ndarray:
@@ -127,8 +584,62 @@ class LinearRegression:
         if self.model is None:
             raise ValueError("Model not fitted yet")
 
+        import statsmodels.api as sm
+
         # Add constant for intercept
         X_new_with_const = sm.add_constant(X_new)
 
         # Make predictions
-        return self.model.predict(X_new_with_const)
\ No newline at end of file
+        return self.model.predict(X_new_with_const)
+
+
+def correlation_matrix(data: np.ndarray, chunk_rows: int = 65536) -> np.ndarray:
+    """
+    Pearson correlation matrix of the columns of ``data``
+
+    The centered cross-products are accumulated over row chunks, so the
+    temporary memory is bounded by ``chunk_rows`` instead of a full copy.
+
+    Parameters:
+    -----------
+    data : np.ndarray
+        Array of shape (rows, variables)
+    chunk_rows : int
+        Number of rows centered at a time
+
+    Returns:
+    --------
+    np.ndarray
+        Correlation matrix of shape (variables, variables)
+    """
+    _, cross = centered_crossproducts(data, chunk_rows)
+    return _comoment_correlation(cross)
+
+
+def centered_crossproducts(data: np.ndarray, chunk_rows: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Column means and centered cross-products of ``data``, accumulated over row chunks
+    """
+    means = data.mean(axis=0, dtype=np.float64)
+    cross = np.zeros((data.shape[1], data.shape[1]))
+    for start in range(0, data.shape[0], chunk_rows):
+        centered = data[start:start + chunk_rows] - means
+        cross += centered.T @ centered
+    return means, cross
+
+
+def _comoment_correlation(cross: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(cross))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cross / np.outer(std, std)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return corr
+
+
+def spearman_correlation_matrix(data: np.ndarray) -> np.ndarray:
+    """
+    Spearman rank correlation matrix of the columns of ``data`` (average ranks for ties)
+    """
+    from scipy.stats import rankdata
+
+    return correlation_matrix(rankdata(data, axis=0))
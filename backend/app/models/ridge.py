@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Sequence
+from app.services.data_processor import DataProcessor
+from app.services.metrics import timed
+
+
+class RidgeRegression:
+    """
+    Ridge regression along a full regularization path
+
+    The standardized design matrix is decomposed once; coefficients,
+    effective degrees of freedom and generalized cross-validation (GCV)
+    scores for every penalty are then closed-form functions of the singular
+    values, so the whole path costs about as much as a single fit.
+    """
+
+    def path(
+            self,
+            X: pd.DataFrame,
+            y: pd.Series,
+            alphas: Optional[Sequence[float]] = None,
+            n_alphas: int = 100,
+            alpha_min_ratio: float = 1e-4
+    ) -> Dict[str, Any]:
+        """
+        Compute the ridge regularization path
+
+        Parameters:
+        -----------
+        X : pd.DataFrame
+            Independent variables
+        y : pd.Series
+            Dependent variable
+        alphas : Sequence[float], optional
+            Penalties to evaluate. By default ``n_alphas`` values are spaced
+            logarithmically from ten times the largest squared singular value
+            of the standardized design down to ``alpha_min_ratio`` of it.
+        n_alphas : int
+            Number of default penalties
+        alpha_min_ratio : float
+            Smallest default penalty relative to the largest squared singular value
+
+        Returns:
+        --------
+        Dict[str, Any]
+            Penalties (in decreasing order), coefficients on the original and
+            standardized scale for each penalty, intercepts, effective degrees
+            of freedom, GCV scores and the penalty with the lowest GCV
+        """
+        feature_names = list(X.columns)
+        n = len(X)
+
+        # Standardize predictors and center the response; the intercept is not penalized
+        X_scaled = DataProcessor().normalize_data(X).to_numpy(dtype=np.float64)
+        means = X.mean(axis=0).to_numpy(dtype=np.float64)
+        scale = X.std(axis=0, ddof=0).to_numpy(dtype=np.float64)
+        scale[scale == 0] = 1.0
+        y_values = y.to_numpy(dtype=np.float64)
+        y_mean = y_values.mean()
+        y_centered = y_values - y_mean
+
+        with timed("ridge_decomposition"):
+            singular_values, Vt, Uty = self._decompose(X_scaled, y_centered)
+
+        if alphas is None:
+            top = singular_values[0] ** 2 if singular_values.size and singular_values[0] > 0 else 1.0
+            alphas = top * np.logspace(1, np.log10(alpha_min_ratio), n_alphas)
+        alphas = np.sort(np.asarray(alphas, dtype=np.float64))[::-1]
+        if np.any(alphas < 0):
+            raise ValueError("Penalties must be non-negative")
+
+        with timed("ridge_path"):
+            s2 = singular_values ** 2
+            denominator = s2[None, :] + alphas[:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # Shrinkage factors s^2 / (s^2 + alpha), 0 where both vanish
+                shrinkage = np.where(denominator > 0, s2[None, :] / denominator, 0.0)
+                # Coefficients of the standardized problem: V diag(s / (s^2 + alpha)) U'y
+                weights = np.where(denominator > 0, singular_values[None, :] / denominator, 0.0)
+            coef_scaled = (weights * Uty[None, :]) @ Vt
+
+            effective_df = shrinkage.sum(axis=1)
+            rss_outside = max(float(y_centered @ y_centered - Uty @ Uty), 0.0)
+            rss = rss_outside + (((1.0 - shrinkage) * Uty[None, :]) ** 2).sum(axis=1)
+            # The unpenalized intercept adds one degree of freedom
+            residual_df = n - effective_df - 1.0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                gcv = np.where(residual_df > 0, n * rss / residual_df ** 2, np.inf)
+
+            coef = coef_scaled / scale[None, :]
+            intercepts = y_mean - coef @ means
+
+        best = int(np.argmin(gcv))
+        return {
+            "alphas": alphas.tolist(),
+            "coefficients": {name: coef[:, j].tolist() for j, name in enumerate(feature_names)},
+            "standardized_coefficients": {name: coef_scaled[:, j].tolist() for j, name in enumerate(feature_names)},
+            "intercepts": intercepts.tolist(),
+            "effective_df": effective_df.tolist(),
+            "gcv": gcv.tolist(),
+            "best_alpha": float(alphas[best]),
+            "best_coefficients": {name: float(coef[best, j]) for j, name in enumerate(feature_names)},
+            "best_intercept": float(intercepts[best])
+        }
+
+    def _decompose(self, X: np.ndarray, y: np.ndarray):
+        """
+        Singular values, right singular vectors and U'y of the standardized design
+
+        For tall data the eigendecomposition of the p x p Gram matrix is used
+        (one pass over the rows). Forming X'X squares the condition number,
+        so when its eigenvalues span more than 1 / sqrt(eps) the small ones
+        have lost too many digits and a thin SVD of X is used instead, as for
+        wide data. Directions with singular values below the rank tolerance
+        are dropped.
+        """
+        n, p = X.shape
+        eps = np.finfo(np.float64).eps
+        if n >= p:
+            eigenvalues, V = np.linalg.eigh(X.T @ X)
+            order = np.argsort(eigenvalues)[::-1]
+            eigenvalues = eigenvalues[order]
+            if p and eigenvalues[-1] > np.sqrt(eps) * eigenvalues[0]:
+                singular_values = np.sqrt(eigenvalues)
+                Vt = V[:, order].T
+                # U'y = diag(1 / s) V' X'y
+                return singular_values, Vt, (Vt @ (X.T @ y)) / singular_values
+
+        U, singular_values, Vt = np.linalg.svd(X, full_matrices=False)
+        tolerance = singular_values[0] * max(n, p) * eps if singular_values.size else 0.0
+        kept = singular_values > tolerance
+        return np.where(kept, singular_values, 0.0), Vt, np.where(kept, U.T @ y, 0.0)
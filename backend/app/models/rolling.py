@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+MODES = ("rolling", "expanding")
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    """
+    Values as a list with NaN replaced by None, as JSON has no NaN
+    """
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+class RollingRegression:
+    """
+    Linear regressions over rolling or expanding windows of ordered rows
+
+    The cross-products of a window are those of the previous window plus
+    the rows that entered and minus the rows that left it, so every row is
+    added (and removed) once: all windows together cost O(N p^2) instead of
+    one refit per window. Only the p x p solves are done per window, as one
+    batch. Columns are shifted by their overall means before they are
+    accumulated, which keeps the running sums small; every window is then
+    centered on its own means.
+    """
+
+    def fit(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            feature_names: List[str],
+            window: int,
+            mode: str = "rolling",
+            step: Optional[int] = None,
+            max_windows: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Fit the regression on every window
+
+        Parameters:
+        -----------
+        X : np.ndarray
+            Design matrix whose first column is the intercept, rows in time order
+        y : np.ndarray
+            Dependent variable
+        feature_names : List[str]
+            Names of the remaining design columns
+        window : int
+            Rows per window (rolling) or rows of the first window (expanding)
+        mode : str
+            "rolling" (fixed-size windows) or "expanding" (windows starting at the first row)
+        step : int, optional
+            Rows between the ends of consecutive windows (default: 1, or
+            larger to stay within ``max_windows``). The last window always
+            ends at the last row.
+        max_windows : int, optional
+            Maximum number of windows
+
+        Returns:
+        --------
+        Dict[str, Any]
+            First and last row of every window and, per window, the
+            coefficients, their standard errors, the intercept, its standard
+            error and R^2 as series over the windows (None where undefined)
+        """
+        n, k = X.shape
+        if mode not in MODES:
+            raise ValueError(f"Unknown window mode: {mode}; use {' or '.join(MODES)}")
+        if not k < window <= n:
+            raise ValueError(
+                f"Window must be larger than the number of coefficients ({k}) and at most the number of rows ({n})"
+            )
+
+        count = n - window + 1
+        if step is None:
+            step = 1 if not max_windows else -(-count // max_windows)
+        windows = -(-count // step)
+        if max_windows and windows > max_windows:
+            raise ValueError(f"{windows} windows exceed the limit of {max_windows}; use a larger step")
+
+        # Exclusive ends, counted back from the last row
+        ends = n - step * np.arange(windows)[::-1]
+        starts = ends - window if mode == "rolling" else np.zeros(windows, dtype=ends.dtype)
+
+        # Cross-products of [const, x - shift, y - shift] of every window
+        shift = np.concatenate([[0.0], X[:, 1:].mean(axis=0), [y.mean()]])
+        grams = np.empty((windows, k + 1, k + 1))
+        gram = np.zeros((k + 1, k + 1))
+        added = removed = 0
+        for j, (start, end) in enumerate(zip(starts, ends)):
+            if start >= added:
+                # No overlap with the previous window
+                gram[:] = 0.0
+                added = removed = start
+            gram += self._cross_products(X, y, shift, added, end)
+            if start > removed:
+                gram -= self._cross_products(X, y, shift, removed, start)
+            added, removed = end, start
+            grams[j] = gram
+
+        # Centered cross-products of every window from its sums
+        sizes = grams[:, 0, 0]
+        means = grams[:, 0, 1:] / sizes[:, None]
+        comoment = grams[:, 1:, 1:] - sizes[:, None, None] * means[:, :, None] * means[:, None, :]
+        p = k - 1
+        Sxx = comoment[:, :p, :p]
+        Sxy = comoment[:, :p, p]
+        Syy = comoment[:, p, p]
+
+        # Batched centered normal equations; the pseudo-inverse handles collinear windows
+        Sxx_inv = np.linalg.pinv(Sxx, hermitian=True)
+        beta = np.einsum("wij,wj->wi", Sxx_inv, Sxy)
+        ssr = np.maximum(Syy - np.einsum("wi,wi->w", beta, Sxy), 0.0)
+        rank = (np.linalg.matrix_rank(Sxx, hermitian=True) if p else np.zeros(windows, dtype=int)) + 1
+        df_resid = sizes - rank
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma2 = np.where(df_resid > 0, ssr / df_resid, np.nan)
+            r_squared = np.where(Syy > 0, 1.0 - ssr / Syy, np.nan)
+        slope_se = np.sqrt(sigma2[:, None] * np.diagonal(Sxx_inv, axis1=1, axis2=2))
+
+        # Intercepts on the original scale
+        x_means = means[:, :p] + shift[1:k]
+        intercepts = means[:, p] + shift[k] - np.einsum("wi,wi->w", beta, x_means)
+        intercept_se = np.sqrt(sigma2 * (1.0 / sizes + np.einsum("wi,wij,wj->w", x_means, Sxx_inv, x_means)))
+
+        return {
+            "mode": mode,
+            "window": int(window),
+            "step": int(step),
+            "window_start": starts.tolist(),
+            "window_end": (ends - 1).tolist(),
+            "coefficients": {name: _optional(beta[:, j]) for j, name in enumerate(feature_names)},
+            "standard_errors": {name: _optional(slope_se[:, j]) for j, name in enumerate(feature_names)},
+            "intercepts": _optional(intercepts),
+            "intercept_standard_errors": _optional(intercept_se),
+            "r_squared": _optional(r_squared)
+        }
+
+    def _cross_products(self, X: np.ndarray, y: np.ndarray, shift: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """
+        Cross-products of the shifted ``[const, x, y]`` rows start..stop-1
+        """
+        rows = np.empty((stop - start, X.shape[1] + 1))
+        rows[:, :-1] = X[start:stop]
+        rows[:, -1] = y[start:stop]
+        rows -= shift
+        return rows.T @ rows
@@ -1,140 +1,917 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
+import numpy as np
 import pandas as pd
+import hashlib
 import os
-from app.schemas.models import RegressionInput, RegressionResult
-from app.services.data_processor import DataProcessor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, BinaryIO, List, Optional, Tuple
+from app import config
+from app.schemas.models import (
+    MultiRegressionInput, MultiRegressionResult, RegressionInput, RegressionResult, RidgePathInput, RidgePathResult
+)
+from app.services.data_processor import CategoricalDesign, DataProcessor, clear_imputation_cache, upload_format
+from app.services.statistics import SufficientStatistics
 from app.models.regression import LinearRegression
-from app.services.report import ReportGenerator
-import time
-import io
+from app.models.ridge import RidgeRegression
+from app.models.cross_validation import CrossValidator
+from app.models.bootstrap import Bootstrapper
+from app.models.diagnostics import RegressionDiagnostics
+from app.models.rolling import RollingRegression
+from app.services.admission import admission_controller, estimate_working_set, AdmissionRejected
+from app.services.metrics import timed, record_cache_lookup, TimedJSONResponse
+from app.services.session_store import session_store, SessionNotFoundError
+from app.services.thread_budget import thread_budget
 
 router = APIRouter(prefix="/api", tags=["regression"])
 
 
+def build_analysis_response(results: dict, include_predictions: bool = True) -> dict:
+    """
+    Convert fitted model results into the payload returned by /api/analyze
+    """
+    if not include_predictions or results["predicted_vs_actual"] is None:
+        predicted_vs_actual, residuals = [], []
+    else:
+        predicted_vs_actual = results["predicted_vs_actual"].to_dict(orient="records")
+        residuals = results["residuals"].to_dict(orient="records")
+
+    return {
+        "coefficients": results["coefficients"],
+        "intercept": results["intercept"],
+        "r_squared": results["r_squared"],
+        "mse": results["mse"],
+        "p_values": results["p_values"],
+        "predicted_vs_actual": predicted_vs_actual,
+        "residuals": residuals,
+        "correlation_matrix": results["correlation_matrix"].to_dict(),
+        "cross_validation": results.get("cross_validation"),
+        "bootstrap": results.get("bootstrap"),
+        "diagnostics": results.get("diagnostics"),
+        "rolling": results.get("rolling")
+    }
+
+
+def build_multi_response(results: dict, include_predictions: bool = True) -> dict:
+    """
+    Convert multi-output results into the payload returned by /api/analyze-multi
+    """
+    targets = {}
+    for name, target in results["targets"].items():
+        if include_predictions:
+            predicted_vs_actual = target["predicted_vs_actual"].to_dict(orient="records")
+            residuals = target["residuals"].to_dict(orient="records")
+        else:
+            predicted_vs_actual, residuals = [], []
+        targets[name] = {
+            "coefficients": target["coefficients"],
+            "intercept": target["intercept"],
+            "r_squared": target["r_squared"],
+            "mse": target["mse"],
+            "p_values": target["p_values"],
+            "predicted_vs_actual": predicted_vs_actual,
+            "residuals": residuals
+        }
+
+    return {
+        "dependent_variables": results["dependent_variables"],
+        "targets": targets,
+        "correlation_matrix": results["correlation_matrix"].to_dict()
+    }
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def _read_upload(file: UploadFile) -> Tuple[str, BinaryIO]:
+    """
+    Hash an uploaded file in chunks and rewind it for parsing
+
+    The upload is already spooled to a temporary file, so it is parsed from
+    there instead of being collected in memory.
+
+    Returns:
+    --------
+    Tuple[str, BinaryIO]
+        SHA-256 of the content (salted with the file kind) and the file positioned at its start
+    """
+    try:
+        file_format, compression = upload_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    file_kind = f"{file_format}.{compression}" if compression else file_format
+
+    with timed("read_body"):
+        digest = hashlib.sha256(file_kind.encode() + b"\0")
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+        await file.seek(0)
+        return digest.hexdigest(), file.file
+
+
+def _load_session_dataset(session_id: str) -> Tuple[str, pd.DataFrame]:
+    """
+    Load the dataset of a session, or fail with 400 if the session is unknown
+    """
+    try:
+        dataset_key = session_store.dataset_key(session_id)
+        with timed("load_session"):
+            return dataset_key, session_store.load_dataset(dataset_key)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=400, detail="Session expired or invalid")
+
+
+def _session_meta(session_id: str) -> dict:
+    """
+    Metadata of the dataset of a session, or fail with 400 if the session is unknown
+    """
+    try:
+        meta = session_store.get_dataset(session_store.dataset_key(session_id))
+    except SessionNotFoundError:
+        meta = None
+    if meta is None:
+        raise HTTPException(status_code=400, detail="Session expired or invalid")
+    return meta
+
+
+@asynccontextmanager
+async def _admitted(estimate: int) -> AsyncIterator[None]:
+    """
+    Hold a reservation of ``estimate`` bytes of the worker's memory budget
+
+    Waits while the budget is taken and fails with a retryable 503 when the
+    wait is too long or too many requests are waiting.
+    """
+    try:
+        with timed("admission"):
+            amount = await admission_controller.acquire(estimate)
+    except AdmissionRejected:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(config.ADMISSION_RETRY_AFTER)}
+        )
+    try:
+        yield
+    finally:
+        admission_controller.release(amount)
+
+
+def _needs_rows(regression_input: RegressionInput) -> bool:
+    """
+    Whether a requested stage works on the rows of the design matrix
+    """
+    return bool(
+        regression_input.cross_validation
+        or regression_input.bootstrap
+        or regression_input.diagnostics
+        or regression_input.rolling
+    )
+
+
+def _statistics_path(regression_input: RegressionInput) -> bool:
+    """
+    Whether an analysis can be answered from sufficient statistics
+
+    Without per-row output the cached sufficient statistics are enough,
+    unless a stage needs the rows themselves.
+    """
+    return not regression_input.include_predictions and not _needs_rows(regression_input)
+
+
+def _analysis_working_set(regression_input: RegressionInput, meta: dict, report: bool = False) -> int:
+    """
+    Estimated memory of an analysis or report request on a dataset
+    """
+    rows = meta["rows"]
+    if not report and _statistics_path(regression_input) and meta.get("statistics") is not None:
+        # Served from the cached statistics without loading the rows
+        columns = regression_input.independent_variables + [regression_input.dependent_variable]
+        if SufficientStatistics.from_dict(meta["statistics"]).covers(columns):
+            rows = 0
+
+    return _design_working_set(
+        meta,
+        regression_input.independent_variables,
+        rows,
+        materialized=_needs_rows(regression_input),
+        from_codes=True,
+        predictions=regression_input.include_predictions and not report,
+        cross_validation=regression_input.cross_validation,
+        diagnostics=regression_input.diagnostics,
+        bootstrap_resamples=regression_input.bootstrap_resamples if regression_input.bootstrap else 0,
+        rolling=bool(regression_input.rolling),
+        report=report
+    )
+
+
+def _categorical_levels(meta: dict, independent_variables: List[str]) -> List[int]:
+    """
+    Levels (a missing-value level included) of the categorical predictors, from the cached column profile
+    """
+    profile = {column["name"]: column for column in meta.get("profile") or []}
+    levels = []
+    for name in independent_variables:
+        column = profile.get(name)
+        if column is not None and "levels" in column:
+            levels.append(column["levels"] + (1 if column["nulls"] else 0))
+    return levels
+
+
+def _design_working_set(
+        meta: dict,
+        independent_variables: List[str],
+        rows: int,
+        materialized: bool,
+        from_codes: bool,
+        **stages: Any
+) -> int:
+    """
+    Estimated memory of a fit on a dataset, with categorical predictors expanded to their indicator columns
+
+    Parameters:
+    -----------
+    materialized : bool
+        Whether the indicator columns are built as arrays (stages that work on the rows, several targets)
+    from_codes : bool
+        Whether the regression is fitted from the integer codes, which solves
+        the levels of all but the largest categorical predictor as a dense system
+    stages
+        Stage arguments of estimate_working_set
+    """
+    levels = sorted(_categorical_levels(meta, independent_variables))
+    predictors = len(independent_variables)
+    if levels and materialized:
+        # Each categorical predictor takes one column per level but its reference;
+        # designs over the limit are refused before they are built
+        expanded = predictors + sum(level - 2 for level in levels)
+        if meta["rows"] * (expanded + 2) <= config.CATEGORICAL_DENSE_MAX_CELLS:
+            predictors = expanded
+    dense_levels = sum(level - 1 for level in levels[:-1]) if from_codes else 0
+    return estimate_working_set(rows, len(meta["columns"]), predictors, dense_levels=dense_levels, **stages)
+
+
+def _session_design(session_id: str, dependent_variable: str, independent_variables: List[str]) -> np.ndarray:
+    """
+    Load a session and build its [const, X, y] design matrix
+    """
+    dataset_key, df = _load_session_dataset(session_id)
+
+    # Process data
+    data_processor = DataProcessor()
+    with timed("prepare_data"):
+        return data_processor.build_design_matrix(
+            df,
+            dependent_variable,
+            independent_variables,
+            dtype=config.DESIGN_MATRIX_DTYPE,
+            cache_key=dataset_key
+        )
+
+
+def _is_numeric_dtype_name(dtype: str) -> bool:
+    """
+    Whether a dtype recorded in dataset metadata is numeric
+    """
+    return pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))
+
+
+def _session_statistics(dataset_key: str) -> Optional[SufficientStatistics]:
+    """
+    Sufficient statistics of a dataset, computed and cached in its metadata on first use
+    """
+    meta = session_store.get_dataset(dataset_key)
+    if meta is None:
+        raise HTTPException(status_code=400, detail="Session expired or invalid")
+    record_cache_lookup("statistics", "statistics" in meta)
+    if "statistics" in meta:
+        # None records a dataset with too many numeric columns for statistics
+        statistics = meta["statistics"]
+        return None if statistics is None else SufficientStatistics.from_dict(statistics)
+
+    if "dtypes" in meta:
+        numeric_columns = [col for col, dtype in meta["dtypes"].items() if _is_numeric_dtype_name(dtype)]
+        df = None
+    else:
+        with timed("load_session"):
+            df = session_store.load_dataset(dataset_key)
+        numeric_columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+    if len(numeric_columns) > config.STATISTICS_MAX_COLUMNS:
+        session_store.update_dataset(dataset_key, statistics=None)
+        return None
+
+    if df is None:
+        with timed("load_session"):
+            df = session_store.load_dataset(dataset_key)
+    with timed("statistics"):
+        statistics = SufficientStatistics.from_frame(df)
+    session_store.update_dataset(dataset_key, statistics=statistics.to_dict())
+    return statistics
+
+
+def _fit_statistics(regression_input: RegressionInput) -> Optional[dict]:
+    """
+    Fit from the cached sufficient statistics of the session's dataset
+
+    Returns None when they cannot be used (missing values in the selected
+    columns, non-numeric or unknown columns), in which case the caller fits
+    on the data itself.
+    """
+    try:
+        dataset_key = session_store.dataset_key(regression_input.session_id)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=400, detail="Session expired or invalid")
+
+    statistics = _session_statistics(dataset_key)
+    columns = regression_input.independent_variables + [regression_input.dependent_variable]
+    if statistics is None or not statistics.covers(columns):
+        return None
+
+    count, means, comoment = statistics.select(columns)
+    return LinearRegression().fit_statistics(
+        count,
+        means,
+        comoment,
+        regression_input.independent_variables,
+        regression_input.dependent_variable
+    )
+
+
+def _fit_categorical(
+        regression_input: RegressionInput,
+        dataset_key: str,
+        df: pd.DataFrame
+) -> Tuple[dict, Optional[np.ndarray], List[str]]:
+    """
+    Fit a regression with categorical predictors from their integer codes
+
+    Returns the results, the dense design matrix (only if a stage needs the
+    indicator columns as arrays, else None) and the design column names.
+    """
+    data_processor = DataProcessor()
+    try:
+        with timed("prepare_data"):
+            categorical = data_processor.build_categorical_design(
+                df,
+                regression_input.dependent_variable,
+                regression_input.independent_variables,
+                reference_levels=regression_input.reference_levels,
+                dtype=config.DESIGN_MATRIX_DTYPE,
+                cache_key=dataset_key
+            )
+        results = LinearRegression().fit_categorical(categorical, max_dense_levels=config.CATEGORICAL_MAX_DENSE_LEVELS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    feature_names = categorical.feature_names
+    if not _needs_rows(regression_input):
+        return results, None, feature_names
+
+    with timed("prepare_data"):
+        design = _dense_design(
+            categorical, "Cross-validation, diagnostics, bootstrap and rolling windows with categorical predictors"
+        )
+    return results, design, feature_names
+
+
+def _dense_design(categorical: CategoricalDesign, purpose: str) -> np.ndarray:
+    """
+    Materialize the indicator columns of a categorical design, or fail with 400 if it would be too large
+    """
+    columns = categorical.block.shape[1] + len(categorical.feature_names) - len(categorical.numeric_names)
+    if categorical.rows * columns > config.CATEGORICAL_DENSE_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"{purpose} need the full design matrix ({categorical.rows} x {columns}), "
+                f"which exceeds the limit of {config.CATEGORICAL_DENSE_MAX_CELLS} values"
+            )
+        )
+    return categorical.dense()
+
+
+def _fit_session(regression_input: RegressionInput) -> dict:
+    """
+    Load a session, build its design matrix and fit the regression model
+    """
+    dataset_key, df = _load_session_dataset(regression_input.session_id)
+
+    data_processor = DataProcessor()
+    if data_processor.categorical_columns(df, regression_input.independent_variables):
+        results, design, feature_names = _fit_categorical(regression_input, dataset_key, df)
+    else:
+        try:
+            with timed("prepare_data"):
+                design = data_processor.build_design_matrix(
+                    df,
+                    regression_input.dependent_variable,
+                    regression_input.independent_variables,
+                    dtype=config.DESIGN_MATRIX_DTYPE,
+                    cache_key=dataset_key
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        feature_names = regression_input.independent_variables
+
+        # Create and fit regression model
+        model = LinearRegression()
+        results = model.fit_design(
+            design,
+            feature_names,
+            regression_input.dependent_variable
+        )
+
+    # Out-of-sample error from the same design matrix, without refitting
+    if regression_input.cross_validation:
+        try:
+            with timed("cross_validation"):
+                results["cross_validation"] = CrossValidator().evaluate(
+                    design[:, :-1],
+                    design[:, -1],
+                    k=regression_input.cv_folds,
+                    seed=regression_input.cv_seed
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Multicollinearity and influence diagnostics
+    if regression_input.diagnostics:
+        with timed("diagnostics"):
+            results["diagnostics"] = RegressionDiagnostics().compute(
+                design[:, :-1],
+                design[:, -1],
+                feature_names
+            )
+
+    # Bootstrap intervals do not rely on normal-theory assumptions
+    if regression_input.bootstrap:
+        try:
+            bootstrapper = Bootstrapper(
+                method=regression_input.bootstrap,
+                n_resamples=regression_input.bootstrap_resamples,
+                ci_method=regression_input.bootstrap_ci,
+                seed=regression_input.bootstrap_seed
+            )
+            with timed("bootstrap"):
+                results["bootstrap"] = bootstrapper.confidence_intervals(
+                    design[:, :-1],
+                    design[:, -1],
+                    feature_names
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Coefficient stability over the row order, from running cross-products
+    if regression_input.rolling:
+        try:
+            with timed("rolling"):
+                results["rolling"] = RollingRegression().fit(
+                    design[:, :-1],
+                    design[:, -1],
+                    feature_names,
+                    window=regression_input.rolling_window,
+                    mode=regression_input.rolling,
+                    step=regression_input.rolling_step,
+                    max_windows=config.ROLLING_MAX_WINDOWS
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return results
+
+
+def _fit_multi_session(multi_input: MultiRegressionInput) -> dict:
+    """
+    Load a session, build one design matrix holding every dependent variable and fit them all
+    """
+    dependent_variables = multi_input.dependent_variables
+    independent_variables = multi_input.independent_variables
+    overlap = set(dependent_variables) & set(independent_variables)
+    if len(set(dependent_variables)) != len(dependent_variables) or overlap:
+        raise HTTPException(
+            status_code=400,
+            detail="Dependent variables must be distinct and not among the independent variables"
+        )
+
+    dataset_key, df = _load_session_dataset(multi_input.session_id)
+
+    data_processor = DataProcessor()
+    try:
+        with timed("prepare_data"):
+            if data_processor.categorical_columns(df, independent_variables):
+                categorical = data_processor.build_categorical_design(
+                    df,
+                    dependent_variables,
+                    independent_variables,
+                    reference_levels=multi_input.reference_levels,
+                    dtype=config.DESIGN_MATRIX_DTYPE,
+                    cache_key=dataset_key
+                )
+                design = _dense_design(categorical, "Several dependent variables with categorical predictors")
+                feature_names = categorical.feature_names
+            else:
+                design = data_processor.build_design_matrix(
+                    df,
+                    dependent_variables,
+                    independent_variables,
+                    dtype=config.DESIGN_MATRIX_DTYPE,
+                    cache_key=dataset_key
+                )
+                feature_names = independent_variables
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return LinearRegression().fit_multi(design, feature_names, dependent_variables)
+
+
+def _multi_working_set(multi_input: MultiRegressionInput, meta: dict, report: bool = False) -> int:
+    """
+    Estimated memory of a multi-output analysis or report request on a dataset
+    """
+    return _design_working_set(
+        meta,
+        multi_input.independent_variables,
+        meta["rows"],
+        materialized=True,
+        from_codes=False,
+        predictions=multi_input.include_predictions and not report,
+        report=report,
+        targets=len(multi_input.dependent_variables)
+    )
+
+
 @router.post("/upload-csv", response_model=dict)
 async def upload_csv_file(file: UploadFile = File(...)):
     """
-    Upload a CSV file with data for regression analysis
+    Upload a data file for regression analysis
+
+    CSV (plain or gzip, bz2 or zstd compressed), Excel, Parquet and Arrow
+    files are accepted.
+
+    Uploads are identified by the SHA-256 of their content: a file that was
+    already ingested is not parsed or stored again, the new session simply
+    references the existing dataset.
     """
-    if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="File must be CSV or Excel")
+    dataset_key, source = await _read_upload(file)
 
-    # Save the uploaded file to a temporary location
-    content = await file.read()
     try:
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        else:  # Excel file
-            df = pd.read_excel(io.BytesIO(content))
-
-        # Get column names for frontend display
-        columns = df.columns.tolist()
+        dataset = session_store.get_dataset(dataset_key)
+        record_cache_lookup("dataset", dataset is not None)
+        deduplicated = dataset is not None
 
-        # Create a unique ID for this session
-        session_id = f"session_{int(time.time())}"
+        if dataset is None:
+            data_processor = DataProcessor()
+            with timed("parse"):
+                df = data_processor.encode_categoricals(data_processor.read_file(file.filename, source))
 
-        upload_dir = r'\tmp'
+            # Describe the columns while the data is in memory anyway
+            with timed("profile"):
+                profile = data_processor.profile_columns(df)
 
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
+            # Save the dataframe to the session store
+            with timed("store"):
+                dataset = session_store.put_dataset(dataset_key, df, profile=profile)
 
-        # Save the dataframe to a temp file
-        temp_file = f"/tmp/{session_id}.pkl"
-        df.to_pickle(temp_file)
+        # Create a unique ID for this session
+        session_id = session_store.create_session(dataset_key)
 
         return {
             "status": "success",
             "message": "File uploaded successfully",
             "session_id": session_id,
-            "columns": columns,
-            "rows": len(df)
+            "columns": dataset["columns"],
+            "rows": dataset["rows"],
+            "profile": dataset.get("profile"),
+            "deduplicated": deduplicated
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 
-@router.post("/analyze", response_model=RegressionResult)
-async def analyze_data(regression_input: RegressionInput):
+@router.delete("/session/{session_id}", response_model=dict)
+async def delete_session(session_id: str):
     """
-    Perform regression analysis based on the provided parameters
+    Close a session; its dataset is deleted once no other session uses it
     """
     try:
-        # Retrieve the data from the temp file
-        temp_file = f"/tmp/{regression_input.session_id}.pkl"
-        if not os.path.exists(temp_file):
-            raise HTTPException(status_code=400, detail="Session expired or invalid")
+        dataset_key = session_store.dataset_key(session_id)
+        deleted = session_store.delete_session(session_id)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-        df = pd.read_pickle(temp_file)
+    for key in deleted:
+        clear_imputation_cache(key)
 
-        # Process data
-        data_processor = DataProcessor()
-        X, y = data_processor.prepare_data(
-            df,
+    return {
+        "status": "success",
+        "session_id": session_id,
+        "dataset_deleted": dataset_key in deleted
+    }
+
+
+@router.get("/session/{session_id}/profile", response_model=dict)
+async def get_profile(session_id: str):
+    """
+    Column profile of a session's dataset (dtype, missing values and
+    distribution of every column), served from the metadata cached at upload
+    """
+    try:
+        dataset_key = session_store.dataset_key(session_id)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    dataset = session_store.get_dataset(dataset_key)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    profile = dataset.get("profile")
+    if profile is None:
+        # Datasets stored before profiling existed are profiled once and cached
+        with timed("load_session"):
+            df = session_store.load_dataset(dataset_key)
+        with timed("profile"):
+            profile = DataProcessor().profile_columns(df)
+        session_store.update_dataset(dataset_key, profile=profile)
+
+    return {
+        "session_id": session_id,
+        "rows": dataset["rows"],
+        "columns": dataset["columns"],
+        "profile": profile
+    }
+
+
+@router.post("/session/{session_id}/append", response_model=dict)
+async def append_rows(session_id: str, file: UploadFile = File(...)):
+    """
+    Append the rows of an uploaded file (any upload format) to a session's dataset
+
+    The stored data is not rewritten: the new rows are stored as a separate
+    part of a new dataset that builds on the current one, which other
+    sessions may keep using. Cached sufficient statistics are updated from
+    the new rows only, so analyses without per-row output stay as cheap as
+    before the append.
+    """
+    try:
+        parent_key = session_store.dataset_key(session_id)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    parent = session_store.get_dataset(parent_key)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    part_key, source = await _read_upload(file)
+    # The appended dataset is identified by what it extends and the new content
+    dataset_key = hashlib.sha256(f"append\0{parent_key}\0{part_key}".encode()).hexdigest()
+
+    try:
+        dataset = session_store.get_dataset(dataset_key)
+        record_cache_lookup("dataset", dataset is not None)
+        deduplicated = dataset is not None
+
+        if dataset is None:
+            data_processor = DataProcessor()
+            with timed("parse"):
+                df = data_processor.read_file(file.filename, source)
+
+            columns = parent["columns"]
+            if sorted(str(col) for col in df.columns) != sorted(columns):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Appended file must have the columns of the session: {', '.join(columns)}"
+                )
+            df.columns = [str(col) for col in df.columns]
+
+            dtypes = parent.get("dtypes")
+            if dtypes is None:
+                # Datasets stored before their column types were recorded
+                with timed("load_session"):
+                    parent_df = session_store.load_dataset(parent_key)
+                dtypes = {str(col): str(dtype) for col, dtype in parent_df.dtypes.items()}
+            try:
+                data_processor.conform_dtypes(df, dtypes)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            df = data_processor.encode_categoricals(df)[columns]
+
+            # Merge the profile and statistics of the new rows into the cached ones
+            fields = {}
+            if "profile" in parent:
+                with timed("profile"):
+                    fields["profile"] = data_processor.merge_profiles(
+                        parent["profile"], data_processor.profile_columns(df)
+                    )
+            if "statistics" in parent and parent["statistics"] is None:
+                # The columns stay the same, so the dataset stays too wide for statistics
+                fields["statistics"] = None
+            elif "statistics" in parent:
+                with timed("statistics"):
+                    statistics = SufficientStatistics.from_dict(parent["statistics"])
+                    try:
+                        statistics = statistics.merge(SufficientStatistics.from_frame(df, statistics.columns))
+                        fields["statistics"] = statistics.to_dict()
+                    except ValueError:
+                        # A column changed type; statistics are recomputed on the next analysis
+                        pass
+
+            with timed("store"):
+                dataset = session_store.put_dataset(dataset_key, df, parent=parent, **fields)
+
+        deleted = session_store.move_session(session_id, dataset_key)
+        for key in deleted:
+            clear_imputation_cache(key)
+
+        return {
+            "status": "success",
+            "message": "Rows appended successfully",
+            "session_id": session_id,
+            "columns": dataset["columns"],
+            "rows": dataset["rows"],
+            "appended_rows": dataset["part_rows"],
+            "deduplicated": deduplicated
+        }
+    except HTTPException:
+        raise
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error appending rows: {str(e)}")
+
+
+def _analyze(regression_input: RegressionInput) -> dict:
+    results = None
+    if _statistics_path(regression_input):
+        results = _fit_statistics(regression_input)
+    if results is None:
+        results = _fit_session(regression_input)
+
+    # Validated here so that serialization shows up as its own stage
+    with timed("serialize"):
+        return RegressionResult(
+            **build_analysis_response(results, regression_input.include_predictions)
+        ).model_dump()
+
+
+def _ridge_path(ridge_input: RidgePathInput) -> dict:
+    try:
+        design = _session_design(
+            ridge_input.session_id,
+            ridge_input.dependent_variable,
+            ridge_input.independent_variables
+        )
+        X = pd.DataFrame(design[:, 1:-1], columns=ridge_input.independent_variables, copy=False)
+        y = pd.Series(design[:, -1], name=ridge_input.dependent_variable, copy=False)
+
+        return RidgeRegression().path(
+            X,
+            y,
+            alphas=ridge_input.alphas,
+            n_alphas=ridge_input.n_alphas,
+            alpha_min_ratio=ridge_input.alpha_min_ratio
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _render_report(regression_input: RegressionInput) -> str:
+    results = _fit_session(regression_input)
+
+    # Generate report (the plotting stack is imported on first use)
+    from app.services.report import ReportGenerator
+
+    report_generator = ReportGenerator()
+    with timed("report"):
+        return report_generator.generate_report(
+            results,
+            regression_input.report_format,
             regression_input.dependent_variable,
             regression_input.independent_variables
         )
 
-        # Create and fit regression model
-        model = LinearRegression()
-        results = model.fit(X, y)
 
-        # Return the results
-        return {
-            "coefficients": results["coefficients"],
-            "intercept": results["intercept"],
-            "r_squared": results["r_squared"],
-            "mse": results["mse"],
-            "p_values": results["p_values"],
-            "predicted_vs_actual": results["predicted_vs_actual"].to_dict(orient="records"),
-            "residuals": results["residuals"].to_dict(orient="records"),
-            "correlation_matrix": results["correlation_matrix"].to_dict()
-        }
+def _analyze_multi(multi_input: MultiRegressionInput) -> dict:
+    results = _fit_multi_session(multi_input)
+
+    with timed("serialize"):
+        return MultiRegressionResult(
+            **build_multi_response(results, multi_input.include_predictions)
+        ).model_dump()
+
+
+def _render_multi_report(multi_input: MultiRegressionInput) -> str:
+    results = _fit_multi_session(multi_input)
+
+    from app.services.report import ReportGenerator
+
+    report_generator = ReportGenerator()
+    with timed("report"):
+        return report_generator.generate_multi_report(
+            results,
+            multi_input.report_format,
+            multi_input.independent_variables
+        )
+
+
+@router.post("/analyze", response_model=RegressionResult, response_class=TimedJSONResponse)
+async def analyze_data(regression_input: RegressionInput):
+    """
+    Perform regression analysis based on the provided parameters
+    """
+    try:
+        meta = _session_meta(regression_input.session_id)
+        async with _admitted(_analysis_working_set(regression_input, meta)):
+            # Fitting runs on the analysis pool, within the native thread budget
+            payload = await thread_budget.run(_analyze, regression_input)
+            return TimedJSONResponse(payload)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during analysis: {str(e)}")
 
 
+@router.post("/ridge-path", response_model=RidgePathResult, response_class=TimedJSONResponse)
+async def ridge_path(ridge_input: RidgePathInput):
+    """
+    Compute ridge regression coefficients, effective degrees of freedom and
+    GCV scores over a grid of penalties from a single decomposition
+    """
+    try:
+        meta = _session_meta(ridge_input.session_id)
+        estimate = estimate_working_set(
+            meta["rows"],
+            len(meta["columns"]),
+            len(ridge_input.independent_variables),
+            ridge_path=True
+        )
+        async with _admitted(estimate):
+            results = await thread_budget.run(_ridge_path, ridge_input)
+            return TimedJSONResponse(results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing ridge path: {str(e)}")
+
+
 @router.post("/generate-report")
 async def generate_report(background_tasks: BackgroundTasks, regression_input: RegressionInput):
     """
     Generate a PDF or Excel report with the regression results
     """
     try:
-        # Retrieve the data
-        temp_file = f"/tmp/{regression_input.session_id}.pkl"
-        if not os.path.exists(temp_file):
-            raise HTTPException(status_code=400, detail="Session expired or invalid")
+        meta = _session_meta(regression_input.session_id)
+        async with _admitted(_analysis_working_set(regression_input, meta, report=True)):
+            report_file = await thread_budget.run(_render_report, regression_input)
 
-        df = pd.read_pickle(temp_file)
+        # Background task to clean up the file after some time
+        background_tasks.add_task(lambda x: os.remove(report_file) if os.path.exists(report_file) else None, 300)
 
-        # Process data
-        data_processor = DataProcessor()
-        X, y = data_processor.prepare_data(
-            df,
-            regression_input.dependent_variable,
-            regression_input.independent_variables
+        return FileResponse(
+            path=report_file,
+            filename=f"regression_report.{regression_input.report_format}",
+            media_type="application/octet-stream"
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
 
-        # Create and fit regression model
-        model = LinearRegression()
-        results = model.fit(X, y)
 
-        # Generate report
-        report_generator = ReportGenerator()
-        report_file = report_generator.generate_report(
-            results,
-            regression_input.report_format,
-            regression_input.dependent_variable,
-            regression_input.independent_variables
-        )
+@router.post("/analyze-multi", response_model=MultiRegressionResult, response_class=TimedJSONResponse)
+async def analyze_multi(multi_input: MultiRegressionInput):
+    """
+    Regress several dependent variables on the same independent variables
+
+    The design matrix is built and factorized once for all of them.
+    """
+    try:
+        meta = _session_meta(multi_input.session_id)
+        async with _admitted(_multi_working_set(multi_input, meta)):
+            payload = await thread_budget.run(_analyze_multi, multi_input)
+            return TimedJSONResponse(payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error during analysis: {str(e)}")
+
+
+@router.post("/generate-multi-report")
+async def generate_multi_report(background_tasks: BackgroundTasks, multi_input: MultiRegressionInput):
+    """
+    Generate a PDF or Excel report with one section per dependent variable
+    """
+    try:
+        meta = _session_meta(multi_input.session_id)
+        async with _admitted(_multi_working_set(multi_input, meta, report=True)):
+            report_file = await thread_budget.run(_render_multi_report, multi_input)
 
         # Background task to clean up the file after some time
         background_tasks.add_task(lambda x: os.remove(report_file) if os.path.exists(report_file) else None, 300)
 
         return FileResponse(
             path=report_file,
-            filename=f"regression_report.{regression_input.report_format}",
+            filename=f"regression_report.{multi_input.report_format}",
             media_type="application/octet-stream"
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
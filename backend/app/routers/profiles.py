@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+import os
+from typing import Literal
+from app.services.profiling import profile_store
+
+router = APIRouter(prefix="/api/profiles", tags=["profiling"])
+
+# Sort keys accepted by pstats.Stats.sort_stats
+SortKey = Literal[
+    "calls", "ncalls", "cumulative", "cumtime", "file", "filename", "module", "line",
+    "name", "nfl", "pcalls", "stdname", "time", "tottime"
+]
+
+
+@router.get("", response_model=list)
+async def list_profiles():
+    """
+    List stored request profiles, newest first
+    """
+    return profile_store.list()
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: str = "pstats", sort: SortKey = "cumulative", limit: int = 50):
+    """
+    Download a stored profile as a pstats dump, or as a text summary with format=text
+    """
+    try:
+        path = profile_store.path(profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "text":
+        return PlainTextResponse(profile_store.summary(profile_id, sort, limit))
+    if format != "pstats":
+        raise HTTPException(status_code=400, detail="Format must be pstats or text")
+
+    return FileResponse(
+        path=path,
+        filename=f"{profile_id}.prof",
+        media_type="application/octet-stream"
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, confloat
 from typing import List, Dict, Any, Optional, Union
 
 class RegressionInput(BaseModel):
@@ -6,6 +6,27 @@ class RegressionInput(BaseModel):
     dependent_variable: str
     independent_variables: List[str]
     report_format: Optional[str] = "pdf"  # pdf or xlsx
+    cross_validation: bool = False  # add leave-one-out and k-fold errors
+    cv_folds: int = Field(5, ge=2)
+    cv_seed: int = 0
+    bootstrap: Optional[str] = None  # pairs or residual
+    bootstrap_resamples: int = Field(1000, ge=10, le=100000)
+    bootstrap_ci: str = "bca"  # bca or percentile
+    bootstrap_seed: int = 0
+    diagnostics: bool = False  # add VIF and influence diagnostics
+    include_predictions: bool = True  # per-row predictions and residuals in the response
+    reference_levels: Optional[Dict[str, str]] = None  # categorical predictor -> level absorbed by the intercept
+    rolling: Optional[str] = None  # rolling or expanding window regression over the row order
+    rolling_window: int = Field(50, ge=2)  # rows per window (first window when expanding)
+    rolling_step: Optional[int] = Field(None, ge=1)  # rows between window ends, default spreads ROLLING_MAX_WINDOWS
+
+class MultiRegressionInput(BaseModel):
+    session_id: str
+    dependent_variables: List[str] = Field(..., min_length=1)  # each regressed on the same predictors
+    independent_variables: List[str]
+    report_format: Optional[str] = "pdf"  # pdf or xlsx
+    include_predictions: bool = True  # per-row predictions and residuals of every target
+    reference_levels: Optional[Dict[str, str]] = None  # categorical predictor -> level absorbed by the intercept
 
 class CoefficientInfo(BaseModel):
     variable: str
@@ -13,6 +34,46 @@ class CoefficientInfo(BaseModel):
     p_value: float
     significance: bool
 
+class CrossValidationResult(BaseModel):
+    press: float
+    loo_mse: float
+    folds: int
+    seed: int
+    kfold_mse: float
+    fold_mse: List[float]
+    fold_sizes: List[int]
+
+class BootstrapResult(BaseModel):
+    method: str
+    ci_method: str
+    resamples: int
+    seed: int
+    confidence_level: float
+    confidence_intervals: Dict[str, List[float]]
+    intercept_confidence_interval: List[float]
+    standard_errors: Dict[str, float]
+    intercept_standard_error: float
+
+class DiagnosticsResult(BaseModel):
+    vif: Dict[str, Optional[float]]
+    leverage: List[float]
+    cooks_distance: List[Optional[float]]
+    studentized_residuals: List[Optional[float]]
+    thresholds: Dict[str, float]
+    influential_observations: List[int]
+
+class RollingResult(BaseModel):
+    mode: str
+    window: int
+    step: int
+    window_start: List[int]
+    window_end: List[int]
+    coefficients: Dict[str, List[Optional[float]]]
+    standard_errors: Dict[str, List[Optional[float]]]
+    intercepts: List[Optional[float]]
+    intercept_standard_errors: List[Optional[float]]
+    r_squared: List[Optional[float]]
+
 class RegressionResult(BaseModel):
     coefficients: Dict[str, float]
     intercept: float
@@ -21,4 +82,41 @@ class RegressionResult(BaseModel):
     p_values: Dict[str, float]
     predicted_vs_actual: List[Dict[str, float]]
     residuals: List[Dict[str, float]]
-    correlation_matrix: Dict[str, Dict[str, float]]
\ No newline at end of file
+    correlation_matrix: Dict[str, Dict[str, float]]
+    cross_validation: Optional[CrossValidationResult] = None
+    bootstrap: Optional[BootstrapResult] = None
+    diagnostics: Optional[DiagnosticsResult] = None
+    rolling: Optional[RollingResult] = None
+
+class TargetResult(BaseModel):
+    coefficients: Dict[str, float]
+    intercept: float
+    r_squared: float
+    mse: float
+    p_values: Dict[str, float]
+    predicted_vs_actual: List[Dict[str, float]]
+    residuals: List[Dict[str, float]]
+
+class MultiRegressionResult(BaseModel):
+    dependent_variables: List[str]
+    targets: Dict[str, TargetResult]
+    correlation_matrix: Dict[str, Dict[str, float]]
+
+class RidgePathInput(BaseModel):
+    session_id: str
+    dependent_variable: str
+    independent_variables: List[str] = Field(..., min_length=1)
+    alphas: Optional[List[confloat(ge=0)]] = None  # explicit penalties, default is a log-spaced grid
+    n_alphas: int = Field(100, ge=1, le=10000)
+    alpha_min_ratio: float = Field(1e-4, gt=0, lt=1)
+
+class RidgePathResult(BaseModel):
+    alphas: List[float]
+    coefficients: Dict[str, List[float]]
+    standardized_coefficients: Dict[str, List[float]]
+    intercepts: List[float]
+    effective_df: List[float]
+    gcv: List[float]
+    best_alpha: float
+    best_coefficients: Dict[str, float]
+    best_intercept: float
@@ -0,0 +1,268 @@
+import asyncio
+import collections
+import os
+from typing import Deque, Tuple
+
+from app import config
+from app.services.metrics import registry
+
+# Bytes of one float64 value in an array
+FLOAT_BYTES = 8
+# Bytes of one value once it is a Python float in a per-row record and JSON text
+SERIALIZED_VALUE_BYTES = 64
+# Matplotlib artists and rendered output per row and chart of a report
+REPORT_ROW_BYTES = 1024
+# Interpreter, libraries and small per-request objects
+BASE_BYTES = 16 * 1024 * 1024
+
+RESERVED_BYTES = registry.gauge("admission_reserved_bytes", "Estimated memory of the requests being processed")
+QUEUED_BYTES = registry.gauge("admission_queued_bytes", "Estimated memory of the requests waiting for admission")
+QUEUED_REQUESTS = registry.gauge("admission_queued_requests", "Requests waiting for admission")
+BUDGET_BYTES = registry.gauge("admission_budget_bytes", "Memory the admitted requests may reserve together")
+REJECTIONS = registry.counter("admission_rejections_total", "Requests rejected with 503, by reason")
+WAIT_DURATION = registry.histogram("admission_wait_seconds", "Time requests waited for admission")
+
+
+class AdmissionRejected(Exception):
+    """
+    The request cannot be admitted now; it may be retried later
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def estimate_working_set(
+        rows: int,
+        columns: int,
+        predictors: int,
+        predictions: bool = False,
+        cross_validation: bool = False,
+        diagnostics: bool = False,
+        bootstrap_resamples: int = 0,
+        ridge_path: bool = False,
+        rolling: bool = False,
+        report: bool = False,
+        targets: int = 1,
+        dense_levels: int = 0
+) -> int:
+    """
+    Estimate the peak memory of an analysis of a session's dataset
+
+    The estimate follows the copies the pipeline makes: the loaded session,
+    the design matrix, the factorizations of the fit and of the requested
+    stages, and the per-row outputs. It is meant for admission decisions,
+    not as an exact figure.
+
+    Parameters:
+    -----------
+    rows : int
+        Rows of the session's dataset (0 if the rows are not needed)
+    columns : int
+        Columns of the session's dataset
+    predictors : int
+        Number of design columns besides the intercept (indicator columns of
+        categorical predictors included when they are materialized)
+    predictions : bool
+        Whether per-row predictions and residuals are returned
+    cross_validation, diagnostics, ridge_path, rolling, report : bool
+        Stages that are requested
+    bootstrap_resamples : int
+        Number of bootstrap resamples (0 if no bootstrap)
+    targets : int
+        Number of dependent variables fitted together
+    dense_levels : int
+        Levels of the categorical predictors that are solved as one dense
+        system (all but the predictor with the most levels)
+
+    Returns:
+    --------
+    int
+        Estimated bytes
+    """
+    k = predictors + 1  # Design columns including the intercept
+    total = BASE_BYTES + FLOAT_BYTES * k * k * 8
+    if dense_levels:
+        # Normal matrix, Schur complement, its eigenvectors and pseudo-inverse
+        total += FLOAT_BYTES * 4 * (k + dense_levels) ** 2
+    if rows == 0:
+        return total
+
+    # Loaded session and the [const, X, y] design matrix
+    total += FLOAT_BYTES * rows * (columns + k + 1)
+    # statsmodels keeps the design, its pseudo-inverse and the fitted values
+    total += FLOAT_BYTES * rows * (2 * k + 2)
+
+    if predictions or report:
+        # pred_vs_actual frame: actual, predicted, residual and the predictors
+        total += FLOAT_BYTES * rows * (predictors + 3)
+    if predictions:
+        total += SERIALIZED_VALUE_BYTES * rows * (predictors + 4)
+    if targets > 1:
+        # Every further target: its design column, fitted values and residuals, and its per-row output
+        total += FLOAT_BYTES * rows * 3 * (targets - 1)
+        if predictions or report:
+            total += FLOAT_BYTES * rows * 3 * (targets - 1)
+        if predictions:
+            total += SERIALIZED_VALUE_BYTES * rows * 3 * (targets - 1)
+    if cross_validation:
+        # Thin QR factor and the per-fold chunk copies
+        total += FLOAT_BYTES * rows * (2 * k + 1)
+    if diagnostics:
+        total += FLOAT_BYTES * rows * (2 * k + 4) + SERIALIZED_VALUE_BYTES * rows * 3
+    if bootstrap_resamples:
+        # Residuals, the float32 residual pool and the resampled coefficients
+        total += 12 * rows + FLOAT_BYTES * bootstrap_resamples * (k + 1)
+    if ridge_path:
+        # Thin SVD of the centered predictors
+        total += FLOAT_BYTES * rows * (2 * k)
+    if rolling:
+        # Shifted copies of the rows entering and leaving a window
+        total += FLOAT_BYTES * rows * (k + 1)
+    if report:
+        total += REPORT_ROW_BYTES * rows
+    return int(total)
+
+
+def detect_memory_limit() -> int:
+    """
+    Memory available to the process: the cgroup limit if set, else the physical memory
+    """
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v2 reports "max", v1 a huge number when unlimited
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 ** 3
+
+
+class AdmissionController:
+    """
+    Memory budget shared by the analysis and report requests of a worker
+
+    Each request reserves its estimated working set before it loads any
+    data. Requests that do not fit wait in first-come-first-served order,
+    so a large request is not starved by a stream of small ones; a request
+    is rejected when the queue is full or it waited longer than
+    ``max_wait`` seconds. A request larger than the whole budget is
+    admitted alone.
+
+    The controller runs on the event loop and is not thread-safe.
+    """
+
+    def __init__(self, budget: int, max_wait: float, max_queue: int, enabled: bool = True):
+        self.budget = budget
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.enabled = enabled
+        self.reserved = 0
+        self.queued = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = collections.deque()
+        BUDGET_BYTES.set(budget if enabled else 0)
+
+    async def acquire(self, estimate: int) -> int:
+        """
+        Wait until ``estimate`` bytes can be reserved and reserve them
+
+        Returns:
+        --------
+        int
+            The reserved amount, to be passed to ``release``
+
+        Raises:
+        -------
+        AdmissionRejected
+            If the queue is full or the wait timed out
+        """
+        if not self.enabled:
+            return 0
+        amount = min(estimate, self.budget)
+        if not self._waiters and self.reserved + amount <= self.budget:
+            self._reserve(amount)
+            return amount
+
+        if len(self._waiters) >= self.max_queue:
+            REJECTIONS.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (amount, future)
+        self._waiters.append(waiter)
+        self.queued += amount
+        self._update_gauges()
+        start = loop.time()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+            return amount
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # Admitted just as the wait ended
+                if isinstance(e, asyncio.TimeoutError):
+                    return amount
+                self.release(amount)
+                raise
+            future.cancel()
+            self._waiters.remove(waiter)
+            self.queued -= amount
+            # Requests queued behind this one may fit now
+            self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                REJECTIONS.inc(reason="timeout")
+                raise AdmissionRejected("timeout")
+            raise
+        finally:
+            WAIT_DURATION.observe(loop.time() - start)
+
+    def release(self, amount: int) -> None:
+        """
+        Return a reservation and admit the waiting requests that now fit
+        """
+        if not self.enabled:
+            return
+        self.reserved -= amount
+        self._wake()
+
+    def _reserve(self, amount: int) -> None:
+        self.reserved += amount
+        self._update_gauges()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            amount, future = self._waiters[0]
+            if self.reserved + amount > self.budget:
+                break
+            self._waiters.popleft()
+            self.queued -= amount
+            self.reserved += amount
+            future.set_result(None)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        RESERVED_BYTES.set(self.reserved)
+        QUEUED_BYTES.set(self.queued)
+        QUEUED_REQUESTS.set(len(self._waiters))
+
+
+def _default_budget() -> int:
+    if config.ADMISSION_MEMORY_MB > 0:
+        return config.ADMISSION_MEMORY_MB * 1024 * 1024
+    # Share of the container's memory for each worker's requests
+    return int(detect_memory_limit() * config.ADMISSION_MEMORY_FRACTION / max(1, config.WEB_CONCURRENCY))
+
+
+admission_controller = AdmissionController(
+    _default_budget(),
+    max_wait=config.ADMISSION_MAX_WAIT,
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    enabled=config.ADMISSION_ENABLED
+)
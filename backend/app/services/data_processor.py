@@ -1,8 +1,225 @@
+import bz2
+import gzip
+import importlib.util
+import io
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-from typing import Tuple, List, Dict, Any
-from sklearn.preprocessing import StandardScaler
-from pandas.api.types import is_numeric_dtype
+from typing import BinaryIO, Tuple, List, Dict, Any, Optional, Union
+from pandas.api.types import (
+    CategoricalDtype, is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, is_object_dtype, is_string_dtype,
+    pandas_dtype
+)
+from app.services.metrics import record_cache_lookup
+
+# Column means used for mean imputation, keyed by (dataset key, column name).
+# Stored datasets never change (appends create a new dataset key), so a mean
+# computed once stays valid for every session using the dataset.
+_imputation_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+_imputation_lock = threading.Lock()
+IMPUTATION_CACHE_SIZE = 100_000
+
+# Column profiles: bins of the reported histogram, bins of the finer histogram
+# the quantiles are interpolated from (a multiple of PROFILE_BINS) and the quantiles
+PROFILE_BINS = 20
+PROFILE_FINE_BINS = 2000
+PROFILE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Numeric columns are profiled in chunks holding at most this many values
+PROFILE_CHUNK_VALUES = 1 << 24
+
+# Accepted uploads by file name suffix: (format, compression)
+UPLOAD_FORMATS = {
+    ".csv": ("csv", None),
+    ".csv.gz": ("csv", "gzip"),
+    ".csv.gzip": ("csv", "gzip"),
+    ".csv.bz2": ("csv", "bz2"),
+    ".csv.zst": ("csv", "zstd"),
+    ".csv.zstd": ("csv", "zstd"),
+    ".xlsx": ("excel", None),
+    ".xls": ("excel", None),
+    ".parquet": ("parquet", None),
+    ".pq": ("parquet", None),
+    ".arrow": ("arrow", None),
+    ".feather": ("arrow", None),
+}
+# Optional packages needed by some formats
+FORMAT_PACKAGES = {"zstd": "zstandard", "parquet": "pyarrow", "arrow": "pyarrow"}
+# Compressed bytes read at a time by the zstd decompressor
+ZSTD_READ_SIZE = 1 << 20
+
+
+def upload_format(filename: str) -> Tuple[str, Optional[str]]:
+    """
+    Format and compression of an upload, from its file name
+
+    Raises:
+    -------
+    ValueError
+        If the format is not supported or needs a package that is not installed
+    """
+    name = filename.lower()
+    # Longest suffix first, so that ".csv.gz" is not taken for something else
+    for suffix in sorted(UPLOAD_FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            file_format, compression = UPLOAD_FORMATS[suffix]
+            break
+    else:
+        raise ValueError(
+            "File must be CSV (optionally .gz, .bz2 or .zst compressed), Excel, Parquet or Arrow"
+        )
+
+    for requirement in (file_format, compression):
+        package = FORMAT_PACKAGES.get(requirement)
+        if package and importlib.util.find_spec(package) is None:
+            raise ValueError(f"Reading {suffix} files requires the {package} package, which is not installed")
+    return file_format, compression
+
+
+def _decompressed(source: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """
+    Wrap a file object so that it is decompressed while it is read
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(source, mode="rb")
+    if compression == "zstd":
+        import zstandard
+
+        # Files from parallel compressors consist of several frames
+        return zstandard.ZstdDecompressor().stream_reader(
+            source, read_size=ZSTD_READ_SIZE, read_across_frames=True
+        )
+    return source
+
+
+def _cached_column_mean(cache_key: Optional[str], column: str, values: np.ndarray) -> float:
+    """
+    Mean of a column ignoring NaNs, memoized per dataset and column
+    """
+    if cache_key is None:
+        return float(np.nanmean(values))
+
+    key = (cache_key, column)
+    with _imputation_lock:
+        mean = _imputation_cache.get(key)
+        if mean is not None:
+            _imputation_cache.move_to_end(key)
+    record_cache_lookup("imputation", mean is not None)
+    if mean is not None:
+        return mean
+
+    mean = float(np.nanmean(values))
+    with _imputation_lock:
+        _imputation_cache[key] = mean
+        while len(_imputation_cache) > IMPUTATION_CACHE_SIZE:
+            _imputation_cache.popitem(last=False)
+    return mean
+
+
+def clear_imputation_cache(cache_key: str) -> None:
+    """
+    Drop the cached imputation statistics of a dataset
+    """
+    with _imputation_lock:
+        for key in [key for key in _imputation_cache if key[0] == cache_key]:
+            del _imputation_cache[key]
+
+
+def _histogram_quantiles(counts: np.ndarray, edges: np.ndarray) -> Dict[str, float]:
+    """
+    Quantiles interpolated linearly inside the bins of a histogram
+    """
+    cumulative = np.concatenate([[0.0], np.cumsum(counts, dtype=np.float64)])
+    targets = np.asarray(PROFILE_QUANTILES) * cumulative[-1]
+    # Drop empty bins so every remaining cumulative step is strictly increasing
+    keep = np.concatenate([[True], np.asarray(counts) > 0])
+    values = np.interp(targets, cumulative[keep], edges[keep])
+    return {f"p{round(q * 100):02d}": float(v) for q, v in zip(PROFILE_QUANTILES, values)}
+
+
+def _rebin(histogram: Dict[str, Any], edges: np.ndarray) -> np.ndarray:
+    """
+    Spread the counts of a histogram over new bin edges, assuming values are uniform within bins
+    """
+    old_edges = np.asarray(histogram["edges"])
+    old_counts = np.asarray(histogram["counts"], dtype=np.float64)
+    # Share of each old bin falling into each new bin
+    lower = np.maximum(old_edges[:-1, None], edges[None, :-1])
+    upper = np.minimum(old_edges[1:, None], edges[None, 1:])
+    widths = old_edges[1:] - old_edges[:-1]
+    overlap = np.clip(upper - lower, 0.0, None)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(widths[:, None] > 0, overlap / widths[:, None], 0.0)
+    # Zero-width bins (constant columns) go to the new bin containing their value
+    point = widths == 0
+    if point.any():
+        target = np.clip(np.searchsorted(edges, old_edges[:-1][point], side="right") - 1, 0, len(edges) - 2)
+        share[point] = 0.0
+        share[np.flatnonzero(point), target] = 1.0
+    return old_counts @ share
+
+
+class CategoricalDesign:
+    """
+    Regression design whose categorical predictors are kept as integer codes
+
+    ``block`` is the ``[const, x1, ..., xq, y]`` matrix of the numeric
+    predictors (see DataProcessor.build_design_matrix), possibly with several
+    dependent variables. Every categorical
+    predictor is one array of per-row indicator column indices: row i has a
+    one in indicator ``codes[i]`` of that predictor, or in none of them
+    (-1) if it is at the reference level. The indicator columns themselves
+    are only built by ``dense``.
+    """
+
+    def __init__(
+            self,
+            block: np.ndarray,
+            numeric_names: List[str],
+            factors: List[Tuple[str, np.ndarray, List[str], str]],
+            dependent_variable: Union[str, List[str]]
+    ):
+        self.block = block
+        self.numeric_names = list(numeric_names)
+        # (name, codes, levels of the indicator columns, reference level) per categorical predictor
+        self.factors = factors
+        self.dependent_variable = dependent_variable
+
+    @property
+    def feature_names(self) -> List[str]:
+        """
+        Names of the numeric predictors, then ``name[level]`` of every indicator column
+        """
+        names = list(self.numeric_names)
+        for name, _, levels, _ in self.factors:
+            names.extend(f"{name}[{level}]" for level in levels)
+        return names
+
+    @property
+    def rows(self) -> int:
+        return self.block.shape[0]
+
+    def dense(self) -> np.ndarray:
+        """
+        The full ``[const, x1, ..., xq, indicators..., y]`` design matrix, for
+        the stages that need every column as an array
+        """
+        q = len(self.numeric_names)
+        indicators = sum(len(levels) for _, _, levels, _ in self.factors)
+        targets = self.block.shape[1] - q - 1
+        block = np.zeros((self.rows, q + indicators + 1 + targets), dtype=self.block.dtype, order="F")
+        block[:, :q + 1] = self.block[:, :q + 1]
+        block[:, -targets:] = self.block[:, q + 1:]
+
+        offset = q + 1
+        rows = np.arange(self.rows)
+        for _, codes, levels, _ in self.factors:
+            kept = codes >= 0
+            block[rows[kept], offset + codes[kept]] = 1.0
+            offset += len(levels)
+        return block
 
 
 class DataProcessor:
@@ -10,6 +227,135 @@ class DataProcessor:
     Processing and preparing data for regression analysis
     """
 
+    def read_file(self, filename: str, content: Union[bytes, BinaryIO]) -> pd.DataFrame:
+        """
+        Parse an uploaded file into a data frame
+
+        Compressed CSV is decompressed while the parser reads it, so neither
+        the compressed nor the decompressed text is held in memory as a
+        whole. Parquet and Arrow files are columnar already and are converted
+        without any text parsing.
+
+        Parameters:
+        -----------
+        filename : str
+            Original name of the uploaded file, used to pick the parser (see UPLOAD_FORMATS)
+        content : Union[bytes, BinaryIO]
+            Raw file content, or a seekable binary file object holding it
+
+        Returns:
+        --------
+        pd.DataFrame
+            Parsed data
+        """
+        file_format, compression = upload_format(filename)
+        source = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+
+        if file_format == "csv":
+            stream = _decompressed(source, compression)
+            try:
+                return pd.read_csv(stream)
+            finally:
+                if stream is not source:
+                    stream.close()
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            return self._arrow_to_frame(pq.read_table(source))
+        if file_format == "arrow":
+            return self._arrow_to_frame(self._read_arrow(source))
+        # Excel file
+        return pd.read_excel(source)
+
+    def encode_categoricals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store the text columns of a freshly parsed data frame as categoricals
+
+        Each value becomes an integer code into the sorted levels of its
+        column, so a text column takes one to four bytes per row instead of
+        a Python string, and regressions on it start from the codes without
+        hashing the strings again. The frame is modified in place and returned.
+        """
+        for col in df.columns:
+            dtype = df[col].dtype
+            if not isinstance(dtype, CategoricalDtype) and (is_object_dtype(dtype) or is_string_dtype(dtype)):
+                df[col] = df[col].astype("category")
+        return df
+
+    def conform_dtypes(self, df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+        """
+        Cast freshly parsed rows to the column types of the dataset they are appended to
+
+        Numeric columns must parse as numbers and categorical columns become
+        categoricals of their own levels (the levels of all parts are united
+        when the dataset is loaded). The frame is modified in place and returned.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Parsed rows with the columns of the dataset
+        dtypes : Dict[str, str]
+            Column name -> dtype of the dataset
+
+        Returns:
+        --------
+        pd.DataFrame
+            The rows with the dataset's column types
+
+        Raises:
+        -------
+        ValueError
+            If values of some columns do not fit their type; the message names the columns
+        """
+        mismatched = []
+        for col, dtype in dtypes.items():
+            target = pandas_dtype(dtype)
+            series = df[col]
+            try:
+                if isinstance(target, CategoricalDtype):
+                    if not isinstance(series.dtype, CategoricalDtype):
+                        # Levels that happen to parse as numbers here are text in the dataset
+                        df[col] = series.where(series.isna(), series.astype(str)).astype("category")
+                elif is_bool_dtype(target):
+                    if not is_bool_dtype(series.dtype):
+                        mismatched.append(col)
+                elif is_numeric_dtype(target):
+                    if not is_numeric_dtype(series.dtype) or is_bool_dtype(series.dtype):
+                        df[col] = pd.to_numeric(series.astype(object))
+                elif is_datetime64_any_dtype(target):
+                    if not is_datetime64_any_dtype(series.dtype):
+                        df[col] = pd.to_datetime(series)
+            except (ValueError, TypeError):
+                mismatched.append(col)
+
+        if mismatched:
+            raise ValueError(f"Values do not match the column types of the dataset in: {', '.join(mismatched)}")
+        return df
+
+    def _read_arrow(self, source: BinaryIO):
+        """
+        Read an Arrow IPC file (Feather v2) or stream into a pyarrow Table
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        try:
+            return feather.read_table(source)
+        except pa.ArrowInvalid:
+            # Not the random-access file format; try the streaming format
+            source.seek(0)
+            return pa.ipc.open_stream(source).read_all()
+
+    def _arrow_to_frame(self, table) -> pd.DataFrame:
+        """
+        Convert a pyarrow Table to a data frame, one column block at a time
+
+        Columns keep their own blocks instead of being consolidated into one
+        2-D block (which copies every column once more), and the Arrow
+        buffers are released as the columns are converted.
+        """
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
     def prepare_data(
             self,
             df: pd.DataFrame,
@@ -33,28 +379,362 @@ class DataProcessor:
         Tuple[pd.DataFrame, pd.Series]
             Prepared X and y data
         """
-        # Check if all specified columns exist
         all_vars = independent_variables + [dependent_variable]
-        missing_cols = [col for col in all_vars if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Columns not found in dataset: {', '.join(missing_cols)}")
+        self._validate_columns(df, all_vars)
 
-        # Check for non-numeric columns and handle them
-        for col in all_vars:
-            if not is_numeric_dtype(df[col]):
-                raise ValueError(f"Column {col} is not numeric")
+        # Extract X and y (a copy, the caller's data frame is never modified)
+        data = df[all_vars]
 
         # Check for missing values
-        if df[all_vars].isna().any().any():
+        if data.isna().any().any():
             # Handle missing values by mean imputation
-            df[all_vars] = df[all_vars].fillna(df[all_vars].mean())
+            data = data.fillna(data.mean())
 
-        # Extract X and y
-        X = df[independent_variables].copy()
-        y = df[dependent_variable].copy()
+        X = data[independent_variables]
+        y = data[dependent_variable]
 
         return X, y
 
+    def build_design_matrix(
+            self,
+            df: pd.DataFrame,
+            dependent_variable: Union[str, List[str]],
+            independent_variables: List[str],
+            dtype: Any = np.float64,
+            cache_key: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Build the regression design matrix in a single allocation
+
+        The result is one Fortran-ordered block laid out as
+        ``[const, x1, ..., xp, y]``: the intercept column, the independent
+        variables and the dependent variable. ``block[:, :-1]`` (design matrix
+        with intercept), ``block[:, -1]`` (dependent variable) and
+        ``block[:, 1:]`` (all variables) are contiguous views, so nothing has to
+        be copied again before fitting. Missing values are replaced by the
+        column mean inside the block; the source data frame is not modified.
+        With several dependent variables they all follow the independent
+        variables: ``[const, x1, ..., xp, y1, ..., yt]``.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Input data frame
+        dependent_variable : Union[str, List[str]]
+            Name of the dependent variable column, or names of several
+        independent_variables : List[str]
+            Names of the independent variable columns
+        dtype : numpy dtype
+            np.float64 (default) or np.float32 to halve memory use
+        cache_key : str, optional
+            Dataset key; imputation means are cached per dataset and column,
+            which stays valid because stored datasets never change
+
+        Returns:
+        --------
+        np.ndarray
+            Array of shape (rows, len(independent_variables) + 1 + number of dependent variables)
+        """
+        dependent = [dependent_variable] if isinstance(dependent_variable, str) else list(dependent_variable)
+        all_vars = independent_variables + dependent
+        self._validate_columns(df, all_vars)
+
+        block = np.empty((len(df), len(all_vars) + 1), dtype=dtype, order="F")
+        block[:, 0] = 1.0
+
+        for j, col in enumerate(all_vars, start=1):
+            series = df[col]
+            target = block[:, j]
+            if isinstance(series.dtype, np.dtype):
+                # Plain NumPy columns are copied (and cast) straight into the block
+                target[:] = series.to_numpy()
+            else:
+                # Nullable extension dtypes need their NA converted to NaN first
+                target[:] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+            # Mean imputation of missing values
+            missing = np.isnan(target)
+            if missing.any():
+                target[missing] = _cached_column_mean(cache_key, col, target)
+
+        return block
+
+    def categorical_columns(self, df: pd.DataFrame, columns: List[str]) -> List[str]:
+        """
+        The columns among ``columns`` that are categorical or text
+        """
+        return [
+            col for col in columns
+            if col in df.columns and not is_numeric_dtype(df[col]) and (
+                isinstance(df[col].dtype, CategoricalDtype)
+                or is_object_dtype(df[col].dtype)
+                or is_string_dtype(df[col].dtype)
+            )
+        ]
+
+    def build_categorical_design(
+            self,
+            df: pd.DataFrame,
+            dependent_variable: Union[str, List[str]],
+            independent_variables: List[str],
+            reference_levels: Optional[Dict[str, str]] = None,
+            dtype: Any = np.float64,
+            cache_key: Optional[str] = None
+    ) -> CategoricalDesign:
+        """
+        Build a regression design with categorical predictors
+
+        Numeric predictors go into a design matrix as in build_design_matrix.
+        Categorical (or text) predictors are treated-coded: one indicator
+        column per level except the reference level, which is absorbed by
+        the intercept. Only the integer codes are kept, so the design takes
+        memory per row and predictor, whatever the number of levels. Levels
+        that do not occur are dropped and missing values form a level of
+        their own, named ``nan``.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Input data frame
+        dependent_variable : Union[str, List[str]]
+            Name of the dependent variable column, which must be numeric, or
+            names of several (only ``dense`` supports more than one)
+        independent_variables : List[str]
+            Names of the independent variable columns
+        reference_levels : Dict[str, str], optional
+            Reference level per categorical predictor (default: its first level in sorted order)
+        dtype : numpy dtype
+            np.float64 (default) or np.float32 for the numeric columns
+        cache_key : str, optional
+            Dataset key; imputation means are cached per dataset and column,
+            which stays valid because stored datasets never change
+
+        Returns:
+        --------
+        CategoricalDesign
+            The numeric block and the codes of the categorical predictors
+        """
+        missing_cols = [col for col in independent_variables if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in dataset: {', '.join(missing_cols)}")
+
+        reference_levels = reference_levels or {}
+        categorical = self.categorical_columns(df, independent_variables)
+        unknown = [col for col in reference_levels if col not in categorical]
+        if unknown:
+            raise ValueError(f"Reference levels given for non-categorical predictors: {', '.join(unknown)}")
+
+        numeric = [col for col in independent_variables if col not in categorical]
+        block = self.build_design_matrix(df, dependent_variable, numeric, dtype=dtype, cache_key=cache_key)
+
+        factors = []
+        for col in categorical:
+            codes, levels, reference = self._treatment_codes(df[col], reference_levels.get(col))
+            factors.append((col, codes, levels, reference))
+        return CategoricalDesign(block, numeric, factors, dependent_variable)
+
+    def _treatment_codes(self, series: pd.Series, reference: Optional[str]) -> Tuple[np.ndarray, List[str], str]:
+        """
+        Indicator column index of every row of a categorical column (-1 at the reference level)
+        """
+        if not isinstance(series.dtype, CategoricalDtype):
+            # Text columns of datasets stored without encoding
+            series = series.astype("category")
+        codes = series.cat.codes.to_numpy()
+        n_categories = len(series.cat.categories)
+        names = [str(level) for level in series.cat.categories] + ["nan"]
+
+        # Missing values (code -1) are counted in the extra last slot
+        counts = np.bincount(codes.astype(np.intp) % (n_categories + 1), minlength=n_categories + 1)
+        present = np.flatnonzero(counts)
+        if reference is None:
+            reference_code = int(present[0])
+        else:
+            matches = [code for code in present if names[code] == str(reference)]
+            if not matches:
+                raise ValueError(f"Reference level {reference} does not occur in column {series.name}")
+            reference_code = int(matches[0])
+
+        kept = present[present != reference_code]
+        mapping = np.full(n_categories + 1, -1, dtype=np.int32)
+        mapping[kept] = np.arange(len(kept), dtype=np.int32)
+        # Code -1 indexes the last slot, the level of the missing values
+        return mapping[codes], [names[code] for code in kept], names[reference_code]
+
+    def profile_columns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Describe every column of a data frame
+
+        Numeric columns are converted in chunks of columns; each chunk is
+        summarized with column-wise reductions and one bincount for the
+        histograms of all its columns. Quantiles are interpolated from a
+        histogram of PROFILE_FINE_BINS bins, so they are exact to within
+        (max - min) / PROFILE_FINE_BINS.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Data to describe
+
+        Returns:
+        --------
+        List[Dict[str, Any]]
+            One entry per column with its name, dtype, whether it is numeric,
+            non-null and null counts, the number of levels of categorical
+            columns and, for numeric columns, min, max, mean, standard
+            deviation, quantiles and a PROFILE_BINS-bin histogram
+        """
+        profiles = {}
+        numeric = []
+        for col in df.columns:
+            if is_numeric_dtype(df[col]):
+                numeric.append(col)
+            else:
+                nulls = int(df[col].isna().sum())
+                profiles[col] = {
+                    "name": str(col),
+                    "dtype": str(df[col].dtype),
+                    "numeric": False,
+                    "count": len(df) - nulls,
+                    "nulls": nulls
+                }
+                if isinstance(df[col].dtype, CategoricalDtype):
+                    profiles[col]["levels"] = len(df[col].cat.categories)
+
+        chunk_columns = max(1, PROFILE_CHUNK_VALUES // max(len(df), 1))
+        for start in range(0, len(numeric), chunk_columns):
+            columns = numeric[start:start + chunk_columns]
+            # One row per column, so every reduction runs over contiguous memory
+            values = np.empty((len(columns), len(df)))
+            for j, col in enumerate(columns):
+                values[j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            for col, profile in zip(columns, self._profile_numeric(values)):
+                profiles[col] = {"name": str(col), "dtype": str(df[col].dtype), **profile}
+
+        return [profiles[col] for col in df.columns]
+
+    def _profile_numeric(self, values: np.ndarray) -> List[Dict[str, Any]]:
+        # ``values`` holds one column per row. Infinite values are counted as missing, like NaN
+        finite = np.isfinite(values)
+        all_finite = bool(finite.all())
+        counts = finite.sum(axis=1)
+        nulls = values.shape[1] - counts
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if all_finite:
+                minimum = values.min(axis=1, initial=np.inf)
+                maximum = values.max(axis=1, initial=-np.inf)
+                mean = values.mean(axis=1)
+                std = values.std(axis=1, ddof=1)
+            else:
+                # Reductions restricted to finite values without building a NaN-free copy
+                minimum = np.min(values, axis=1, where=finite, initial=np.inf)
+                maximum = np.max(values, axis=1, where=finite, initial=-np.inf)
+                mean = np.sum(values, axis=1, where=finite) / counts
+                std = np.sqrt(np.sum((values - mean[:, None]) ** 2, axis=1, where=finite) / (counts - 1))
+
+        # Fine histograms of all columns at once: bin index plus a per-column offset
+        k = values.shape[0]
+        low = np.where(counts > 0, minimum, 0.0)[:, None]
+        width = np.where(maximum > minimum, maximum - minimum, 1.0)[:, None]
+        with np.errstate(invalid="ignore"):
+            index = ((values - low) * (PROFILE_FINE_BINS / width)).astype(np.int64)
+        np.minimum(index, PROFILE_FINE_BINS - 1, out=index)
+        index += np.arange(k)[:, None] * PROFILE_FINE_BINS
+        if not all_finite:
+            # Missing values go to a spill bin past the end
+            index[~finite] = k * PROFILE_FINE_BINS
+        fine = np.bincount(index.ravel(), minlength=k * PROFILE_FINE_BINS + 1)[:k * PROFILE_FINE_BINS]
+        fine = fine.reshape(k, PROFILE_FINE_BINS)
+
+        profiles = []
+        for j in range(k):
+            profile = {"numeric": True, "count": int(counts[j]), "nulls": int(nulls[j])}
+            if counts[j] == 0:
+                profile.update(min=None, max=None, mean=None, std=None, quantiles={}, histogram=None)
+            else:
+                edges = np.linspace(minimum[j], maximum[j], PROFILE_FINE_BINS + 1)
+                profile.update(
+                    min=float(minimum[j]),
+                    max=float(maximum[j]),
+                    mean=float(mean[j]),
+                    std=float(std[j]) if counts[j] > 1 else None,
+                    quantiles=_histogram_quantiles(fine[j], edges),
+                    histogram={
+                        "edges": np.linspace(minimum[j], maximum[j], PROFILE_BINS + 1).tolist(),
+                        "counts": fine[j].reshape(PROFILE_BINS, -1).sum(axis=1).tolist()
+                    }
+                )
+            profiles.append(profile)
+        return profiles
+
+    def merge_profiles(self, first: List[Dict[str, Any]], second: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Profile of the rows of two profiled data frames with the same columns
+
+        Counts, extremes, means and standard deviations combine exactly. The
+        histograms are re-binned onto the combined range assuming values are
+        spread evenly inside each bin, and the quantiles are interpolated
+        from the result, so both are approximate. Level counts of categorical
+        columns are an upper bound, as levels may occur in both parts.
+        """
+        by_name = {profile["name"]: profile for profile in second}
+        merged = []
+        for a in first:
+            b = by_name[a["name"]]
+            count, nulls = a["count"] + b["count"], a["nulls"] + b["nulls"]
+            if not (a["numeric"] and b["numeric"]):
+                merged.append({
+                    "name": a["name"],
+                    "dtype": a["dtype"] if a["dtype"] == b["dtype"] else "object",
+                    "numeric": False,
+                    "count": count,
+                    "nulls": nulls
+                })
+                if "levels" in a and "levels" in b:
+                    merged[-1]["levels"] = min(a["levels"] + b["levels"], count)
+                continue
+            if not a["count"] or not b["count"]:
+                profile = dict(a if a["count"] else b)
+                profile.update(count=count, nulls=nulls)
+                merged.append(profile)
+                continue
+
+            # Pooled mean and variance (Chan et al.)
+            delta = b["mean"] - a["mean"]
+            mean = a["mean"] + delta * b["count"] / count
+            m2 = sum((p["std"] or 0.0) ** 2 * (p["count"] - 1) for p in (a, b))
+            m2 += delta ** 2 * a["count"] * b["count"] / count
+
+            minimum, maximum = min(a["min"], b["min"]), max(a["max"], b["max"])
+            edges = np.linspace(minimum, maximum, PROFILE_BINS + 1)
+            counts = _rebin(a["histogram"], edges) + _rebin(b["histogram"], edges)
+            merged.append({
+                "name": a["name"],
+                "dtype": a["dtype"] if a["dtype"] == b["dtype"] else "float64",
+                "numeric": True,
+                "count": count,
+                "nulls": nulls,
+                "min": minimum,
+                "max": maximum,
+                "mean": mean,
+                "std": float(np.sqrt(m2 / (count - 1))),
+                "quantiles": _histogram_quantiles(counts, edges),
+                "histogram": {"edges": edges.tolist(), "counts": np.rint(counts).astype(int).tolist()}
+            })
+        return merged
+
+    def _validate_columns(self, df: pd.DataFrame, columns: List[str]) -> None:
+        # Check if all specified columns exist
+        missing_cols = [col for col in columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in dataset: {', '.join(missing_cols)}")
+
+        # Check for non-numeric columns and handle them
+        for col in columns:
+            if not is_numeric_dtype(df[col]):
+                raise ValueError(f"Column {col} is not numeric")
+
     def normalize_data(self, X: pd.DataFrame) -> pd.DataFrame:
         """
         Normalize features using StandardScaler
@@ -69,6 +749,8 @@ class DataProcessor:
         pd.DataFrame
             Normalized independent variables
         """
+        from sklearn.preprocessing import StandardScaler
+
         scaler = StandardScaler()
         X_scaled = pd.DataFrame(
             scaler.fit_transform(X),
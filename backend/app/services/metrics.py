@@ -0,0 +1,266 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+# Stage timings of the request currently being handled, in (name, seconds) order
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonically increasing value per label set
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down per label set
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    Cumulative latency histogram per label set
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            # Per-bucket counts followed by the running sum and the total count
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter("http_requests_total", "HTTP requests handled, by method, route and status")
+REQUEST_DURATION = registry.histogram("http_request_duration_seconds", "HTTP request latency, by method and route")
+BYTES_IN = registry.counter("http_request_bytes_total", "Request body bytes received, by route")
+BYTES_OUT = registry.counter("http_response_bytes_total", "Response body bytes sent, by route")
+STAGE_DURATION = registry.histogram("stage_duration_seconds", "Latency of instrumented processing stages")
+CACHE_HITS = registry.counter("cache_hits_total", "Cache lookups answered from the cache, by cache")
+CACHE_MISSES = registry.counter("cache_misses_total", "Cache lookups that had to compute the value, by cache")
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Time a processing stage
+
+    The duration is added to the stage latency histogram and, when called while
+    handling a request, reported in that request's Server-Timing header.
+
+    Parameters:
+    -----------
+    stage : str
+        Stage name, a token such as ``prepare_data`` or ``chart_qq_plot``
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_DURATION.observe(duration, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, duration))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a cache hit or miss for the given cache
+    """
+    (CACHE_HITS if hit else CACHE_MISSES).inc(cache=cache)
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """
+    Build a Server-Timing header value, durations in milliseconds
+    """
+    seen: Dict[str, int] = {}
+    entries = []
+    for name, duration in timings:
+        # Repeated stages (e.g. several LaTeX passes) get a numeric suffix
+        seen[name] = seen.get(name, 0) + 1
+        metric = name if seen[name] == 1 else f"{name}_{seen[name]}"
+        entries.append(f"{metric};dur={duration * 1000:.2f}")
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSON response whose encoding time is reported as the ``json_encode`` stage
+    """
+
+    def render(self, content) -> bytes:
+        with timed("json_encode"):
+            return super().render(content)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware collecting request metrics and adding the Server-Timing header
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        state = {"status": 500, "bytes_in": 0, "bytes_out": 0}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["bytes_in"] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                header = format_server_timing(timings, time.perf_counter() - start)
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]}
+            elif message["type"] == "http.response.body":
+                state["bytes_out"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            # Label by route template to keep the number of series bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUESTS.inc(method=method, route=path, status=str(state["status"]))
+            REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=path)
+            BYTES_IN.inc(state["bytes_in"], route=path)
+            BYTES_OUT.inc(state["bytes_out"], route=path)
@@ -0,0 +1,197 @@
+import cProfile
+import contextvars
+import datetime
+import io
+import os
+import pstats
+import random
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import parse_qs
+
+from app import config
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# cProfile hooks the whole interpreter thread, so only one request is profiled at a time
+_profiler_lock = threading.Lock()
+# Profilers of pool threads doing work for the request being profiled
+_thread_profilers: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar(
+    "thread_profilers", default=None
+)
+
+
+class ProfileStore:
+    """
+    Directory of pstats dumps addressed by profile id
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def path(self, profile_id: str) -> str:
+        # Ids are generated as hex strings, reject anything that could escape the directory
+        if not profile_id or not all(c in "0123456789abcdef" for c in profile_id):
+            raise ValueError(f"Invalid profile id: {profile_id}")
+        return os.path.join(self.directory, f"{profile_id}.prof")
+
+    def save(
+            self,
+            profile_id: str,
+            profiler: cProfile.Profile,
+            thread_profilers: Sequence[cProfile.Profile] = ()
+    ) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(profile_id)
+        if thread_profilers:
+            # Merge what pool threads did for the request into one profile
+            stats = pstats.Stats(profiler)
+            stats.add(*thread_profilers)
+            stats.dump_stats(path)
+        else:
+            profiler.dump_stats(path)
+        self._prune()
+        return path
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".prof"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({
+                "profile_id": name[:-len(".prof")],
+                "created": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                "size": stat.st_size
+            })
+        return sorted(profiles, key=lambda p: p["created"], reverse=True)
+
+    def summary(self, profile_id: str, sort_by: str = "cumulative", limit: int = 50) -> str:
+        """
+        Render a stored profile as the text table printed by pstats
+        """
+        stream = io.StringIO()
+        stats = pstats.Stats(self.path(profile_id), stream=stream)
+        stats.sort_stats(sort_by).print_stats(limit)
+        return stream.getvalue()
+
+    def _prune(self) -> None:
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".prof")]
+        if len(paths) <= self.max_profiles:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_profiles]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+profile_store = ProfileStore(config.PROFILING_DIR, config.PROFILING_MAX_PROFILES)
+
+
+def _profiling_requested(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value.strip().lower() in (b"1", b"true", b"yes")
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if query.get(PROFILE_QUERY_PARAM, ["0"])[-1].lower() in ("1", "true", "yes"):
+        return True
+
+    return config.PROFILING_SAMPLE_RATE > 0 and random.random() < config.PROFILING_SAMPLE_RATE
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """
+    Profile the current (pool) thread if it works for a request being profiled
+
+    cProfile only sees the thread it was enabled in, so work handed to other
+    threads gets its own profiler, merged into the request's profile when it
+    is stored.
+    """
+    profilers = _thread_profilers.get()
+    if profilers is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active in this thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profilers.append(profiler)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running selected /api/* requests under cProfile
+
+    A request is profiled when it carries an ``X-Profile: 1`` header or a
+    ``?profile=1`` query parameter, or when it is picked by
+    ``PROFILING_SAMPLE_RATE``. The profile id is returned in the
+    ``X-Profile-Id`` response header and the stats can be fetched from
+    ``/api/profiles/{profile_id}``. Requests arriving while another one is
+    being profiled run unprofiled. The profiler follows the event loop thread,
+    so work of other requests interleaved at await points is included too;
+    work the request hands to pool threads is profiled through
+    ``profile_thread`` and merged in.
+    The middleware is only installed when
+    ``PROFILING_ENABLED`` is set, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.store = store or profile_store
+
+    async def __call__(self, scope, receive, send):
+        if (
+                scope["type"] != "http"
+                or not scope["path"].startswith("/api/")
+                or scope["path"].startswith("/api/profiles")
+                or not _profiling_requested(scope)
+                or not _profiler_lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER, profile_id.encode("latin-1"))
+                ]}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        thread_profilers = []
+        token = _thread_profilers.set(thread_profilers)
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                _thread_profilers.reset(token)
+            try:
+                self.store.save(profile_id, profiler, thread_profilers)
+            except OSError as e:
+                # The response is already sent, losing the profile must not fail the request
+                print(f"Failed to store profile {profile_id}: {str(e)}")
+        finally:
+            _profiler_lock.release()
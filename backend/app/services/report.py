@@ -2,28 +2,190 @@ import subprocess
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Dict, Any, List, Tuple
+from typing import Callable, Dict, Any, List, Tuple
 import os
 import tempfile
 import datetime
-import matplotlib as mpl
-import matplotlib.font_manager as fm
+import functools
 import shutil
+import re
+import threading
+import uuid
 
-# Налаштування шрифтів для matplotlib, які підтримують кирилицю
-# Спроба знайти шрифт, що підтримує кирилицю
-cyrillic_fonts = [f.name for f in fm.fontManager.ttflist if
-                  'DejaVu' in f.name or 'Liberation' in f.name or 'Ubuntu' in f.name or 'Arial' in f.name]
-if cyrillic_fonts:
-    mpl.rcParams['font.family'] = cyrillic_fonts[0]
-else:
-    mpl.rcParams['font.family'] = 'DejaVu Sans'
+from app.services.metrics import timed
 
-# Налаштування для підтримки UTF-8 в matplotlib
-plt.rcParams['pdf.fonttype'] = 42
-plt.rcParams['ps.fonttype'] = 42
+# Блокування для pyplot, який не є потокобезпечним
+_pyplot_lock = threading.Lock()
+
+# Обмеження Excel для назв аркушів
+EXCEL_SHEET_NAME_LENGTH = 31
+EXCEL_SHEET_NAME_FORBIDDEN = re.compile(r"[\[\]:*?/\\]")
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_cyrillic_font() -> str:
+    """
+    Знайти шрифт matplotlib, що підтримує кирилицю
+
+    Перелік шрифтів сканується лише один раз, результат кешується.
+    """
+    import matplotlib.font_manager as fm
+
+    cyrillic_fonts = [f.name for f in fm.fontManager.ttflist if
+                      'DejaVu' in f.name or 'Liberation' in f.name or 'Ubuntu' in f.name or 'Arial' in f.name]
+    if cyrillic_fonts:
+        return cyrillic_fonts[0]
+    return 'DejaVu Sans'
+
+
+@functools.lru_cache(maxsize=None)
+def load_plotting():
+    """
+    Імпортувати та налаштувати matplotlib і seaborn при першому використанні
+
+    Бібліотеки побудови графіків важкі, тому не імпортуються разом із модулем,
+    щоб не сповільнювати запуск сервера.
+
+    Повертає:
+    --------
+    tuple
+        Модулі (matplotlib.pyplot, seaborn)
+    """
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Налаштування шрифтів для matplotlib, які підтримують кирилицю
+    mpl.rcParams['font.family'] = _resolve_cyrillic_font()
+
+    # Налаштування для підтримки UTF-8 в matplotlib
+    plt.rcParams['pdf.fonttype'] = 42
+    plt.rcParams['ps.fonttype'] = 42
+
+    return plt, sns
+
+
+def _report_stamp() -> str:
+    """
+    Мітка часу з випадковим суфіксом, щоб одночасні звіти не перезаписували файли один одного
+    """
+    return f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def _sheet_name(title: str, used: set) -> str:
+    """
+    Допустима та унікальна назва аркуша Excel (до 31 символу, без []:*?/\\)
+
+    Назви порівнюються без урахування регістру, як в Excel; використані назви додаються до ``used``.
+    """
+    base = EXCEL_SHEET_NAME_FORBIDDEN.sub("_", title).strip("'") or "Аркуш"
+    name = base[:EXCEL_SHEET_NAME_LENGTH]
+    suffix = 2
+    while name.lower() in used:
+        tag = f" ({suffix})"
+        name = base[:EXCEL_SHEET_NAME_LENGTH - len(tag)] + tag
+        suffix += 1
+    used.add(name.lower())
+    return name
+
+
+def _latex_preamble() -> str:
+    """
+    Преамбула LaTeX документа звіту: пакети, колонтитули, заголовок і дата
+    """
+    return r"""
+    \documentclass{article}
+    \usepackage{amsmath, amssymb}
+    \usepackage[T2A]{fontenc} % Cyrillic font encoding
+    \usepackage[utf8]{inputenc} % UTF-8 input encoding
+    \usepackage{paratype} % PT Serif/Sans fonts with good Cyrillic support
+    \usepackage[ukrainian]{babel} % Ukrainian language support
+    \usepackage[a4paper, margin=2.5cm]{geometry}
+    \usepackage{mathtools}
+    \usepackage{xcolor}
+    \usepackage{graphicx}
+    \usepackage{float}
+    \usepackage{enumitem}
+    \usepackage{tikz}
+    \usetikzlibrary{matrix}
+    \usepackage{amsthm}
+    \usepackage{booktabs}
+    \usepackage{fancyhdr}
+    \usepackage{titlesec}
+    \usepackage{array}
+    \usepackage{longtable}
+    \usepackage{siunitx}
+
+    \titleformat{\section}{\Large\bfseries}{\thesection}{1em}{}
+    \titleformat{\subsection}{\large\bfseries}{\thesubsection}{1em}{}
+
+    \pagestyle{fancy}
+    \fancyhf{}
+    \fancyhead[C]{\textbf{Звіт багатофакторної лінійної регресії}}
+    \fancyfoot[C]{\thepage}
+    \renewcommand{\headrulewidth}{0.4pt}
+
+    \begin{document}
+
+    \begin{center}
+    \Large\textbf{Звіт багатофакторної лінійної регресії}
+    \end{center}
+
+    \vspace{1cm}
+
+    \textbf{Дата:} \today
+
+    \vspace{0.5cm}
+"""
+
+
+def _latex_coefficient_table(results: Dict[str, Any]) -> str:
+    """
+    Таблиця коефіцієнтів з p-значеннями та 95% довірчими інтервалами
+    """
+    latex_content = r"""
+   \renewcommand{\arraystretch}{1.5} % Increase row height by 50%
+    \begin{center}
+    \begin{tabular}{lccc}
+    \toprule
+    \textbf{Змінна} & \textbf{Коефіцієнт} & \textbf{P-значення} & \textbf{Значущість (p < 0.05)} \\
+     & \textbf{[95\% довірчий інтервал]} & & \\
+    \midrule
+    Вільний член & """ + f"{results['intercept']:.4f}" + r""" & Н/Д & Н/Д \\
+     & """ + f"[{results['intercept_confidence_interval']['lower']:.4f}, {results['intercept_confidence_interval']['upper']:.4f}]" + r""" & & \\
+    """
+    # Додавання коефіцієнтів регресії
+    for var, coef in results["coefficients"].items():
+        p_value = results["p_values"].get(var, 0)
+        p_value_str = f"{p_value:.4e}" if p_value < 0.0001 else f"{p_value:.4f}"
+        is_significant = "Так" if p_value < 0.05 else "Ні"
+        conf_int = results["confidence_intervals"].get(var, {"lower": 0, "upper": 0})
+        conf_int_str = f"[{conf_int['lower']:.4f}, {conf_int['upper']:.4f}]"
+        latex_content += f"{var} & {coef:.4f} & {p_value_str} & {is_significant} \\\\\n"
+        latex_content += f" & {conf_int_str} & & \\\\\n"
+    latex_content += r"""
+    \bottomrule
+    \end{tabular}
+    \end{center}
+    """
+    return latex_content
+
+
+def _latex_figure(img_path: str, title: str) -> str:
+    """
+    Рисунок LaTeX із зображенням з того самого каталогу, що й .tex файл
+    """
+    img_filename = os.path.basename(img_path)
+    return r"""
+    \begin{figure}[H]
+       \centering
+       \includegraphics[width=0.8\textwidth]{""" + img_filename + r"""}
+       \caption{""" + title + r"""}
+       \label{fig:""" + title.lower().replace(" ", "_") + r"""}
+    \end{figure}
+
+    \vspace{0.5cm}
+    """
 
 
 class ReportGenerator:
@@ -84,8 +246,39 @@ class ReportGenerator:
         str
             Шлях до згенерованого PDF файлу
         """
+        return self._render_pdf(
+            lambda temp_dir: self._build_latex(results, dependent_variable, independent_variables, temp_dir),
+            output_path
+        )
+
+    def _build_latex(
+            self,
+            results: Dict[str, Any],
+            dependent_variable: str,
+            independent_variables: List[str],
+            temp_dir: str
+    ) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Створити графіки звіту в тимчасовому каталозі та LaTeX вміст, що на них посилається
+        """
+        # Створення зображень для графіків
+        img_paths = self._create_visualization_images(results, dependent_variable, independent_variables, temp_dir)
+
+        # Створення LaTeX документу з оновленими пакетами
+        latex_content = self._create_latex_content_updated(results, dependent_variable, independent_variables,
+                                                           img_paths)
+        return latex_content, img_paths
+
+    def _render_pdf(
+            self,
+            build: Callable[[str], Tuple[str, List[Tuple[str, str]]]],
+            output_path: str = None
+    ) -> str:
+        """
+        Скомпілювати PDF з LaTeX вмісту, який ``build`` створює в тимчасовому каталозі
+        """
         # Визначення імені файлу та директорій
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = _report_stamp()
         temp_dir = os.path.join(os.getcwd(), f"temp_latex_{timestamp}")
         os.makedirs(temp_dir, exist_ok=True)
 
@@ -107,42 +300,14 @@ class ReportGenerator:
         tex_path = os.path.join(temp_dir, tex_filename)
 
         try:
-            # Створення зображень для графіків
-            img_paths = self._create_visualization_images(results, dependent_variable, independent_variables, temp_dir)
-
-            # Створення LaTeX документу з оновленими пакетами
-            latex_content = self._create_latex_content_updated(results, dependent_variable, independent_variables,
-                                                               img_paths)
+            latex_content, _ = build(temp_dir)
 
             # Збереження LaTeX вмісту в файл
             with open(tex_path, "w", encoding="utf-8") as f:
                 f.write(latex_content)
 
             # Компіляція LaTeX файлу в PDF
-            current_dir = os.getcwd()
-            os.chdir(temp_dir)  # Змінюємо поточну директорію на тимчасову для коректної компіляції
-
-            # Запуск pdflatex двічі для правильної обробки посилань
-            for _ in range(2):
-                process = subprocess.run(
-                    ["pdflatex", "-interaction=nonstopmode", tex_filename],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    check=False
-                )
-
-                # Перевірка на помилки
-                if process.returncode != 0:
-                    print(f"Помилка при компіляції LaTeX в PDF: {process.stderr}")
-                    # Продовжуємо, незважаючи на помилки, щоб спробувати створити PDF
-
-            os.chdir(current_dir)  # Повертаємось до вихідної директорії
-
-            # Перевірка, чи був створений PDF
-            compiled_pdf_path = os.path.join(temp_dir, os.path.splitext(tex_filename)[0] + ".pdf")
-            if not os.path.exists(compiled_pdf_path):
-                raise RuntimeError(f"PDF файл не було створено при компіляції LaTeX")
+            compiled_pdf_path = self._compile_latex(temp_dir, tex_filename)
 
             # Копіювання PDF файлу до кінцевого шляху
             shutil.copy(compiled_pdf_path, output_path)
@@ -157,6 +322,41 @@ class ReportGenerator:
             # if os.path.exists(temp_dir):
             #     shutil.rmtree(temp_dir)
 
+    def _compile_latex(self, temp_dir: str, tex_filename: str) -> str:
+        """
+        Скомпілювати LaTeX файл у PDF у вказаному каталозі
+
+        Повертає:
+        --------
+        str
+            Шлях до скомпільованого PDF файлу
+        """
+        # Запуск pdflatex двічі для правильної обробки посилань.
+        # Компіляція виконується в тимчасовому каталозі (cwd), щоб не змінювати
+        # поточну директорію всього процесу
+        for latex_pass in range(2):
+            with timed(f"latex_pass_{latex_pass + 1}"):
+                process = subprocess.run(
+                    ["pdflatex", "-interaction=nonstopmode", tex_filename],
+                    cwd=temp_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=False
+                )
+
+            # Перевірка на помилки
+            if process.returncode != 0:
+                print(f"Помилка при компіляції LaTeX в PDF: {process.stderr}")
+                # Продовжуємо, незважаючи на помилки, щоб спробувати створити PDF
+
+        # Перевірка, чи був створений PDF
+        compiled_pdf_path = os.path.join(temp_dir, os.path.splitext(tex_filename)[0] + ".pdf")
+        if not os.path.exists(compiled_pdf_path):
+            raise RuntimeError(f"PDF файл не було створено при компіляції LaTeX")
+
+        return compiled_pdf_path
+
     def _generate_latex_file(
             self,
             results: Dict[str, Any],
@@ -165,18 +365,26 @@ class ReportGenerator:
             output_path: str = None
     ) -> str:
         """Згенерувати LaTeX файл без компіляції в PDF"""
+        return self._render_latex(
+            lambda temp_dir: self._build_latex(results, dependent_variable, independent_variables, temp_dir),
+            output_path
+        )
+
+    def _render_latex(
+            self,
+            build: Callable[[str], Tuple[str, List[Tuple[str, str]]]],
+            output_path: str = None
+    ) -> str:
+        """
+        Зберегти LaTeX вміст, який ``build`` створює в тимчасовому каталозі, разом із зображеннями
+        """
         # Створення власного тимчасового каталогу замість використання tempfile
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = _report_stamp()
         temp_dir = os.path.join(os.getcwd(), f"temp_latex_{timestamp}")
         os.makedirs(temp_dir, exist_ok=True)
 
         try:
-            # Створення зображень для графіків
-            img_paths = self._create_visualization_images(results, dependent_variable, independent_variables, temp_dir)
-
-            # Створення LaTeX документу з оновленими пакетами
-            latex_content = self._create_latex_content_updated(results, dependent_variable, independent_variables,
-                                                               img_paths)
+            latex_content, img_paths = build(temp_dir)
 
             # Визначення шляху для збереження LaTeX файлу
             if output_path is None:
@@ -213,50 +421,7 @@ class ReportGenerator:
     ) -> str:
         """Створити LaTeX вміст для звіту з оновленими пакетами"""
 
-        latex_content = r"""
-    \documentclass{article}
-    \usepackage{amsmath, amssymb}
-    \usepackage[T2A]{fontenc} % Cyrillic font encoding
-    \usepackage[utf8]{inputenc} % UTF-8 input encoding
-    \usepackage{paratype} % PT Serif/Sans fonts with good Cyrillic support
-    \usepackage[ukrainian]{babel} % Ukrainian language support
-    \usepackage[a4paper, margin=2.5cm]{geometry}
-    \usepackage{mathtools}
-    \usepackage{xcolor}
-    \usepackage{graphicx}
-    \usepackage{float}
-    \usepackage{enumitem}
-    \usepackage{tikz}
-    \usetikzlibrary{matrix}
-    \usepackage{amsthm}
-    \usepackage{booktabs}
-    \usepackage{fancyhdr}
-    \usepackage{titlesec}
-    \usepackage{array}
-    \usepackage{longtable}
-    \usepackage{siunitx}
-
-    \titleformat{\section}{\Large\bfseries}{\thesection}{1em}{}
-    \titleformat{\subsection}{\large\bfseries}{\thesubsection}{1em}{}
-
-    \pagestyle{fancy}
-    \fancyhf{}
-    \fancyhead[C]{\textbf{Звіт багатофакторної лінійної регресії}}
-    \fancyfoot[C]{\thepage}
-    \renewcommand{\headrulewidth}{0.4pt}
-
-    \begin{document}
-
-    \begin{center}
-    \Large\textbf{Звіт багатофакторної лінійної регресії}
-    \end{center}
-
-    \vspace{1cm}
-
-    \textbf{Дата:} \today
-
-    \vspace{0.5cm}
-
+        latex_content = _latex_preamble() + r"""
     \section{Опис моделі}
 
     \begin{itemize}
@@ -270,45 +435,38 @@ class ReportGenerator:
 
     \section{Коефіцієнти регресії}
 
-   \renewcommand{\arraystretch}{1.5} % Increase row height by 50%
+    """ + _latex_coefficient_table(results) + r"""
+
+    \vspace{1cm}
+    """
+        # Діагностика мультиколінеарності та впливових спостережень
+        diagnostics = results.get("diagnostics")
+        if diagnostics:
+            latex_content += r"""
+    \section{Діагностика регресії}
+
     \begin{center}
-    \begin{tabular}{lccc}
+    \begin{tabular}{lc}
     \toprule
-    \textbf{Змінна} & \textbf{Коефіцієнт} & \textbf{P-значення} & \textbf{Значущість (p < 0.05)} \\
-     & \textbf{[95\% довірчий інтервал]} & & \\
+    \textbf{Змінна} & \textbf{VIF} \\
     \midrule
-    Вільний член & """ + f"{results['intercept']:.4f}" + r""" & Н/Д & Н/Д \\
-     & """ + f"[{results['intercept_confidence_interval']['lower']:.4f}, {results['intercept_confidence_interval']['upper']:.4f}]" + r""" & & \\
     """
-        # Додавання коефіцієнтів регресії
-        for var, coef in results["coefficients"].items():
-            p_value = results["p_values"].get(var, 0)
-            p_value_str = f"{p_value:.4e}" if p_value < 0.0001 else f"{p_value:.4f}"
-            is_significant = "Так" if p_value < 0.05 else "Ні"
-            conf_int = results["confidence_intervals"].get(var, {"lower": 0, "upper": 0})
-            conf_int_str = f"[{conf_int['lower']:.4f}, {conf_int['upper']:.4f}]"
-            latex_content += f"{var} & {coef:.4f} & {p_value_str} & {is_significant} \\\\\n"
-            latex_content += f" & {conf_int_str} & & \\\\\n"
-        latex_content += r"""
+            for var, vif in diagnostics["vif"].items():
+                vif_str = f"{vif:.4f}" if vif is not None else r"$\infty$"
+                latex_content += f"{var} & {vif_str} \\\\\n"
+            latex_content += r"""
     \bottomrule
     \end{tabular}
     \end{center}
 
+    Кількість впливових спостережень: \textbf{""" + str(len(diagnostics["influential_observations"])) + r"""}
+    (відстань Кука $> 4/n$, $|t_i| > 3$ або важіль $> 2p/n$).
+
     \vspace{1cm}
     """
         # Додавання зображень
         for img_path, title in img_paths:
-            img_filename = os.path.basename(img_path)
-            latex_content += r"""
-    \begin{figure}[H]
-       \centering
-       \includegraphics[width=0.8\textwidth]{""" + img_filename + r"""}
-       \caption{""" + title + r"""}
-       \label{fig:""" + title.lower().replace(" ", "_") + r"""}
-    \end{figure}
-
-    \vspace{0.5cm}
-    """
+            latex_content += _latex_figure(img_path, title)
         # Кореляційна матриця
         latex_content += r"""
 
@@ -370,7 +528,20 @@ class ReportGenerator:
         List[tuple]
             Список кортежів (шлях_до_зображення, заголовок)
         """
+        # pyplot зберігає поточну фігуру глобально, тому звіти, що генеруються
+        # одночасно в різних потоках, малюють графіки по черзі
+        with _pyplot_lock:
+            return self._draw_visualization_images(results, dependent_variable, independent_variables, output_dir)
+
+    def _draw_visualization_images(
+            self,
+            results: Dict[str, Any],
+            dependent_variable: str,
+            independent_variables: List[str],
+            output_dir: str
+    ) -> List[tuple]:
         image_paths = []
+        plt, sns = load_plotting()
 
         # Налаштування шрифту для підтримки кирилиці в matplotlib
         plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -378,104 +549,193 @@ class ReportGenerator:
         plt.rcParams['ps.fonttype'] = 42
 
         # Фактичні проти передбачених
-        plt.figure(figsize=(10, 6))
         pred_actual = pd.DataFrame(results["predicted_vs_actual"])
-        plt.scatter(pred_actual["actual"], pred_actual["predicted"], alpha=0.7)
-        min_val = min(pred_actual["actual"].min(), pred_actual["predicted"].min())
-        max_val = max(pred_actual["actual"].max(), pred_actual["predicted"].max())
-        plt.plot([min_val, max_val], [min_val, max_val], 'k--', lw=2)
-        plt.xlabel("Фактичні значення")
-        plt.ylabel("Передбачені значення")
-        plt.title(f"Фактичні проти передбачених значень для {dependent_variable}")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-
-        # Збереження зображення
         img_path = os.path.join(output_dir, "actual_vs_predicted.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        self._plot_actual_vs_predicted(plt, pred_actual, dependent_variable, img_path)
         image_paths.append((img_path, "Фактичні проти передбачених значень"))
 
         # Графік залишків
-        plt.figure(figsize=(10, 6))
         residuals = pd.DataFrame(results["residuals"])
-        plt.scatter(pred_actual["predicted"], residuals["residual"], alpha=0.7)
-        plt.axhline(y=0, color='r', linestyle='-')
-        plt.xlabel("Передбачені значення")
-        plt.ylabel("Залишки")
-        plt.title("Залишки проти передбачених значень")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-
-        # Збереження зображення
         img_path = os.path.join(output_dir, "residuals.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
+        self._plot_residuals(plt, pred_actual["predicted"], residuals["residual"], img_path)
         image_paths.append((img_path, "Графік залишків"))
 
         # Нормальний Q-Q графік залишків
-        plt.figure(figsize=(10, 6))
-        from scipy import stats
-        stats.probplot(residuals["residual"], plot=plt)
-        plt.title("Q-Q графік залишків")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-
-        # Збереження зображення
-        img_path = os.path.join(output_dir, "qq_plot.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
-        image_paths.append((img_path, "Нормальний Q-Q графік залишків"))
+        with timed("chart_qq_plot"):
+            plt.figure(figsize=(10, 6))
+            from scipy import stats
+            stats.probplot(residuals["residual"], plot=plt)
+            plt.title("Q-Q графік залишків")
+            plt.grid(True, alpha=0.3)
+            plt.tight_layout()
+
+            # Збереження зображення
+            img_path = os.path.join(output_dir, "qq_plot.png")
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+            image_paths.append((img_path, "Нормальний Q-Q графік залишків"))
 
         # Теплова карта кореляцій (коеф. Пірсона)
-        plt.figure(figsize=(10, 8))
-        corr_matrix = pd.DataFrame(results["correlation_matrix"])
-        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-        cmap = sns.diverging_palette(230, 20, as_cmap=True)
-        sns.heatmap(corr_matrix, mask=mask, annot=True, cmap=cmap, vmin=-1, vmax=1,
-                    square=True, linewidths=.5, fmt=".2f", center=0)
-        plt.title("Матриця кореляцій (коеф. Пірсона)")
-        plt.tight_layout()
-
-        # Збереження зображення
-        img_path = os.path.join(output_dir, "correlation_heatmap.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
-        image_paths.append((img_path, "Теплова карта кореляцій (коеф. Пірсона)"))
+        with timed("chart_correlation_pearson"):
+            plt.figure(figsize=(10, 8))
+            corr_matrix = pd.DataFrame(results["correlation_matrix"])
+            mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+            cmap = sns.diverging_palette(230, 20, as_cmap=True)
+            sns.heatmap(corr_matrix, mask=mask, annot=True, cmap=cmap, vmin=-1, vmax=1,
+                        square=True, linewidths=.5, fmt=".2f", center=0)
+            plt.title("Матриця кореляцій (коеф. Пірсона)")
+            plt.tight_layout()
+
+            # Збереження зображення
+            img_path = os.path.join(output_dir, "correlation_heatmap.png")
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+            image_paths.append((img_path, "Теплова карта кореляцій (коеф. Пірсона)"))
 
         # Теплова карта кореляцій (коеф. Спірмена)
-        plt.figure(figsize=(10, 8))
-        corr_matrix = pd.DataFrame(results["spearman_correlation"])
-        mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-        cmap = sns.diverging_palette(230, 20, as_cmap=True)
-        sns.heatmap(corr_matrix, mask=mask, annot=True, cmap=cmap, vmin=-1, vmax=1,
-                    square=True, linewidths=.5, fmt=".2f", center=0)
-        plt.title("Матриця кореляцій (коеф. Спірмена)")
-        plt.tight_layout()
-
-        # Збереження зображення
-        img_path = os.path.join(output_dir, "correlation_heatmap_spearman.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
-        image_paths.append((img_path, "Теплова карта кореляцій (коеф. Спірмена)"))
+        with timed("chart_correlation_spearman"):
+            plt.figure(figsize=(10, 8))
+            corr_matrix = pd.DataFrame(results["spearman_correlation"])
+            mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+            cmap = sns.diverging_palette(230, 20, as_cmap=True)
+            sns.heatmap(corr_matrix, mask=mask, annot=True, cmap=cmap, vmin=-1, vmax=1,
+                        square=True, linewidths=.5, fmt=".2f", center=0)
+            plt.title("Матриця кореляцій (коеф. Спірмена)")
+            plt.tight_layout()
+
+            # Збереження зображення
+            img_path = os.path.join(output_dir, "correlation_heatmap_spearman.png")
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+            image_paths.append((img_path, "Теплова карта кореляцій (коеф. Спірмена)"))
 
         # Гістограма залишків
-        plt.figure(figsize=(10, 6))
-        sns.histplot(residuals["residual"], kde=True)
-        plt.xlabel("Залишки")
-        plt.ylabel("Частота")
-        plt.title("Розподіл залишків")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-
-        # Збереження зображення
-        img_path = os.path.join(output_dir, "residuals_hist.png")
-        plt.savefig(img_path, dpi=300, bbox_inches="tight")
-        plt.close()
-        image_paths.append((img_path, "Гістограма залишків"))
+        with timed("chart_residuals_hist"):
+            plt.figure(figsize=(10, 6))
+            sns.histplot(residuals["residual"], kde=True)
+            plt.xlabel("Залишки")
+            plt.ylabel("Частота")
+            plt.title("Розподіл залишків")
+            plt.grid(True, alpha=0.3)
+            plt.tight_layout()
+
+            # Збереження зображення
+            img_path = os.path.join(output_dir, "residuals_hist.png")
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+            image_paths.append((img_path, "Гістограма залишків"))
+
+        rolling = results.get("rolling")
+        if rolling:
+            # Коефіцієнти ковзної регресії з 95% смугами та R² по вікнах
+            with timed("chart_rolling"):
+                fig, (ax_coef, ax_r2) = plt.subplots(
+                    2, 1, figsize=(10, 8), sharex=True, gridspec_kw={"height_ratios": [3, 1]}
+                )
+                window_end = np.asarray(rolling["window_end"])
+                for var, values in rolling["coefficients"].items():
+                    coef = np.asarray(values, dtype=float)
+                    se = np.asarray(rolling["standard_errors"][var], dtype=float)
+                    line, = ax_coef.plot(window_end, coef, lw=1.5, label=var)
+                    ax_coef.fill_between(window_end, coef - 1.96 * se, coef + 1.96 * se,
+                                         color=line.get_color(), alpha=0.15)
+                ax_coef.axhline(y=0, color='k', lw=0.8)
+                ax_coef.set_ylabel("Коефіцієнт")
+                mode = "ковзне" if rolling["mode"] == "rolling" else "розширюване"
+                ax_coef.set_title(f"Стабільність коефіцієнтів ({mode} вікно, {rolling['window']} спостережень)")
+                ax_coef.legend(loc="best", fontsize=8)
+                ax_coef.grid(True, alpha=0.3)
+
+                ax_r2.plot(window_end, np.asarray(rolling["r_squared"], dtype=float), color='grey')
+                ax_r2.set_xlabel("Останнє спостереження вікна")
+                ax_r2.set_ylabel("R²")
+                ax_r2.grid(True, alpha=0.3)
+                fig.tight_layout()
+
+                # Збереження зображення
+                img_path = os.path.join(output_dir, "rolling_coefficients.png")
+                fig.savefig(img_path, dpi=300, bbox_inches="tight")
+                plt.close(fig)
+                image_paths.append((img_path, "Стабільність коефіцієнтів у часі"))
+
+        diagnostics = results.get("diagnostics")
+        if diagnostics:
+            leverage = np.asarray(diagnostics["leverage"], dtype=float)
+            cooks = np.asarray(diagnostics["cooks_distance"], dtype=float)
+            studentized = np.asarray(diagnostics["studentized_residuals"], dtype=float)
+            thresholds = diagnostics["thresholds"]
+
+            # Графік впливу: стьюдентизовані залишки проти важелів, розмір точки - відстань Кука
+            with timed("chart_influence"):
+                plt.figure(figsize=(10, 6))
+                sizes = 20 + 400 * np.nan_to_num(cooks) / max(np.nanmax(cooks), 1e-12) if cooks.size else 20
+                plt.scatter(leverage, studentized, s=sizes, alpha=0.5)
+                plt.axhline(y=thresholds["studentized_residual"], color='r', linestyle='--')
+                plt.axhline(y=-thresholds["studentized_residual"], color='r', linestyle='--')
+                plt.axvline(x=thresholds["leverage"], color='grey', linestyle=':')
+                plt.xlabel("Важіль")
+                plt.ylabel("Стьюдентизовані залишки")
+                plt.title("Графік впливу спостережень")
+                plt.grid(True, alpha=0.3)
+                plt.tight_layout()
+
+                # Збереження зображення
+                img_path = os.path.join(output_dir, "influence.png")
+                plt.savefig(img_path, dpi=300, bbox_inches="tight")
+                plt.close()
+                image_paths.append((img_path, "Графік впливу спостережень"))
+
+            # Відстань Кука для кожного спостереження
+            with timed("chart_cooks_distance"):
+                plt.figure(figsize=(10, 6))
+                plt.vlines(np.arange(len(cooks)), 0, np.nan_to_num(cooks), alpha=0.7)
+                plt.axhline(y=thresholds["cooks_distance"], color='r', linestyle='--')
+                plt.xlabel("Номер спостереження")
+                plt.ylabel("Відстань Кука")
+                plt.title("Відстань Кука")
+                plt.grid(True, alpha=0.3)
+                plt.tight_layout()
+
+                # Збереження зображення
+                img_path = os.path.join(output_dir, "cooks_distance.png")
+                plt.savefig(img_path, dpi=300, bbox_inches="tight")
+                plt.close()
+                image_paths.append((img_path, "Відстань Кука"))
 
         return image_paths
 
+    def _plot_actual_vs_predicted(self, plt, pred_actual: pd.DataFrame, dependent_variable: str, img_path: str) -> None:
+        with timed("chart_actual_vs_predicted"):
+            plt.figure(figsize=(10, 6))
+            plt.scatter(pred_actual["actual"], pred_actual["predicted"], alpha=0.7)
+            min_val = min(pred_actual["actual"].min(), pred_actual["predicted"].min())
+            max_val = max(pred_actual["actual"].max(), pred_actual["predicted"].max())
+            plt.plot([min_val, max_val], [min_val, max_val], 'k--', lw=2)
+            plt.xlabel("Фактичні значення")
+            plt.ylabel("Передбачені значення")
+            plt.title(f"Фактичні проти передбачених значень для {dependent_variable}")
+            plt.grid(True, alpha=0.3)
+            plt.tight_layout()
+
+            # Збереження зображення
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+
+    def _plot_residuals(self, plt, predicted: pd.Series, residual: pd.Series, img_path: str) -> None:
+        with timed("chart_residuals"):
+            plt.figure(figsize=(10, 6))
+            plt.scatter(predicted, residual, alpha=0.7)
+            plt.axhline(y=0, color='r', linestyle='-')
+            plt.xlabel("Передбачені значення")
+            plt.ylabel("Залишки")
+            plt.title("Залишки проти передбачених значень")
+            plt.grid(True, alpha=0.3)
+            plt.tight_layout()
+
+            # Збереження зображення
+            plt.savefig(img_path, dpi=300, bbox_inches="tight")
+            plt.close()
+
     def _generate_excel_report(
             self,
             results: Dict[str, Any],
@@ -489,7 +749,7 @@ class ReportGenerator:
         # Визначення шляху для збереження Excel файлу
         if output_path is None:
             output_path = os.path.join(os.getcwd(),
-                                       f"regression_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+                                       f"regression_report_{_report_stamp()}.xlsx")
 
         # Створення Excel writer
         with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
@@ -542,4 +802,270 @@ class ReportGenerator:
             corr_df = pd.DataFrame(results["correlation_matrix"])
             corr_df.to_excel(writer, sheet_name="Матриця кореляцій")
 
-        return output_path
\ No newline at end of file
+            diagnostics = results.get("diagnostics")
+            if diagnostics:
+                # Аркуш факторів інфляції дисперсії
+                vif_df = pd.DataFrame({
+                    "Змінна": list(diagnostics["vif"].keys()),
+                    "VIF": list(diagnostics["vif"].values())
+                })
+                vif_df.to_excel(writer, sheet_name="VIF", index=False)
+
+                # Аркуш діагностики впливу
+                influential = np.zeros(len(diagnostics["leverage"]), dtype=bool)
+                influential[diagnostics["influential_observations"]] = True
+                influence_df = pd.DataFrame({
+                    "спостереження": np.arange(len(influential)),
+                    "важіль": diagnostics["leverage"],
+                    "відстань Кука": diagnostics["cooks_distance"],
+                    "стьюдентизований залишок": diagnostics["studentized_residuals"],
+                    "впливове": np.where(influential, "Так", "Ні")
+                })
+                sheet_name = "Діагностика впливу"
+                influence_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+                # Діаграма відстані Кука на аркуші діагностики
+                chart = writer.book.add_chart({"type": "scatter"})
+                chart.add_series({
+                    "name": "Відстань Кука",
+                    "categories": [sheet_name, 1, 0, len(influence_df), 0],
+                    "values": [sheet_name, 1, 2, len(influence_df), 2],
+                    "marker": {"type": "circle", "size": 3}
+                })
+                chart.set_title({"name": "Відстань Кука"})
+                chart.set_x_axis({"name": "Номер спостереження"})
+                chart.set_legend({"none": True})
+                writer.sheets[sheet_name].insert_chart("G2", chart)
+
+            rolling = results.get("rolling")
+            if rolling:
+                # Аркуш ковзної регресії: одне вікно на рядок
+                rolling_df = pd.DataFrame({
+                    "початок вікна": rolling["window_start"],
+                    "кінець вікна": rolling["window_end"],
+                    "R²": rolling["r_squared"],
+                    "вільний член": rolling["intercepts"]
+                })
+                for var, values in rolling["coefficients"].items():
+                    rolling_df[var] = values
+                for var, values in rolling["standard_errors"].items():
+                    rolling_df[f"{var} (ст. похибка)"] = values
+                sheet_name = "Ковзна регресія"
+                rolling_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+                # Діаграма коефіцієнтів по вікнах
+                chart = writer.book.add_chart({"type": "scatter", "subtype": "straight"})
+                for j, var in enumerate(rolling["coefficients"], start=4):
+                    chart.add_series({
+                        "name": [sheet_name, 0, j],
+                        "categories": [sheet_name, 1, 1, len(rolling_df), 1],
+                        "values": [sheet_name, 1, j, len(rolling_df), j]
+                    })
+                chart.set_title({"name": "Коефіцієнти по вікнах"})
+                chart.set_x_axis({"name": "Кінець вікна"})
+                writer.sheets[sheet_name].insert_chart(1, len(rolling_df.columns) + 1, chart)
+
+        return output_path
+
+    def generate_multi_report(
+            self,
+            results: Dict[str, Any],
+            format_type: str,
+            independent_variables: List[str],
+            output_path: str = None
+    ) -> str:
+        """
+        Згенерувати зведений звіт для кількох залежних змінних з одним розділом на кожну
+
+        Параметри:
+        -----------
+        results : Dict[str, Any]
+            Результати LinearRegression.fit_multi
+        format_type : str
+            Формат звіту (pdf, tex або xlsx)
+        independent_variables : List[str]
+            Назви незалежних змінних
+        output_path : str, optional
+            Шлях для збереження файлу. Якщо не вказано, буде створено шлях за замовчуванням.
+
+        Повертає:
+        --------
+        str
+            Шлях до згенерованого файлу звіту
+        """
+        def build(temp_dir: str) -> Tuple[str, List[Tuple[str, str]]]:
+            overview_images, target_images = self._create_multi_visualization_images(results, temp_dir)
+            latex_content = self._create_multi_latex_content(
+                results, independent_variables, overview_images, target_images
+            )
+            return latex_content, overview_images + [img for images in target_images.values() for img in images]
+
+        if format_type.lower() == "tex":
+            return self._render_latex(build, output_path)
+        elif format_type.lower() == "pdf":
+            return self._render_pdf(build, output_path)
+        elif format_type.lower() == "xlsx":
+            return self._generate_multi_excel_report(results, independent_variables, output_path)
+        else:
+            raise ValueError(f"Непідтримуваний формат: {format_type}")
+
+    def _create_multi_visualization_images(
+            self,
+            results: Dict[str, Any],
+            output_dir: str
+    ) -> Tuple[List[Tuple[str, str]], Dict[str, List[Tuple[str, str]]]]:
+        """
+        Створити зведений графік R² та графіки передбачень і залишків для кожної залежної змінної
+
+        Повертає:
+        --------
+        Tuple
+            Зведені зображення та зображення кожної залежної змінної, кортежі (шлях_до_зображення, заголовок)
+        """
+        with _pyplot_lock:
+            plt, _ = load_plotting()
+            plt.rcParams['font.family'] = 'DejaVu Sans'
+
+            # R² усіх залежних змінних
+            with timed("chart_r_squared"):
+                targets = results["dependent_variables"]
+                r_squared = [results["targets"][name]["r_squared"] for name in targets]
+                plt.figure(figsize=(10, max(3, 0.4 * len(targets) + 1)))
+                plt.barh(targets[::-1], r_squared[::-1], color="steelblue")
+                plt.xlim(0, 1)
+                plt.xlabel("R²")
+                plt.title("Коефіцієнт детермінації за залежними змінними")
+                plt.grid(True, axis="x", alpha=0.3)
+                plt.tight_layout()
+
+                img_path = os.path.join(output_dir, "r_squared_by_target.png")
+                plt.savefig(img_path, dpi=300, bbox_inches="tight")
+                plt.close()
+            overview_images = [(img_path, "Коефіцієнт детермінації за залежними змінними")]
+
+            target_images = {}
+            for i, name in enumerate(targets):
+                target = results["targets"][name]
+                pred_actual = pd.DataFrame(target["predicted_vs_actual"])
+                actual_path = os.path.join(output_dir, f"actual_vs_predicted_{i}.png")
+                self._plot_actual_vs_predicted(plt, pred_actual, name, actual_path)
+                residuals_path = os.path.join(output_dir, f"residuals_{i}.png")
+                self._plot_residuals(plt, pred_actual["predicted"], pred_actual["residual"], residuals_path)
+                target_images[name] = [
+                    (actual_path, f"Фактичні проти передбачених значень для {name}"),
+                    (residuals_path, f"Графік залишків для {name}")
+                ]
+        return overview_images, target_images
+
+    def _create_multi_latex_content(
+            self,
+            results: Dict[str, Any],
+            independent_variables: List[str],
+            overview_images: List[Tuple[str, str]],
+            target_images: Dict[str, List[Tuple[str, str]]]
+    ) -> str:
+        """Створити LaTeX вміст зведеного звіту з розділом для кожної залежної змінної"""
+        targets = results["dependent_variables"]
+        latex_content = _latex_preamble() + r"""
+    \section{Опис моделей}
+
+    \begin{itemize}
+       \item Залежні змінні: \textbf{""" + ", ".join(targets) + r"""}
+       \item Незалежні змінні: \textbf{""" + ", ".join(independent_variables) + r"""}
+    \end{itemize}
+
+    \begin{longtable}{lccc}
+    \toprule
+    \textbf{Залежна змінна} & \textbf{$R^2$} & \textbf{MSE} & \textbf{Вільний член} \\
+    \midrule
+    """
+        for name in targets:
+            target = results["targets"][name]
+            latex_content += (
+                f"{name} & {target['r_squared']:.4f} & {target['mse']:.4f} & {target['intercept']:.4f} \\\\\n"
+            )
+        latex_content += r"""
+    \bottomrule
+    \end{longtable}
+    """
+        for img_path, title in overview_images:
+            latex_content += _latex_figure(img_path, title)
+
+        # Розділ для кожної залежної змінної
+        for name in targets:
+            target = results["targets"][name]
+            latex_content += r"""
+    \newpage
+    \section{Залежна змінна: """ + name + r"""}
+
+    \begin{itemize}
+       \item Коефіцієнт детермінації $R^2$: \textbf{""" + f"{target['r_squared']:.4f}" + r"""}
+       \item Середньоквадратична похибка: \textbf{""" + f"{target['mse']:.4f}" + r"""}
+    \end{itemize}
+
+    \subsection{Коефіцієнти регресії}
+    """ + _latex_coefficient_table(target)
+            for img_path, title in target_images[name]:
+                latex_content += _latex_figure(img_path, title)
+
+        latex_content += r"""
+    \end{document}
+    """
+        return latex_content
+
+    def _generate_multi_excel_report(
+            self,
+            results: Dict[str, Any],
+            independent_variables: List[str],
+            output_path: str = None
+    ) -> str:
+        """
+        Згенерувати зведений звіт Excel: огляд, порівняння коефіцієнтів та аркуш для кожної залежної змінної
+        """
+        if output_path is None:
+            output_path = os.path.join(os.getcwd(),
+                                       f"regression_report_{_report_stamp()}.xlsx")
+
+        targets = results["dependent_variables"]
+        used_names = set()
+        with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+            # Аркуш огляду
+            overview_df = pd.DataFrame({
+                "Залежна змінна": targets,
+                "R²": [results["targets"][name]["r_squared"] for name in targets],
+                "Середньоквадратична похибка": [results["targets"][name]["mse"] for name in targets],
+                "Вільний член": [results["targets"][name]["intercept"] for name in targets]
+            })
+            overview_df.to_excel(writer, sheet_name=_sheet_name("Огляд", used_names), index=False)
+
+            # Коефіцієнти та p-значення усіх залежних змінних поруч
+            for title, key in (("Коефіцієнти", "coefficients"), ("P-значення", "p_values")):
+                table = pd.DataFrame({name: results["targets"][name][key] for name in targets})
+                table.index.name = "Змінна"
+                table.to_excel(writer, sheet_name=_sheet_name(title, used_names))
+
+            corr_df = pd.DataFrame(results["correlation_matrix"])
+            corr_df.to_excel(writer, sheet_name=_sheet_name("Матриця кореляцій", used_names))
+
+            # Аркуш кожної залежної змінної: коефіцієнти, праворуч передбачені значення
+            for name in targets:
+                target = results["targets"][name]
+                sheet_name = _sheet_name(name, used_names)
+                coef_df = pd.DataFrame({
+                    "Змінна": list(target["coefficients"]),
+                    "Коефіцієнт": list(target["coefficients"].values()),
+                    "P-значення": [target["p_values"][var] for var in target["coefficients"]],
+                    "Статистична значущість": [
+                        "Так" if target["p_values"][var] < 0.05 else "Ні" for var in target["coefficients"]
+                    ]
+                })
+                coef_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+                pred_actual_df = pd.DataFrame(target["predicted_vs_actual"]).rename(columns={
+                    "actual": "фактичні",
+                    "predicted": "передбачені",
+                    "residual": "залишок"
+                })
+                pred_actual_df.to_excel(writer, sheet_name=sheet_name, index=False, startcol=len(coef_df.columns) + 1)
+
+        return output_path
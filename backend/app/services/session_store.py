@@ -0,0 +1,648 @@
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app import config
+from app.services.metrics import record_cache_lookup
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SESSION_ID_PATTERN = re.compile(r"^session_[0-9a-f]+$")
+DATASET_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class SessionNotFoundError(KeyError):
+    """
+    Raised when a session id is unknown or its dataset is gone
+    """
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _atomic_write(path: str, write) -> None:
+    # Write to a temporary name first so readers never see a partial file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    _atomic_write(path, write)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class SessionStore(ABC):
+    """
+    Upload sessions backed by content-addressed, de-duplicated datasets
+
+    Every distinct upload is stored once under the SHA-256 of its content
+    (the dataset key). Sessions are cheap records pointing at a dataset, and
+    each dataset keeps a reference count of its sessions; it is deleted
+    together with its last session.
+
+    Dataset payloads are files under ``root/datasets``, either flat
+    (``<key>.pkl``) or in an object-store-style sharded layout
+    (``<key[:2]>/<key[2:4]>/<key>.pkl``). Subclasses decide where the
+    metadata (dataset descriptions, reference counts and sessions) lives.
+    As long as every worker points at the same ``root``, any worker can
+    serve any session.
+
+    Rows appended to a session are stored copy-on-write: the result is a new
+    dataset whose payload holds only the new rows and whose metadata names
+    its ``parent``. A child counts as one reference of its parent, so the
+    chain of parts stays alive as long as any dataset built on it does.
+
+    Because datasets never change once stored, each process may keep the
+    most recently loaded ones in memory (``cache_size``); sticky routing of a
+    session to one worker only raises the hit rate of that cache.
+    """
+
+    def __init__(self, root: str, sharded: bool = False, cache_size: int = 0):
+        self.root = root
+        self.sharded = sharded
+        self.datasets_dir = os.path.join(root, "datasets")
+        os.makedirs(self.datasets_dir, exist_ok=True)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    # Metadata backend
+
+    @abstractmethod
+    def get_dataset(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of a stored dataset, or None if it has not been ingested
+        """
+
+    @abstractmethod
+    def update_dataset(self, key: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Merge extra fields into the metadata of a stored dataset
+        """
+
+    @abstractmethod
+    def dataset_key(self, session_id: str) -> str:
+        """
+        Key of the dataset a session points at
+        """
+
+    @abstractmethod
+    def _register_dataset(self, key: str, meta: Dict[str, Any], payload_path: str) -> Dict[str, Any]:
+        """
+        Atomically move the written payload in place and record its metadata,
+        unless the key already exists; return the stored metadata. A new
+        dataset with a ``parent`` takes a reference on it.
+        """
+
+    @abstractmethod
+    def _add_session(self, session_id: str, key: str) -> None:
+        """
+        Record a session and increment the reference count of its dataset
+        """
+
+    @abstractmethod
+    def _remove_session(self, session_id: str) -> Tuple[str, int]:
+        """
+        Remove a session record; return its dataset key and the remaining references
+        """
+
+    @abstractmethod
+    def _move_session(self, session_id: str, key: str) -> Tuple[str, int]:
+        """
+        Point a session at another dataset; return the previous dataset key
+        and its remaining references
+        """
+
+    @abstractmethod
+    def _release_dataset(self, key: str) -> int:
+        """
+        Drop one reference of a dataset; return the remaining references
+        """
+
+    @abstractmethod
+    def _forget_dataset(self, key: str) -> bool:
+        """
+        Atomically remove the metadata and payload of a dataset without
+        references; return False if it was referenced again meanwhile
+        """
+
+    # Datasets
+
+    def put_dataset(
+            self,
+            key: str,
+            df: pd.DataFrame,
+            parent: Optional[Dict[str, Any]] = None,
+            **fields: Any
+    ) -> Dict[str, Any]:
+        """
+        Store a parsed dataset under its content key (no-op if already stored)
+
+        With ``parent`` (the metadata of a stored dataset), ``df`` holds rows
+        appended to that dataset and only those rows are written. Extra
+        ``fields`` are stored in the metadata together with the dataset.
+        """
+        meta = self.get_dataset(key)
+        if meta is not None:
+            return meta
+
+        meta = {
+            "key": key,
+            "columns": [str(col) for col in df.columns],
+            "rows": len(df),
+            "dtypes": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+            "created": _now()
+        }
+        if parent is not None:
+            # Appended parts are cast to the column types of the first part
+            meta.update(columns=parent["columns"], rows=parent["rows"] + len(df),
+                        dtypes=parent.get("dtypes", meta["dtypes"]), parent=parent["key"], part_rows=len(df))
+        meta.update(fields)
+
+        # The payload is written outside of any lock and only moved in place
+        # together with its metadata, so registered metadata always has its data
+        path = self._dataset_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_pickle(tmp_path)
+            return self._register_dataset(key, meta, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def load_dataset(self, key: str) -> pd.DataFrame:
+        """
+        Load a dataset, from the in-process cache when possible
+
+        The returned frame may be shared with other requests and must not be modified.
+        """
+        df = self._cached(key)
+        if df is not None:
+            return df
+
+        # Walk up the chain of appended parts until a cached or a root dataset
+        parts = []
+        base = None
+        part_key = key
+        while True:
+            meta = self.get_dataset(part_key)
+            if meta is None:
+                raise SessionNotFoundError(part_key)
+            parts.append(part_key)
+            part_key = meta.get("parent")
+            if part_key is None:
+                break
+            base = self._cached(part_key)
+            if base is not None:
+                break
+
+        frames = [] if base is None else [base]
+        for part_key in reversed(parts):
+            path = self._dataset_path(part_key)
+            if not os.path.exists(path):
+                raise SessionNotFoundError(part_key)
+            frames.append(pd.read_pickle(path))
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if len(frames) > 1:
+            # Parts with different levels concatenate to plain objects; unite their levels
+            for col in frames[0].select_dtypes("category").columns:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    continue
+                parts = [frame[col] for frame in frames]
+                if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+                    df[col] = union_categoricals(parts, sort_categories=True)
+                else:
+                    df[col] = df[col].astype("category")
+
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[key] = df
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return df
+
+    def _cached(self, key: str) -> Optional[pd.DataFrame]:
+        if self.cache_size <= 0:
+            return None
+        with self._cache_lock:
+            df = self._cache.get(key)
+            if df is not None:
+                self._cache.move_to_end(key)
+        record_cache_lookup("session_dataset", df is not None)
+        return df
+
+    # Sessions
+
+    def create_session(self, key: str) -> str:
+        """
+        Open a new session on a stored dataset and return its id
+        """
+        session_id = f"session_{uuid.uuid4().hex}"
+        self._add_session(session_id, key)
+        return session_id
+
+    def load_session(self, session_id: str) -> pd.DataFrame:
+        return self.load_dataset(self.dataset_key(session_id))
+
+    def delete_session(self, session_id: str) -> List[str]:
+        """
+        Close a session; the dataset is removed when nothing references it
+
+        Returns:
+        --------
+        List[str]
+            Keys of the deleted datasets: the session's dataset and the
+            parents it was the last reference of
+        """
+        key, remaining = self._remove_session(session_id)
+        return self._collect(key, remaining)
+
+    def move_session(self, session_id: str, key: str) -> List[str]:
+        """
+        Point a session at another stored dataset
+
+        Returns:
+        --------
+        List[str]
+            Keys of the datasets deleted because the session held their last reference
+        """
+        previous_key, remaining = self._move_session(session_id, key)
+        return self._collect(previous_key, remaining)
+
+    def _collect(self, key: str, remaining: int) -> List[str]:
+        # Delete an unreferenced dataset, then release its parent in turn
+        deleted = []
+        while remaining <= 0:
+            meta = self.get_dataset(key)
+            if not self._forget_dataset(key):
+                break
+            with self._cache_lock:
+                self._cache.pop(key, None)
+            deleted.append(key)
+
+            parent = meta.get("parent") if meta else None
+            if parent is None:
+                break
+            key, remaining = parent, self._release_dataset(parent)
+        return deleted
+
+    # Helpers
+
+    def _dataset_path(self, key: str, suffix: str = ".pkl") -> str:
+        if not DATASET_KEY_PATTERN.match(key):
+            raise SessionNotFoundError(key)
+        if self.sharded:
+            return os.path.join(self.datasets_dir, key[:2], key[2:4], f"{key}{suffix}")
+        return os.path.join(self.datasets_dir, f"{key}{suffix}")
+
+    def _remove_payload(self, key: str) -> None:
+        path = self._dataset_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _check_session_id(self, session_id: str) -> None:
+        # Session ids end up in file names and queries, so anything unexpected is rejected
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise SessionNotFoundError(session_id)
+
+
+class FileSessionStore(SessionStore):
+    """
+    Session store keeping all metadata as JSON files next to the datasets
+
+    Used for a local directory (single host) and for a shared network
+    directory mounted by every worker. Metadata updates are serialized with a
+    thread lock and an fcntl file lock.
+
+    Layout under ``root``::
+
+        datasets/<key>.pkl     parsed data frame (only the new rows for appended datasets)
+        datasets/<key>.json    columns, row count, parent and reference count
+        sessions/<id>.json     dataset key of the session
+    """
+
+    def __init__(self, root: str, sharded: bool = False, cache_size: int = 0):
+        super().__init__(root, sharded, cache_size)
+        self.sessions_dir = os.path.join(root, "sessions")
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def get_dataset(self, key: str) -> Optional[Dict[str, Any]]:
+        return _read_json(self._dataset_path(key, ".json"))
+
+    def update_dataset(self, key: str, **fields: Any) -> Dict[str, Any]:
+        with self._locked():
+            meta = self.get_dataset(key)
+            if meta is None:
+                raise SessionNotFoundError(key)
+            meta.update(fields)
+            _write_json(self._dataset_path(key, ".json"), meta)
+            return meta
+
+    def dataset_key(self, session_id: str) -> str:
+        session = _read_json(self._session_path(session_id))
+        if session is None:
+            raise SessionNotFoundError(session_id)
+        return session["dataset"]
+
+    def _register_dataset(self, key: str, meta: Dict[str, Any], payload_path: str) -> Dict[str, Any]:
+        with self._locked():
+            existing = self.get_dataset(key)
+            if existing is not None:
+                return existing
+            if meta.get("parent") is not None:
+                parent = self.get_dataset(meta["parent"])
+                if parent is None:
+                    raise SessionNotFoundError(meta["parent"])
+                parent["refcount"] += 1
+                _write_json(self._dataset_path(meta["parent"], ".json"), parent)
+            os.replace(payload_path, self._dataset_path(key))
+            meta = {**meta, "refcount": 0}
+            _write_json(self._dataset_path(key, ".json"), meta)
+            return meta
+
+    def _add_session(self, session_id: str, key: str) -> None:
+        with self._locked():
+            meta = self.get_dataset(key)
+            if meta is None:
+                raise SessionNotFoundError(key)
+            meta["refcount"] += 1
+            _write_json(self._dataset_path(key, ".json"), meta)
+            _write_json(self._session_path(session_id), {"dataset": key, "created": _now()})
+
+    def _remove_session(self, session_id: str) -> Tuple[str, int]:
+        with self._locked():
+            key = self.dataset_key(session_id)
+            os.remove(self._session_path(session_id))
+
+            meta = self.get_dataset(key)
+            if meta is None:
+                return key, 0
+            meta["refcount"] -= 1
+            _write_json(self._dataset_path(key, ".json"), meta)
+            return key, meta["refcount"]
+
+    def _move_session(self, session_id: str, key: str) -> Tuple[str, int]:
+        with self._locked():
+            session = _read_json(self._session_path(session_id))
+            if session is None:
+                raise SessionNotFoundError(session_id)
+            meta = self.get_dataset(key)
+            if meta is None:
+                raise SessionNotFoundError(key)
+            meta["refcount"] += 1
+            _write_json(self._dataset_path(key, ".json"), meta)
+            previous_key = session["dataset"]
+            _write_json(self._session_path(session_id), {**session, "dataset": key})
+
+            previous = self.get_dataset(previous_key)
+            if previous is None:
+                return previous_key, 0
+            previous["refcount"] -= 1
+            _write_json(self._dataset_path(previous_key, ".json"), previous)
+            return previous_key, previous["refcount"]
+
+    def _release_dataset(self, key: str) -> int:
+        with self._locked():
+            meta = self.get_dataset(key)
+            if meta is None:
+                return 0
+            meta["refcount"] -= 1
+            _write_json(self._dataset_path(key, ".json"), meta)
+            return meta["refcount"]
+
+    def _forget_dataset(self, key: str) -> bool:
+        with self._locked():
+            meta = self.get_dataset(key)
+            # A concurrent upload may have re-referenced the dataset meanwhile
+            if meta is not None and meta["refcount"] > 0:
+                return False
+            if meta is not None:
+                os.remove(self._dataset_path(key, ".json"))
+            self._remove_payload(key)
+            return True
+
+    def _session_path(self, session_id: str) -> str:
+        self._check_session_id(session_id)
+        return os.path.join(self.sessions_dir, f"{session_id}.json")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Thread lock for this process plus a file lock for other workers
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store keeping metadata in an embedded SQLite database
+
+    Dataset payloads stay in the sharded file layout under ``root``, while
+    dataset descriptions, reference counts and sessions are rows in
+    ``root/sessions.db``. Reference counting relies on SQLite transactions,
+    so several worker processes on one host can share the store safely.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS datasets (
+            key TEXT PRIMARY KEY,
+            meta TEXT NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            dataset TEXT NOT NULL REFERENCES datasets(key),
+            created TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, root: str, sharded: bool = True, cache_size: int = 0):
+        super().__init__(root, sharded, cache_size)
+        self.db_path = os.path.join(root, "sessions.db")
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def get_dataset(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT meta, refcount FROM datasets WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row[0]), "refcount": row[1]}
+
+    def update_dataset(self, key: str, **fields: Any) -> Dict[str, Any]:
+        with self._transaction() as db:
+            row = db.execute("SELECT meta FROM datasets WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise SessionNotFoundError(key)
+            meta = {**json.loads(row[0]), **fields}
+            meta.pop("refcount", None)
+            db.execute("UPDATE datasets SET meta = ? WHERE key = ?", (json.dumps(meta), key))
+        return self.get_dataset(key)
+
+    def dataset_key(self, session_id: str) -> str:
+        self._check_session_id(session_id)
+        row = self._connection().execute(
+            "SELECT dataset FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            raise SessionNotFoundError(session_id)
+        return row[0]
+
+    def _register_dataset(self, key: str, meta: Dict[str, Any], payload_path: str) -> Dict[str, Any]:
+        with self._transaction() as db:
+            inserted = db.execute(
+                "INSERT OR IGNORE INTO datasets (key, meta, refcount) VALUES (?, ?, 0)",
+                (key, json.dumps(meta))
+            ).rowcount
+            if inserted and meta.get("parent") is not None:
+                referenced = db.execute(
+                    "UPDATE datasets SET refcount = refcount + 1 WHERE key = ?", (meta["parent"],)
+                ).rowcount
+                if not referenced:
+                    raise SessionNotFoundError(meta["parent"])
+            if inserted:
+                os.replace(payload_path, self._dataset_path(key))
+        return self.get_dataset(key)
+
+    def _add_session(self, session_id: str, key: str) -> None:
+        with self._transaction() as db:
+            updated = db.execute("UPDATE datasets SET refcount = refcount + 1 WHERE key = ?", (key,)).rowcount
+            if not updated:
+                raise SessionNotFoundError(key)
+            db.execute(
+                "INSERT INTO sessions (session_id, dataset, created) VALUES (?, ?, ?)",
+                (session_id, key, _now())
+            )
+
+    def _remove_session(self, session_id: str) -> Tuple[str, int]:
+        self._check_session_id(session_id)
+        with self._transaction() as db:
+            row = db.execute("SELECT dataset FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise SessionNotFoundError(session_id)
+            key = row[0]
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            db.execute("UPDATE datasets SET refcount = refcount - 1 WHERE key = ?", (key,))
+            remaining = db.execute("SELECT refcount FROM datasets WHERE key = ?", (key,)).fetchone()
+        return key, remaining[0] if remaining else 0
+
+    def _move_session(self, session_id: str, key: str) -> Tuple[str, int]:
+        self._check_session_id(session_id)
+        with self._transaction() as db:
+            row = db.execute("SELECT dataset FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise SessionNotFoundError(session_id)
+            updated = db.execute("UPDATE datasets SET refcount = refcount + 1 WHERE key = ?", (key,)).rowcount
+            if not updated:
+                raise SessionNotFoundError(key)
+            db.execute("UPDATE sessions SET dataset = ? WHERE session_id = ?", (key, session_id))
+            previous_key = row[0]
+            db.execute("UPDATE datasets SET refcount = refcount - 1 WHERE key = ?", (previous_key,))
+            remaining = db.execute("SELECT refcount FROM datasets WHERE key = ?", (previous_key,)).fetchone()
+        return previous_key, remaining[0] if remaining else 0
+
+    def _release_dataset(self, key: str) -> int:
+        with self._transaction() as db:
+            db.execute("UPDATE datasets SET refcount = refcount - 1 WHERE key = ?", (key,))
+            remaining = db.execute("SELECT refcount FROM datasets WHERE key = ?", (key,)).fetchone()
+        return remaining[0] if remaining else 0
+
+    def _forget_dataset(self, key: str) -> bool:
+        with self._transaction() as db:
+            row = db.execute("SELECT refcount FROM datasets WHERE key = ?", (key,)).fetchone()
+            # A concurrent upload may have re-referenced the dataset meanwhile
+            if row is not None and row[0] > 0:
+                return False
+            db.execute("DELETE FROM datasets WHERE key = ?", (key,))
+            self._remove_payload(key)
+            return True
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections must not be shared across threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+
+def create_session_store(backend: str, root: str, cache_size: int = 0) -> SessionStore:
+    """
+    Create the session store selected by configuration
+
+    Parameters:
+    -----------
+    backend : str
+        ``local`` - JSON metadata in a local directory (single host);
+        ``shared`` - the same on a directory shared by all hosts, with the
+        sharded object-store-style layout;
+        ``sqlite`` - metadata in SQLite, datasets in the sharded layout
+    root : str
+        Directory holding the store
+    cache_size : int
+        Number of datasets each process keeps in memory (0 disables the cache)
+    """
+    if backend == "local":
+        return FileSessionStore(root, sharded=False, cache_size=cache_size)
+    if backend == "shared":
+        return FileSessionStore(root, sharded=True, cache_size=cache_size)
+    if backend == "sqlite":
+        return SQLiteSessionStore(root, sharded=True, cache_size=cache_size)
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+session_store = create_session_store(config.SESSION_BACKEND, config.SESSION_DIR, config.SESSION_CACHE_SIZE)
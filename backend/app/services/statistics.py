@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class SufficientStatistics:
+    """
+    Row count, means and co-moments of the numeric columns of a dataset
+
+    These are all a linear regression with intercept (and the Pearson
+    correlation matrix) needs, and statistics of two disjoint sets of rows
+    merge exactly (Chan et al. pairwise update), so appending rows only costs
+    a pass over the new rows. The co-moment matrix is kept centered, which
+    avoids the cancellation of raw cross-products.
+
+    Missing values are counted per column and treated as zeros, which leaves
+    every entry between two columns without missing values exact; entries
+    involving a column with missing values must not be used.
+    """
+
+    def __init__(
+            self,
+            columns: List[str],
+            count: int,
+            mean: np.ndarray,
+            comoment: np.ndarray,
+            null_counts: np.ndarray
+    ):
+        self.columns = list(columns)
+        self.count = int(count)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.comoment = np.asarray(comoment, dtype=np.float64)
+        self.null_counts = np.asarray(null_counts, dtype=np.int64)
+
+    @classmethod
+    def from_frame(
+            cls,
+            df: pd.DataFrame,
+            columns: Optional[List[str]] = None,
+            chunk_rows: int = 65536
+    ) -> "SufficientStatistics":
+        """
+        Compute the statistics of the numeric columns of a data frame
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Data
+        columns : List[str], optional
+            Columns to include (default: every numeric column); a ValueError
+            is raised if one of them is not numeric
+        chunk_rows : int
+            Number of rows converted and centered at a time
+        """
+        if columns is None:
+            columns = [str(col) for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        for col in columns:
+            if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]):
+                raise ValueError(f"Column {col} is not numeric")
+
+        stats = cls.empty(columns)
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows][columns].to_numpy(dtype=np.float64)
+            missing = np.isnan(chunk)
+            chunk[missing] = 0.0
+            mean = chunk.mean(axis=0)
+            centered = chunk - mean
+            stats = stats.merge(cls(columns, len(chunk), mean, centered.T @ centered, missing.sum(axis=0)))
+        return stats
+
+    @classmethod
+    def empty(cls, columns: List[str]) -> "SufficientStatistics":
+        m = len(columns)
+        return cls(columns, 0, np.zeros(m), np.zeros((m, m)), np.zeros(m, dtype=np.int64))
+
+    def merge(self, other: "SufficientStatistics") -> "SufficientStatistics":
+        """
+        Statistics of the union of two disjoint sets of rows
+        """
+        if other.columns != self.columns:
+            raise ValueError("Statistics cover different columns")
+        if self.count == 0:
+            return other
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (other.count / count)
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.count * other.count / count)
+        return SufficientStatistics(self.columns, count, mean, comoment, self.null_counts + other.null_counts)
+
+    def covers(self, columns: List[str]) -> bool:
+        """
+        Whether the statistics are exact for these columns (present and without missing values)
+        """
+        index = {col: j for j, col in enumerate(self.columns)}
+        return all(col in index and self.null_counts[index[col]] == 0 for col in columns)
+
+    def select(self, columns: List[str]) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Row count, means and co-moment matrix restricted to ``columns`` (in that order)
+        """
+        index = [self.columns.index(col) for col in columns]
+        return self.count, self.mean[index], self.comoment[np.ix_(index, index)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "comoment": self.comoment.tolist(),
+            "null_counts": self.null_counts.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SufficientStatistics":
+        return cls(data["columns"], data["count"], data["mean"], data["comoment"], data["null_counts"])
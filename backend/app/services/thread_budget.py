@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from app import config
+from app.services.profiling import profile_thread
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may run on (respects container CPU sets)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def derive_threads(workers: int, pool_size: int, cpus: Optional[int] = None) -> int:
+    """
+    Native threads per analysis so that all workers running full pools use each CPU once
+    """
+    cpus = available_cpus() if cpus is None else cpus
+    return max(1, cpus // max(1, workers * pool_size))
+
+
+class ThreadBudget:
+    """
+    Bounded execution of CPU-bound work with a native thread limit
+
+    NumPy/SciPy BLAS, and libraries built on them, start one thread per core
+    by default, in every request of every worker, which oversubscribes the
+    host under concurrent load. Work submitted through ``run`` executes on a
+    pool of ``pool_size`` threads, so at most that many analyses compete
+    within a worker, and while any of them runs the native thread pools are
+    limited to ``threads``. Pools inside an analysis (cross-validation folds,
+    bootstrap batches) use the same number of workers, each limited to one
+    native thread while the pool runs (see ``fan_out``).
+
+    BLAS thread limits are process-wide, so the limit is reference counted:
+    the first running analysis applies it and the last one restores the
+    original limits.
+
+    The native libraries are discovered once, by ``initialize``. Discovery
+    walks the loaded shared objects with a Python callback while holding the
+    dynamic loader's lock, which deadlocks against a thread importing an
+    extension module at the same time, so it must not run per request.
+    """
+
+    def __init__(self, threads: int, pool_size: int, enabled: bool = True):
+        self.threads = threads
+        self.pool_size = pool_size
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._fanning_out = 0
+        self._controller = None
+        self._limiter = None
+        self._fan_out_limiter = None
+
+    def initialize(self) -> None:
+        """
+        Discover the native thread pools to limit
+
+        The server calls this at startup, before warm-up imports start in the
+        background and before requests arrive.
+        """
+        # SciPy ships its own BLAS next to NumPy's; load it before scanning
+        import scipy.linalg  # noqa: F401
+        from threadpoolctl import ThreadpoolController
+
+        with self._lock:
+            if self._controller is None:
+                self._controller = ThreadpoolController()
+
+    @contextmanager
+    def limit(self) -> Iterator[None]:
+        """
+        Limit native thread pools to the budget while the block runs
+        """
+        if not self.enabled:
+            yield
+            return
+        if self._controller is None:
+            self.initialize()
+
+        with self._lock:
+            if self._active == 0:
+                self._limiter = self._controller.limit(limits=self.threads)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                if self._active == 0:
+                    self._limiter.restore_original_limits()
+                    self._limiter = None
+
+    @contextmanager
+    def fan_out(self) -> Iterator[None]:
+        """
+        Limit native thread pools to one thread while a pool inside an analysis runs
+
+        The pool's ``threads`` workers then use the analysis' share of CPUs
+        once instead of ``threads`` times. The limit is process-wide, so
+        analyses running alongside are single-threaded meanwhile too, which
+        never exceeds the budget. Like ``limit`` it is reference counted.
+        """
+        if not self.enabled:
+            yield
+            return
+        if self._controller is None:
+            self.initialize()
+
+        with self._lock:
+            if self._fanning_out == 0:
+                self._fan_out_limiter = self._controller.limit(limits=1)
+            self._fanning_out += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._fanning_out -= 1
+                if self._fanning_out == 0:
+                    self._fan_out_limiter.restore_original_limits()
+                    self._fan_out_limiter = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``func(*args)`` on the analysis pool within the thread budget
+
+        The request context (stage timings, profiling) is carried over to the pool thread.
+        """
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), context.run, self._call, func, args)
+
+    def _call(self, func: Callable[..., Any], args: tuple) -> Any:
+        with self.limit(), profile_thread():
+            return func(*args)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="analysis")
+            return self._executor
+
+
+# Without the budget native libraries, and the pools inside an analysis, use every CPU
+thread_budget = ThreadBudget(
+    (config.THREADS_PER_ANALYSIS or derive_threads(config.WEB_CONCURRENCY, config.ANALYSIS_POOL_SIZE))
+    if config.THREAD_BUDGET_ENABLED else available_cpus(),
+    config.ANALYSIS_POOL_SIZE,
+    enabled=config.THREAD_BUDGET_ENABLED
+)
@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Dict
+
+from app.services.metrics import timed
+
+
+def preload() -> Dict[str, float]:
+    """
+    Import the heavy libraries used by fitting and reporting
+
+    statsmodels, scikit-learn, scipy, matplotlib and seaborn are imported
+    lazily so that the server starts quickly. Calling this once in the
+    background moves their import cost off the first analysis request.
+
+    Returns:
+    --------
+    Dict[str, float]
+        Seconds spent on each warm-up step
+    """
+    durations = {}
+
+    def step(name: str, func) -> None:
+        start = time.perf_counter()
+        with timed(f"warmup_{name}"):
+            func()
+        durations[name] = time.perf_counter() - start
+
+    def load_fitting():
+        import statsmodels.api  # noqa: F401
+        import sklearn.metrics  # noqa: F401
+        import sklearn.preprocessing  # noqa: F401
+
+    def load_reporting():
+        import scipy.stats  # noqa: F401
+        from app.services.report import load_plotting
+
+        load_plotting()
+
+    step("fitting", load_fitting)
+    step("reporting", load_reporting)
+    return durations
+
+
+def start_background_warmup(delay: float = 0.0) -> threading.Thread:
+    """
+    Run preload() in a daemon thread after ``delay`` seconds
+    """
+    def run():
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            preload()
+        except Exception as e:
+            # Warm-up is an optimization only, the libraries load on first use anyway
+            print(f"Warm-up failed: {str(e)}")
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the regression backend
+
+Run from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.bench_pipeline --preset quick
+    python -m benchmarks.compare old.json new.json
+"""
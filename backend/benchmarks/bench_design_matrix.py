@@ -0,0 +1,97 @@
+"""
+Peak memory and time of design matrix extraction
+
+Compares the previous extraction path (mean imputation written back into the
+session frame, ``.copy()`` of X and y, ``sm.add_constant``) with
+DataProcessor.build_design_matrix, which fills one float64/float32 block that
+already contains the intercept column. Peak memory is measured with
+tracemalloc, which tracks NumPy and pandas buffers.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.bench_design_matrix --rows 1000000 --predictors 50
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.services.data_processor import DataProcessor
+from benchmarks.common import write_results
+from benchmarks.datasets import make_dataset, predictor_names
+
+
+def legacy_extraction(df: pd.DataFrame, dependent: str, independent: List[str]) -> np.ndarray:
+    """
+    The extraction path used before build_design_matrix, up to the array statsmodels fits on
+    """
+    import statsmodels.api as sm
+
+    all_vars = independent + [dependent]
+    if df[all_vars].isna().any().any():
+        df[all_vars] = df[all_vars].fillna(df[all_vars].mean())
+    X = df[independent].copy()
+    y = df[dependent].copy()
+    X_with_const = sm.add_constant(X)
+    return np.asarray(X_with_const, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+
+def profile(func: Callable[[], Any]) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"seconds": elapsed, "peak_bytes": peak}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--predictors", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--output", help="path of the JSON result file")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    # Import outside the measured region
+    import statsmodels.api  # noqa: F401
+
+    processor = DataProcessor()
+    results = []
+    for rows in args.rows:
+        for predictors in args.predictors:
+            df = make_dataset(rows, predictors, missing_rate=args.missing_rate)
+            independent = predictor_names(predictors)
+            data_bytes = rows * (predictors + 1) * 8
+
+            cases = {
+                # The legacy path mutates its input, so it gets its own copy
+                "legacy": lambda: legacy_extraction(df.copy(deep=True), "y", independent),
+                "design_float64": lambda: processor.build_design_matrix(df, "y", independent),
+                "design_float32": lambda: processor.build_design_matrix(df, "y", independent, dtype=np.float32),
+            }
+            for method, func in cases.items():
+                stats = profile(func)
+                if method == "legacy":
+                    # Do not count the defensive copy made for the legacy path
+                    stats["peak_bytes"] -= data_bytes
+                results.append({"rows": rows, "predictors": predictors, "method": method, **stats})
+                print(f"rows={rows:<9} predictors={predictors:<4} {method:<15} "
+                      f"peak {stats['peak_bytes'] / 2 ** 20:9.1f} MiB "
+                      f"({stats['peak_bytes'] / data_bytes:4.2f}x data) {stats['seconds'] * 1000:9.1f} ms")
+
+    output_path = write_results("design_matrix", results, vars(args), args.output)
+    print(f"Results written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Stage-by-stage benchmark of the upload -> analyze -> report pipeline
+
+Every case of the rows x predictors grid is generated synthetically with a
+fixed seed, and each stage the API goes through is timed on its own:
+
+* ``parse_csv`` / ``parse_csv_gz`` / ``parse_parquet`` / ``parse_excel`` -
+  DataProcessor.read_file as used by /api/upload-csv (Parquet only with pyarrow)
+* ``profile`` - DataProcessor.profile_columns, also part of the upload
+* ``pickle_store`` / ``pickle_load`` - session persistence between requests
+* ``prepare_data`` - DataProcessor.build_design_matrix
+* ``fit`` - LinearRegression.fit_design
+* ``serialize`` - building and JSON-encoding the /api/analyze response
+* ``charts`` - ReportGenerator chart rendering
+* ``report_xlsx`` - Excel report
+* ``latex_compile`` - pdflatex passes (only when pdflatex is installed)
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.bench_pipeline --preset quick
+    python -m benchmarks.bench_pipeline --rows 1000 100000 --predictors 5 50 --repeat 5
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from app.models.regression import LinearRegression
+from app.routers.api import build_analysis_response
+from app.schemas.models import RegressionResult
+from app.services.data_processor import DataProcessor
+from app.services.report import ReportGenerator
+from benchmarks.common import measure, write_results
+from benchmarks.datasets import (
+    make_dataset, predictor_names, to_csv_bytes, to_csv_gz_bytes, to_excel_bytes, to_parquet_bytes
+)
+
+PRESETS = {
+    "quick": {"rows": [1_000, 10_000, 100_000], "predictors": [1, 10, 50]},
+    "full": {"rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000], "predictors": [1, 10, 50, 200]},
+}
+
+# Excel sheets cannot hold more rows than this
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def run_case(
+        rows: int,
+        predictors: int,
+        args: argparse.Namespace,
+        work_dir: str
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark all pipeline stages for one dataset shape
+    """
+    df = make_dataset(rows, predictors, seed=args.seed, missing_rate=args.missing_rate)
+    dependent = "y"
+    independent = predictor_names(predictors)
+    processor = DataProcessor()
+    records = []
+
+    def record(stage: str, func) -> Any:
+        stats = measure(func, repeat=args.repeat)
+        value = stats.pop("value")
+        records.append({"rows": rows, "predictors": predictors, "stage": stage, **stats})
+        print(f"  {stage:<14} median {stats['median'] * 1000:10.2f} ms")
+        return value
+
+    print(f"rows={rows} predictors={predictors}")
+
+    # Upload: parsing the raw file
+    csv_bytes = to_csv_bytes(df)
+    record("parse_csv", lambda: processor.read_file("data.csv", csv_bytes))
+    del csv_bytes
+
+    # Compressed and columnar uploads of the same data
+    csv_gz_bytes = to_csv_gz_bytes(df)
+    record("parse_csv_gz", lambda: processor.read_file("data.csv.gz", csv_gz_bytes))
+    del csv_gz_bytes
+
+    if importlib.util.find_spec("pyarrow") is not None:
+        parquet_bytes = to_parquet_bytes(df)
+        record("parse_parquet", lambda: processor.read_file("data.parquet", parquet_bytes))
+        del parquet_bytes
+
+    if args.excel and rows <= min(args.excel_max_rows, EXCEL_MAX_ROWS):
+        excel_bytes = to_excel_bytes(df)
+        record("parse_excel", lambda: processor.read_file("data.xlsx", excel_bytes))
+        del excel_bytes
+
+    record("profile", lambda: processor.profile_columns(df))
+
+    # Session persistence
+    pickle_path = os.path.join(work_dir, f"bench_{rows}_{predictors}.pkl")
+    record("pickle_store", lambda: df.to_pickle(pickle_path))
+    session_df = record("pickle_load", lambda: pd.read_pickle(pickle_path))
+    os.remove(pickle_path)
+
+    # Analysis
+    design = record(
+        "prepare_data",
+        lambda: processor.build_design_matrix(session_df, dependent, independent, dtype=args.dtype)
+    )
+    results = record("fit", lambda: LinearRegression().fit_design(design, independent, dependent))
+    record("serialize", lambda: json.dumps(RegressionResult(**build_analysis_response(results)).model_dump()))
+
+    # Reports
+    if rows <= args.report_max_rows:
+        generator = ReportGenerator()
+        chart_dir = os.path.join(work_dir, "charts")
+        os.makedirs(chart_dir, exist_ok=True)
+        img_paths = record(
+            "charts",
+            lambda: generator._create_visualization_images(results, dependent, independent, chart_dir)
+        )
+
+        xlsx_path = os.path.join(work_dir, "report.xlsx")
+        record("report_xlsx", lambda: generator.generate_report(results, "xlsx", dependent, independent, xlsx_path))
+
+        if shutil.which("pdflatex"):
+            tex_filename = "report.tex"
+            with open(os.path.join(chart_dir, tex_filename), "w", encoding="utf-8") as f:
+                f.write(generator._create_latex_content_updated(results, dependent, independent, img_paths))
+            record("latex_compile", lambda: generator._compile_latex(chart_dir, tex_filename))
+
+    return records
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick",
+                        help="predefined rows x predictors grid")
+    parser.add_argument("--rows", type=int, nargs="+", help="override the row counts of the grid")
+    parser.add_argument("--predictors", type=int, nargs="+", help="override the predictor counts of the grid")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument("--missing-rate", type=float, default=0.0,
+                        help="share of predictor values set to NaN (exercises imputation)")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="floating point type of the design matrix")
+    parser.add_argument("--max-cells", type=float, default=2e8,
+                        help="skip cases with rows * (predictors + 1) above this value")
+    parser.add_argument("--report-max-rows", type=int, default=100_000,
+                        help="only render charts and reports up to this many rows")
+    parser.add_argument("--excel", action="store_true", help="also benchmark Excel parsing")
+    parser.add_argument("--excel-max-rows", type=int, default=100_000,
+                        help="only benchmark Excel parsing up to this many rows")
+    parser.add_argument("--output", help="path of the JSON result file")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    grid = PRESETS[args.preset]
+    rows_grid = args.rows or grid["rows"]
+    predictors_grid = args.predictors or grid["predictors"]
+
+    results = []
+    skipped = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        for rows in rows_grid:
+            for predictors in predictors_grid:
+                if rows * (predictors + 1) > args.max_cells:
+                    skipped.append({"rows": rows, "predictors": predictors})
+                    print(f"rows={rows} predictors={predictors} skipped (--max-cells)")
+                    continue
+                results.extend(run_case(rows, predictors, args, work_dir))
+
+    params = {**vars(args), "rows": rows_grid, "predictors": predictors_grid, "skipped": skipped}
+    output_path = write_results("pipeline", results, params, args.output)
+    print(f"Results written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Cold-start benchmark of the API process
+
+Each run starts a fresh interpreter and measures:
+
+* ``import_app`` - importing ``app.main`` (what a uvicorn worker does before serving)
+* ``first_analyze`` - upload plus the first /api/analyze call, without warm-up
+* ``warmup`` - app.services.warmup.preload(), the background warm-up step
+
+It also records which heavy libraries are already loaded right after the
+import, to catch accidental eager imports.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.bench_startup --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("statsmodels", "sklearn", "scipy", "matplotlib", "seaborn")
+
+# Script executed in a fresh interpreter; prints one JSON line with its timings
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+import_app = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+
+result = {{"import_app": import_app, "loaded_after_import": loaded}}
+mode = {mode!r}
+if mode == "first_analyze":
+    from fastapi.testclient import TestClient
+    from benchmarks.datasets import make_dataset, predictor_names, to_csv_bytes
+    client = TestClient(app.main.app)
+    data = to_csv_bytes(make_dataset(1000, 5))
+    start = time.perf_counter()
+    session = client.post("/api/upload-csv", files={{"file": ("data.csv", data)}}).json()
+    response = client.post("/api/analyze", json={{
+        "session_id": session["session_id"],
+        "dependent_variable": "y",
+        "independent_variables": predictor_names(5)
+    }})
+    response.raise_for_status()
+    result["first_analyze"] = time.perf_counter() - start
+elif mode == "warmup":
+    from app.services.warmup import preload
+    start = time.perf_counter()
+    preload()
+    result["warmup"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def run_probe(mode: str) -> Dict[str, Any]:
+    env = {**os.environ, "WARMUP_ENABLED": "0"}
+    process = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES, mode=mode)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def summarize(name: str, times: List[float], extra: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "stage": name,
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        **extra
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--output", help="path of the JSON result file")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = []
+    for mode in ("import_app", "first_analyze", "warmup"):
+        runs = [run_probe(mode) for _ in range(args.repeat)]
+        extra = {"loaded_after_import": runs[-1]["loaded_after_import"]} if mode == "import_app" else {}
+        record = summarize(mode, [run[mode] for run in runs], extra)
+        results.append(record)
+        print(f"{mode:<14} median {record['median'] * 1000:10.2f} ms")
+
+    loaded = results[0]["loaded_after_import"]
+    if loaded:
+        print(f"Heavy modules imported eagerly: {', '.join(loaded)}")
+
+    output_path = write_results("startup", results, vars(args), args.output)
+    print(f"Results written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Throughput of concurrent analyses with and without the native thread budget
+
+Simulates ``--workers`` uvicorn workers (one process each) that all serve
+``--concurrency`` analyses at the same time, and runs the same load twice:
+
+* ``off`` - NumPy/SciPy BLAS use their default thread count (one per core)
+  in every analysis of every worker, as before the budget existed
+* ``on`` - every analysis runs inside ThreadBudget.limit() with the thread
+  count the server derives from the worker count and the pool size, and
+  the pools inside an analysis run one native thread per worker
+
+An analysis is LinearRegression.fit_design plus closed-form cross-validation
+(and a bootstrap with ``--bootstrap N``) on a synthetic rows x predictors
+dataset. Per mode the benchmark reports analyses per second over all
+workers and the latency distribution of single analyses.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.bench_threads
+    python -m benchmarks.bench_threads --workers 4 --concurrency 2 --rows 200000 --predictors 50
+
+Set neither OPENBLAS_NUM_THREADS nor OMP_NUM_THREADS, otherwise the ``off``
+mode does not show the library defaults.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.common import write_results
+
+MODES = ("off", "on")
+
+
+def run_worker(args: argparse.Namespace, enabled: bool, barrier, queue) -> None:
+    """
+    Run one simulated worker process and report its latencies
+    """
+    # Configure the server's budget, which the pools inside an analysis also use
+    os.environ.update(
+        THREAD_BUDGET_ENABLED="1" if enabled else "0",
+        WEB_CONCURRENCY=str(args.workers),
+        ANALYSIS_POOL_SIZE=str(args.concurrency),
+        THREADS_PER_ANALYSIS="0"
+    )
+    from app.models.bootstrap import Bootstrapper
+    from app.models.cross_validation import CrossValidator
+    from app.models.regression import LinearRegression
+    from app.services.data_processor import DataProcessor
+    from app.services.thread_budget import thread_budget as budget
+    from benchmarks.datasets import make_dataset, predictor_names
+
+    independent = predictor_names(args.predictors)
+    df = make_dataset(args.rows, args.predictors, seed=args.seed)
+    design = DataProcessor().build_design_matrix(df, "y", independent)
+    del df
+
+    threads = budget.threads
+    budget.initialize()
+
+    def analysis() -> float:
+        start = time.perf_counter()
+        with budget.limit():
+            LinearRegression().fit_design(design, independent, "y")
+            CrossValidator(max_workers=budget.threads).evaluate(design[:, :-1], design[:, -1])
+            if args.bootstrap:
+                Bootstrapper(n_resamples=args.bootstrap, max_workers=budget.threads).confidence_intervals(
+                    design[:, :-1], design[:, -1], independent
+                )
+        return time.perf_counter() - start
+
+    # Untimed run so imports and first-call costs are excluded
+    analysis()
+    barrier.wait()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(lambda _: analysis(), range(args.requests)))
+    queue.put({"wall": time.perf_counter() - start, "latencies": latencies, "threads": threads})
+
+
+def run_mode(args: argparse.Namespace, mode: str) -> Dict[str, Any]:
+    """
+    Run all simulated workers under one budget mode
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=run_worker, args=(args, mode == "on", barrier, queue))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for report in reports for latency in report["latencies"])
+    wall = max(report["wall"] for report in reports)
+    return {
+        "budget": mode,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "rows": args.rows,
+        "predictors": args.predictors,
+        "bootstrap": args.bootstrap,
+        "threads_per_analysis": reports[0]["threads"],
+        "times": latencies,
+        "min": latencies[0],
+        "median": statistics.median(latencies),
+        "mean": statistics.fmean(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "wall": wall,
+        "throughput": len(latencies) / wall
+    }
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="simulated uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="analyses running at once per worker (the analysis pool size)")
+    parser.add_argument("--requests", type=int, default=8, help="analyses per worker")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows of the synthetic dataset")
+    parser.add_argument("--predictors", type=int, default=50, help="predictors of the synthetic dataset")
+    parser.add_argument("--bootstrap", type=int, default=0, help="bootstrap resamples per analysis (0 skips it)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="budget modes to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument("--output", help="path of the JSON result file")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = []
+    for mode in args.modes:
+        record = run_mode(args, mode)
+        results.append(record)
+        print(
+            f"budget={mode:<3} threads/analysis={record['threads_per_analysis']:<3} "
+            f"throughput {record['throughput']:8.2f}/s  "
+            f"p50 {record['median'] * 1000:9.1f} ms  p95 {record['p95'] * 1000:9.1f} ms"
+        )
+
+    output_path = write_results("threads", results, vars(args), args.output)
+    print(f"Results written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, Any]:
+    """
+    Run ``func`` several times and collect wall-clock timings
+
+    One untimed run comes first, so lazy imports and other first-call costs
+    are not counted.
+
+    Parameters:
+    -----------
+    func : Callable[[], Any]
+        Zero-argument callable to benchmark
+    repeat : int
+        Number of timed runs
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Raw timings in seconds together with min/median/mean and the value
+        returned by the last run (under ``"value"``)
+    """
+    # Untimed run so imports and first-call costs are excluded
+    value = func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "value": value
+    }
+
+
+def git_revision() -> Optional[str]:
+    """
+    Current git commit of the working tree, if available
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    """
+    Describe the machine and library versions the benchmark ran with
+    """
+    versions = {}
+    for name in ("numpy", "pandas", "statsmodels", "sklearn", "matplotlib", "fastapi"):
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = getattr(module, "__version__", None)
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions
+    }
+
+
+def write_results(
+        benchmark: str,
+        results: List[Dict[str, Any]],
+        params: Dict[str, Any],
+        output_path: Optional[str] = None
+) -> str:
+    """
+    Save benchmark results as JSON
+
+    Parameters:
+    -----------
+    benchmark : str
+        Name of the benchmark, used in the default file name
+    results : List[Dict[str, Any]]
+        One record per measured case
+    params : Dict[str, Any]
+        Parameters the benchmark was run with
+    output_path : str, optional
+        Target file. Defaults to ``benchmarks/results/<benchmark>_<timestamp>.json``
+
+    Returns:
+    --------
+    str
+        Path of the written file
+    """
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_path = os.path.join(RESULTS_DIR, f"{benchmark}_{timestamp}.json")
+
+    document = {
+        "benchmark": benchmark,
+        "environment": environment_info(),
+        "params": params,
+        "results": results
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+    return output_path
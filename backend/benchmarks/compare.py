@@ -0,0 +1,83 @@
+"""
+Compare two benchmark result files and flag regressions
+
+Cases are matched on every key of a result record except the timings, so the
+script works for any benchmark written with ``benchmarks.common.write_results``.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 1.10
+
+Exits with status 1 if any case got slower than ``threshold`` times the baseline.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+TIMING_KEYS = {"times", "min", "median", "mean", "p95", "p99", "wall"}
+# Measurements that are not timings, ignored when matching cases
+MEASUREMENT_KEYS = {"throughput", "requests", "errors", "error_rate", "statuses", "peak_rss_bytes"}
+
+
+def case_key(record: Dict[str, Any]) -> Tuple:
+    """
+    Identify a result record by its non-timing fields
+    """
+    return tuple(sorted((k, str(v)) for k, v in record.items() if k not in TIMING_KEYS | MEASUREMENT_KEYS))
+
+
+def load_results(path: str) -> Dict[Tuple, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    return {case_key(record): record for record in document["results"]}
+
+
+def compare(
+        baseline: Dict[Tuple, Dict[str, Any]],
+        candidate: Dict[Tuple, Dict[str, Any]],
+        metric: str,
+        threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compute candidate/baseline ratios for every case present in both runs
+    """
+    rows = []
+    for key, record in candidate.items():
+        if key not in baseline or metric not in record:
+            continue
+        base_value = baseline[key][metric]
+        ratio = record[metric] / base_value if base_value > 0 else float("inf")
+        rows.append({
+            "case": dict(key),
+            "baseline": base_value,
+            "candidate": record[metric],
+            "ratio": ratio,
+            "regression": ratio > threshold
+        })
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="result file of the reference run")
+    parser.add_argument("candidate", help="result file of the run to check")
+    parser.add_argument("--metric", default="median", choices=sorted(TIMING_KEYS - {"times"}))
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="ratio above which a case counts as a regression")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.candidate), args.metric, args.threshold)
+    regressions = 0
+    for row in sorted(rows, key=lambda r: r["ratio"], reverse=True):
+        label = ", ".join(f"{k}={v}" for k, v in row["case"].items())
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['ratio']:6.2f}x  {row['baseline']:.4f}s -> {row['candidate']:.4f}s  {label}  {flag}")
+        regressions += row["regression"]
+
+    print(f"{len(rows)} cases compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import gzip
+import io
+import numpy as np
+import pandas as pd
+from typing import List
+
+
+def make_dataset(
+        rows: int,
+        predictors: int,
+        seed: int = 0,
+        missing_rate: float = 0.0
+) -> pd.DataFrame:
+    """
+    Generate a synthetic regression dataset
+
+    Parameters:
+    -----------
+    rows : int
+        Number of observations
+    predictors : int
+        Number of independent variables (named x1..xN)
+    seed : int
+        Seed of the random generator, the same seed always gives the same data
+    missing_rate : float
+        Share of predictor values replaced with NaN
+
+    Returns:
+    --------
+    pd.DataFrame
+        Data frame with columns x1..xN and the dependent variable y
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, predictors))
+    beta = rng.uniform(-2.0, 2.0, predictors)
+    y = 1.5 + X @ beta + rng.standard_normal(rows)
+
+    if missing_rate > 0:
+        mask = rng.random((rows, predictors)) < missing_rate
+        X[mask] = np.nan
+
+    df = pd.DataFrame(X, columns=predictor_names(predictors))
+    df["y"] = y
+    return df
+
+
+def predictor_names(predictors: int) -> List[str]:
+    """
+    Names of the independent variables produced by make_dataset
+    """
+    return [f"x{i + 1}" for i in range(predictors)]
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a data frame the way a user would upload it as CSV
+    """
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def to_excel_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a data frame the way a user would upload it as Excel
+    """
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def to_csv_gz_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a data frame as gzip-compressed CSV
+    """
+    return gzip.compress(to_csv_bytes(df), compresslevel=6)
+
+
+def to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a data frame as Parquet (requires pyarrow)
+    """
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
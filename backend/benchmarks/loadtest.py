@@ -0,0 +1,456 @@
+"""
+End-to-end load test of the API with scripted user sessions
+
+Starts the app with uvicorn in a subprocess (or targets a running server
+with ``--url``) and replays user sessions. A session is:
+
+1. ``POST /api/upload-csv`` with a synthetic CSV of one of ``--shapes``
+2. ``--analyses`` calls of ``POST /api/analyze``, each with a random set of predictors
+3. ``POST /api/generate-report`` in one of ``--report-formats``
+4. ``DELETE /api/session/{id}``
+
+Sessions run in one of two ways:
+
+* closed loop (default): ``--concurrency`` users run sessions back to back
+* open loop: with ``--rate R``, sessions arrive as a Poisson process of R
+  sessions per second, at most ``--concurrency`` at a time. Session latency
+  then includes the time spent waiting for a free slot.
+
+Per endpoint the test reports throughput, p50/p95/p99 latency and error
+rate (any status >= 400 or connection failure). For a server it started, it
+also reports the peak resident memory of the whole uvicorn process tree.
+The tree is sampled from /proc, or with psutil when that is installed.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.loadtest --sessions 20 --concurrency 4
+    python -m benchmarks.loadtest --workers 2 --rate 1.5 --duration 60 --shapes 10000x10 100000x20
+    python -m benchmarks.loadtest --env ADMISSION_MEMORY_MB=512 --env THREADS_PER_ANALYSIS=2
+
+Uploads cycle through ``--datasets`` distinct files per shape. Sessions
+uploading the same file share the stored dataset, as they would in
+production.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.common import write_results
+from benchmarks.datasets import make_dataset, predictor_names, to_csv_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("upload", "analyze", "report", "delete")
+
+
+class RSSSampler(threading.Thread):
+    """
+    Background sampler of the summed resident memory of a process and its descendants
+    """
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+        try:
+            import psutil
+
+            self._process = psutil.Process(pid)
+        except ImportError:
+            self._process = None
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.peak = max(self.peak, self.sample())
+            except OSError:
+                pass
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+    def sample(self) -> int:
+        if self._process is not None:
+            import psutil
+
+            total = 0
+            for process in [self._process] + self._process.children(recursive=True):
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        return sum(_proc_rss(pid) for pid in _proc_tree(self.pid))
+
+
+def _proc_tree(root: int) -> List[int]:
+    """
+    The process and all its descendants, from /proc
+    """
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace, session_dir: str) -> Tuple[subprocess.Popen, str]:
+    """
+    Start uvicorn with the app and wait until it answers
+    """
+    port = _free_port()
+    env = {**os.environ, "WEB_CONCURRENCY": str(args.workers), "SESSION_DIR": session_dir}
+    for assignment in args.env:
+        name, _, value = assignment.partition("=")
+        env[name] = value
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start in time")
+
+
+def _multipart(filename: str, content: bytes, content_type: str) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode("utf-8")
+    return head + content + f"\r\n--{boundary}--\r\n".encode("utf-8"), f"multipart/form-data; boundary={boundary}"
+
+
+class Client:
+    """
+    One keep-alive HTTP connection recording the latency and status of every request
+    """
+
+    def __init__(self, url: str, timeout: float, samples: List[Dict[str, Any]], lock: threading.Lock):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.samples = samples
+        self.lock = lock
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def request(
+            self,
+            endpoint: str,
+            method: str,
+            path: str,
+            body: Optional[bytes] = None,
+            content_type: Optional[str] = None
+    ) -> Tuple[int, bytes]:
+        headers = {"Content-Type": content_type} if content_type else {}
+        start = time.perf_counter()
+        for attempt in range(2):
+            reused = self.connection is not None
+            try:
+                if self.connection is None:
+                    self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                status, content = response.status, response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                # The server closed the idle keep-alive connection; retry once on a new one
+                if reused and attempt == 0:
+                    continue
+                status, content = 0, b""
+            except (OSError, http.client.HTTPException):
+                # Connection failures count as errors; the next request reconnects
+                self.close()
+                status, content = 0, b""
+                break
+        with self.lock:
+            self.samples.append({
+                "endpoint": endpoint,
+                "status": status,
+                "latency": time.perf_counter() - start
+            })
+        return status, content
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_session(
+        client: Client,
+        payload: bytes,
+        predictors: int,
+        args: argparse.Namespace,
+        rng: random.Random
+) -> bool:
+    """
+    Replay one user session; return whether every request succeeded
+    """
+    body, content_type = _multipart("data.csv", payload, "text/csv")
+    status, content = client.request("upload", "POST", "/api/upload-csv", body, content_type)
+    if status != 200:
+        return False
+    session_id = json.loads(content)["session_id"]
+    names = predictor_names(predictors)
+    ok = True
+
+    for _ in range(args.analyses):
+        independent = sorted(rng.sample(names, rng.randint(1, predictors)), key=names.index)
+        request = {
+            "session_id": session_id,
+            "dependent_variable": "y",
+            "independent_variables": independent,
+            **args.analyze_options
+        }
+        status, _ = client.request("analyze", "POST", "/api/analyze", json.dumps(request).encode(), "application/json")
+        ok &= status == 200
+
+    if args.report_formats:
+        request = {
+            "session_id": session_id,
+            "dependent_variable": "y",
+            "independent_variables": names,
+            "report_format": rng.choice(args.report_formats)
+        }
+        status, _ = client.request(
+            "report", "POST", "/api/generate-report", json.dumps(request).encode(), "application/json"
+        )
+        ok &= status == 200
+
+    status, _ = client.request("delete", "DELETE", f"/api/session/{session_id}")
+    return ok and status == 200
+
+
+def summarize(name: str, latencies: List[float], statuses: List[int], elapsed: float) -> Dict[str, Any]:
+    """
+    Latency percentiles, throughput and error rate of one endpoint
+    """
+    latencies = sorted(latencies)
+    errors = sum(1 for status in statuses if status == 0 or status >= 400)
+    counts: Dict[str, int] = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def percentile(q: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        "endpoint": name,
+        "requests": len(statuses),
+        "errors": errors,
+        "error_rate": errors / len(statuses) if statuses else 0.0,
+        "statuses": counts,
+        "throughput": len(statuses) / elapsed if elapsed > 0 else 0.0,
+        "times": latencies,
+        "min": latencies[0] if latencies else None,
+        "median": percentile(0.5),
+        "mean": statistics.fmean(latencies) if latencies else None,
+        "p95": percentile(0.95),
+        "p99": percentile(0.99)
+    }
+
+
+def run_load(args: argparse.Namespace, url: str) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Replay the sessions against ``url`` and summarize them per endpoint
+    """
+    rng = random.Random(args.seed)
+    payloads = []
+    for shape_index, (rows, predictors) in enumerate(args.shapes):
+        for i in range(args.datasets):
+            df = make_dataset(rows, predictors, seed=args.seed + 1000 * shape_index + i)
+            payloads.append((to_csv_bytes(df), predictors))
+    print(f"Prepared {len(payloads)} datasets")
+
+    samples: List[Dict[str, Any]] = []
+    sessions: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def session_task(index: int, arrival: float) -> None:
+        if not hasattr(local, "client"):
+            local.client = Client(url, args.request_timeout, samples, lock)
+        payload, predictors = payloads[index % len(payloads)]
+        ok = run_session(local.client, payload, predictors, args, random.Random(args.seed + index))
+        with lock:
+            sessions.append({"latency": time.perf_counter() - arrival, "ok": ok})
+
+    start = time.perf_counter()
+    deadline = start + args.duration if args.duration else None
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = []
+        index = 0
+        next_arrival = start
+        while (args.sessions is None or index < args.sessions) and (deadline is None or time.perf_counter() < deadline):
+            if args.rate > 0:
+                # Open loop: Poisson arrivals independent of the server's speed
+                next_arrival += rng.expovariate(args.rate)
+                time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                futures.append(executor.submit(session_task, index, time.perf_counter()))
+            else:
+                # Closed loop: start a session whenever a user is free
+                while sum(not f.done() for f in futures) >= args.concurrency:
+                    time.sleep(0.005)
+                futures.append(executor.submit(session_task, index, time.perf_counter()))
+            index += 1
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    records = []
+    for endpoint in ENDPOINTS:
+        selected = [s for s in samples if s["endpoint"] == endpoint]
+        if selected:
+            records.append(summarize(endpoint, [s["latency"] for s in selected], [s["status"] for s in selected], elapsed))
+    records.append(summarize(
+        "session",
+        [s["latency"] for s in sessions],
+        [200 if s["ok"] else 500 for s in sessions],
+        elapsed
+    ))
+    return records, elapsed
+
+
+def _shape(value: str) -> Tuple[int, int]:
+    rows, _, predictors = value.lower().partition("x")
+    return int(rows), int(predictors)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running server instead of starting one (no memory figures)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes of the started server")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="environment variable of the started server (repeatable)")
+    parser.add_argument("--sessions", type=int, help="number of sessions (default 20 without --duration)")
+    parser.add_argument("--duration", type=float, help="stop starting sessions after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="sessions running at the same time")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="session arrivals per second (Poisson); 0 runs a closed loop")
+    parser.add_argument("--shapes", type=_shape, nargs="+", default=[(10_000, 10)], metavar="ROWSxPREDICTORS",
+                        help="dataset shapes uploaded by the sessions")
+    parser.add_argument("--datasets", type=int, default=4, help="distinct files per shape")
+    parser.add_argument("--analyses", type=int, default=3, help="/api/analyze calls per session")
+    parser.add_argument("--analyze-options", type=json.loads, default={},
+                        help='extra JSON fields of the analyze requests, e.g. \'{"cross_validation": true}\'')
+    parser.add_argument("--report-formats", nargs="*", choices=["pdf", "xlsx"], default=["xlsx"],
+                        help="report formats to pick from (none skips the report)")
+    parser.add_argument("--request-timeout", type=float, default=300.0, help="seconds before a request fails")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="seconds to wait for the server")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data and the session scripts")
+    parser.add_argument("--output", help="path of the JSON result file")
+    args = parser.parse_args(argv)
+    if args.sessions is None and args.duration is None:
+        args.sessions = 20
+    return args
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    process = sampler = None
+    with tempfile.TemporaryDirectory(prefix="loadtest_sessions_") as session_dir:
+        if args.url:
+            url = args.url
+        else:
+            process, url = start_server(args, session_dir)
+            sampler = RSSSampler(process.pid)
+            sampler.start()
+        try:
+            records, elapsed = run_load(args, url)
+        finally:
+            peak_rss = sampler.stop() if sampler else None
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    print(f"{'endpoint':<9} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for record in records:
+        if record["median"] is None:
+            continue
+        print(
+            f"{record['endpoint']:<9} {record['requests']:>8} {record['error_rate']:>7.1%} "
+            f"{record['throughput']:>8.2f} {record['median'] * 1000:>9.1f} "
+            f"{record['p95'] * 1000:>9.1f} {record['p99'] * 1000:>9.1f}"
+        )
+    if peak_rss is not None:
+        print(f"Peak RSS of the server: {peak_rss / 1024 ** 2:.1f} MiB over {elapsed:.1f} s")
+        for record in records:
+            record["peak_rss_bytes"] = peak_rss
+
+    params = {**vars(args), "shapes": [f"{rows}x{predictors}" for rows, predictors in args.shapes]}
+    output_path = write_results("loadtest", records, params, args.output)
+    print(f"Results written to {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -121,8 +121,8 @@ const DataInput = ({ onDataProcessed }) => {
       return;
     }
     const fileExtension = file.name.split('.').pop().toLowerCase();
-    if (!['csv', 'xlsx', 'xls'].includes(fileExtension)) {
-      setError('Please upload a CSV or Excel file');
+    if (!['csv', 'gz', 'gzip', 'bz2', 'zst', 'zstd', 'xlsx', 'xls', 'parquet', 'pq', 'arrow', 'feather'].includes(fileExtension)) {
+      setError('Please upload a CSV, Excel, Parquet or Arrow file');
       return;
     }
     setLoading(true);
@@ -156,7 +156,7 @@ const DataInput = ({ onDataProcessed }) => {
                   type="file"
                   id="fileInput"
                   onChange={handleFileChange}
-                  accept=".csv,.xlsx,.xls"
+                  accept=".csv,.gz,.gzip,.bz2,.zst,.zstd,.xlsx,.xls,.parquet,.pq,.arrow,.feather"
               />
               <FileLabel htmlFor="fileInput">
                 <div style={{ marginBottom: '16px' }}>
@@ -175,7 +175,7 @@ const DataInput = ({ onDataProcessed }) => {
                   </svg>
                 </div>
                 <FileName>{file ? file.name : 'Натисніть для вибору файлу'}</FileName>
-                <FileFormatText>CSV, Excel (.xlsx, .xls)</FileFormatText>
+                <FileFormatText>CSV (.csv, .csv.gz, .csv.bz2, .csv.zst), Excel (.xlsx, .xls), Parquet, Arrow</FileFormatText>
               </FileLabel>
             </FileInputContainer>
             {error && <ErrorText>{error}</ErrorText>}
@@ -189,8 +189,10 @@ const DataInput = ({ onDataProcessed }) => {
         <Section>
           <Subtitle>Підтримувані формати файлів:</Subtitle>
           <List>
-            <li>CSV файли (.csv)</li>
+            <li>CSV файли (.csv), також стиснені (.csv.gz, .csv.bz2, .csv.zst)</li>
             <li>Excel файли (.xlsx, .xls)</li>
+            <li>Parquet файли (.parquet)</li>
+            <li>Arrow файли (.arrow, .feather)</li>
           </List>
           <Subtitle style={{ marginTop: '16px' }}>Вимоги до даних:</Subtitle>
           <List>